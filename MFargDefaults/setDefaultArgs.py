@@ -8,22 +8,24 @@
 """
 def setDefaultArgs():
   model_choices =['C4CDC','ECFM','ECFT','ECFTX','LECSR','NPALM','LKBGWM','LWCFAS','LWCSAS','LWCSIM','WCFM']
-  function_choices=['min','max','mean']
+  function_choices=['min','max','mean','sum','std','var','median','p10','p90']
 #
 #   Define dictionary of arguments to use in ArgumentParser
 #    
   resampleHelp="""\
     Resampling only aggregates horizontal flow vector results
-      -Flow Magnitudes are summed
-      -Flow Direction is averaged
+      -Flow Right & Front Face flows are summed
+      -Magnitude & Direction of the summed flows
       --------------------------
       -res 5 Aggregates 5x5 grid
       -res 1 Default or no resampling:[1x1]
       """
   aggregateHelp="""\
     Aggregate multiple rasters into a single raster
-     usings one of the predefined functions
-     {0} """.format( function_choices)
+     usings the predefined functions
+     {0}
+     or pNN percentiles, computed while the binary file is read
+    -- Multiple functions: '-agg mean,std,p95' """.format( function_choices)
       
   modelHelp="""\
     Model defines Spatial Reference
@@ -53,9 +55,72 @@ def setDefaultArgs():
     -- 'RIGHT|FRONT' indicates FLOW_RIGHT_FACE and FLOW_FRONT_FACE
     --  No parameters indicates all budget terms
     """
+  stationsHelp = """\
+    Extract heads time series at stations to CSV.
+    -- Station file lines: 'STATION ROW COL [LAYER]'
+    -- CSV is written to the rasFolder
+    """
+
+  startHelp = """\
+    Model start date 'YYYY-MM-DD'
+    -- Converts TOTIM (days) to calendar dates
+    """
+  poolHelp = """\
+    Export rasters with a pool of N workers
+    while the binary file is being read
+    -- '-pool 0' Default exports in the read loop
+    -- ArcGIS exports are always in the read loop
+    """
+  tifOptHelp = """\
+    GeoTIFF creation options for rasters written without ArcGIS
+    -- '-tifopt COMPRESS=DEFLATE,PREDICTOR=3,TILED=YES'
+    """
+  stackHelp = """\
+    Stack output into multi-band files instead of
+    one raster per term, layer and stress period
+    -- 'layer'  one file per layer holding every period
+    -- 'period' one file per period holding every layer
+    -- GeoTIFF or NetCDF with -backend gdal, .npy with -backend npy;
+       not available for ArcGIS rasters
+    """
+  aggByHelp = """\
+    Aggregate by calendar windows (requires -start)
+    -- 'month'     each calendar month across years
+    -- 'wateryear' October thru September
+    -- 'season'    wet (-wetmonths) and dry months
+    -- 'year'      calendar years
+    -- Multiple windows: '-aggby month,season'
+    """
+  wetMonthsHelp = """\
+    Wet season months for '-aggby season'
+    -- '-wetmonths 5-10'  Default May thru October
+    -- '-wetmonths 11-4'  ranges may wrap the year end
+    -- '-wetmonths 6,7,8,9'
+    """
+  speciesHelp = """\
+    MT3D species to process with -tds
+    -- '-species 1,3'   species MT3D001.UCN and MT3D003.UCN
+    -- '-species 1S'    sorbed phase MT3D001S.UCN
+    -- '-species all'   every species file found
+    -- Default is every dissolved species
+    """
+  ucnScaleHelp = """\
+    Scale factors applied to MT3D concentrations
+    -- '-ucnscale 1000' Default g/L to mg/L for every species
+    -- '-ucnscale 1000,2:1,1S:0.001' per species overrides
+    """
+  backendHelp = """\
+    Raster output backend
+    -- 'arcpy' ArcGIS rasters (default unless -noArcGIS)
+    -- 'gdal'  GeoTIFF rasters and shapefiles
+    -- 'npy'   NumPy .npy arrays without GIS libraries
+    -- 'null'  Discard output to time reading alone
+    """
   argHelp={
     'bud':
     ['option',"Process CellxCell budgets",'cbc'],
+    'backend':
+    ['getArg',backendHelp,'backend',None,['arcpy','gdal','npy','null']],
     'noArcGIS':
     ['option',"Process binary files without using ArcGIS",'noArc'],
     'quiet':
@@ -69,9 +134,19 @@ def setDefaultArgs():
     'res':
     ['getArg',resampleHelp,'resample','1'],
     'agg':
-    ['getArg',aggregateHelp,'aggregate',None,function_choices],
+    ['getArg',aggregateHelp,'aggregate',None],
+    'aggby':
+    ['getArg',aggByHelp,'aggBy',None],
+    'wetmonths':
+    ['getArg',wetMonthsHelp,'wetMonths','5-10'],
+    'aggonly':
+    ['option',"Write only -agg rasters, not each record",'aggOnly'],
     'tds':
-    ['option',"Process TDS from MT3D file.",'conc'],
+    ['option',"Process TDS from MT3D species files.",'conc'],
+    'species':
+    ['getArg',speciesHelp,'species',None],
+    'ucnscale':
+    ['getArg',ucnScaleHelp,'ucnScale','1000'],
     'uzf':
     ['option',"Process UZF cellbycell budgets.",'uzfcbc'],
     'vec':
@@ -91,12 +166,44 @@ def setDefaultArgs():
     'clpgdb':
     ['getArg',"Separate Geodatabase for Clipped Rasters",'clpgdb',
      r'H:\Documents\ArcGIS\Default.gdb'],
+    'cliponly':
+    ['option',"Write only clipped rasters, not full model rasters",
+     'clipOnly'],
     'strPer':
     ['getArg',stressPerHelp,'strStr',None],
     'lay':
     ['getArg',layerHelp,'layerStr',None],
     'terms':
-    ['getArg',termsHelp,'terms',None]
+    ['getArg',termsHelp,'terms',None],
+    'pts':
+    ['getArg',stationsHelp,'stations',None],
+    'start':
+    ['getArg',startHelp,'startDate',None],
+    'pool':
+    ['getArg',poolHelp,'exportPool','0'],
+    'workers':
+    ['getArg',"Scan heads records with N worker processes",'workers','0'],
+    'stack':
+    ['getArg',stackHelp,'stack',None,['layer','period']],
+    'stackfmt':
+    ['getArg',"Stacked output as GeoTIFF 'tif' or NetCDF 'nc'",'stackFmt',
+     'tif',['tif','nc']],
+    'tifopt':
+    ['getArg',tifOptHelp,'tifOpts',None],
+    'poll':
+    ['getArg',"Seconds between Terminate button and progress updates",
+     'pollSeconds','0.25'],
+    'progress':
+    ['getArg',"Seconds between progress lines with ETA (0 for none)",
+     'progressSeconds','2'],
+    'report':
+    ['getArg',"Write a JSON run report of per stage timing",'report',None],
+    'profile':
+    ['getArg',"Profile the run with 'cprofile' or 'tracemalloc'",'profile',
+     None,['cprofile','tracemalloc']],
+    'poolType':
+    ['getArg',"Export pool of 'thread' or 'process' workers",'poolType',
+     'thread',['thread','process']]
     }
 
   return argHelp
@@ -0,0 +1,406 @@
+"""
+..module::MFaggregate
+  ::synopsis: Read Modflow Binary uses:
+  :           import MFbinary.MFaggregate as MFagg
+  :           Streaming cell by cell aggregation of records as they
+  :           are read from binary files.  Running count/sum, min,
+  :           max, Welford mean/variance and P-square quantile
+  :           estimates keep memory at a few layers per aggregate
+  :           no matter how many stress periods are read.
+  :           With a model start date records are also grouped into
+  :           calendar windows (month, water year, wet/dry season)
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import datetime
+import numpy as np
+from sys import exit
+import MFmonitor.MFprofile as MFprofile
+
+AGGFUNCTIONS = ['min','max','mean','sum','std','var','median','p10','p90']
+AGGWINDOWS = ['month','wateryear','season','year']
+#   South Florida wet season months (May thru October) unless
+#   -wetmonths is given
+WETMONTHS = (5, 6, 7, 8, 9, 10)
+#   Water years begin in October and are named by their ending year
+WYSTARTMONTH = 10
+
+def startDateOf(startDate):
+#
+#   datetime for a model start date given as 'YYYY-MM-DD'
+#
+  if isinstance(startDate, datetime.datetime):
+    return startDate
+  if isinstance(startDate, datetime.date):
+    return datetime.datetime(startDate.year, startDate.month, startDate.day)
+  return datetime.datetime.strptime(startDate, '%Y-%m-%d')
+
+def recordDate(start, totim):
+#
+#   Calendar time of a record.  TOTIM is the end of the time step
+#   so a record is assigned to the day (month...) ending at TOTIM
+#
+  return start + datetime.timedelta(days=float(totim), seconds=-1)
+
+def wetMonths(optArgs):
+#
+#   Wet season months given by -wetmonths as '5-10', '11-4' (ranges
+#   may wrap the year end) or '6,7,8,9'
+#
+  wet = optArgs.get('wetMonths')
+  if not wet:
+    return WETMONTHS
+  months = []
+  try:
+    for item in wet.split(','):
+      bounds = [int(m) for m in item.split('-')]
+      first, last = bounds[0], bounds[-1]
+      if len(bounds) > 2 or not (1 <= first <= 12 and 1 <= last <= 12):
+        raise ValueError
+      months += [(first - 1 + i) % 12 + 1
+                 for i in range((last - first) % 12 + 1)]
+  except ValueError:
+    print("-wetmonths {} is not a list of months 1-12 such as 5-10"\
+          .format(wet))
+    exit(57)
+  return tuple(sorted(set(months)))
+
+def windowLabel(window, when, wetMonths=WETMONTHS):
+#
+#   Calendar window label of a datetime
+#
+  if window == 'month':
+    return 'M{:02d}'.format(when.month)
+  if window == 'year':
+    return 'Y{}'.format(when.year)
+  if window == 'wateryear':
+    return 'WY{}'.format(when.year + (when.month >= WYSTARTMONTH))
+  if window == 'season':
+    return 'WET' if when.month in wetMonths else 'DRY'
+  raise ValueError("Unknown aggregation window {}".format(window))
+
+def quantileOf(stat):
+#
+#   Probability for quantile statistics: 'median' or 'pNN'
+#
+  if stat == 'median':
+    return 0.5
+  if stat.startswith('p') and stat[1:].isdigit():
+    return int(stat[1:]) / 100.0
+  return None
+
+class P2Quantile(object):
+#
+#   P-square streaming quantile estimate (Jain & Chlamtac, 1985)
+#   vectorized over every cell of a layer.  Five marker heights and
+#   positions per cell are kept instead of the observations.
+#
+    def __init__(self, p):
+        self.p = p
+        self.first = []
+        self.q = None
+
+    def update(self, array):
+        x = np.asarray(array, np.float64).ravel()
+        if self.q is None:
+            self.first.append(x.copy())
+            if len(self.first) == 5:
+                self.q = np.sort(np.vstack(self.first), axis=0)
+                self.n = np.tile(np.arange(5, dtype=np.float64)[:, None],
+                                 (1, x.size))
+                p = self.p
+                self.npos = np.tile(np.array([0, 2*p, 4*p, 2+2*p, 4])[:, None],
+                                    (1, x.size))
+                self.dn = np.array([0, p/2, p, (1+p)/2, 1])[:, None]
+                self.first = None
+            return
+        q, n = self.q, self.n
+        # Cell k such that q[k] <= x < q[k+1], extending the extremes
+        q[0] = np.minimum(q[0], x)
+        q[4] = np.maximum(q[4], x)
+        k = np.clip((x[None, :] >= q[1:4]).sum(axis=0), 0, 3)
+        n += (np.arange(5)[:, None] > k[None, :])
+        self.npos += self.dn
+        for i in (1, 2, 3):
+            d = self.npos[i] - n[i]
+            move = ((d >= 1) & (n[i+1] - n[i] > 1)) | \
+                   ((d <= -1) & (n[i-1] - n[i] < -1))
+            if not move.any():
+                continue
+            d = np.sign(d) * move
+            with np.errstate(divide='ignore', invalid='ignore'):
+                qp = q[i] + d/(n[i+1] - n[i-1]) * \
+                     ((n[i] - n[i-1] + d)*(q[i+1] - q[i])/(n[i+1] - n[i]) +
+                      (n[i+1] - n[i] - d)*(q[i] - q[i-1])/(n[i] - n[i-1]))
+                qnb = np.where(d > 0, q[i+1], q[i-1])
+                nnb = np.where(d > 0, n[i+1], n[i-1])
+                ql = q[i] + d*(qnb - q[i])/(nnb - n[i])
+            parabolic = (q[i-1] < qp) & (qp < q[i+1])
+            q[i] = np.where(move, np.where(parabolic, qp, ql), q[i])
+            n[i] += d
+
+    def count(self, h):
+#
+#       Observations at or below heights h (rows of cells), linear
+#       between the markers
+#
+        q, n = self.q, self.n
+        c = np.where(h >= q[4], n[4] + 1, 0.0)
+        for i in range(4):
+            inside = (h >= q[i]) & (h < q[i+1])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                c = np.where(inside, n[i] + 1 + (h - q[i])/(q[i+1] - q[i])*
+                                     (n[i+1] - n[i]), c)
+        return c
+
+    def merge(self, other):
+#
+#       Fold in the estimate of a later chunk of records.  Fewer
+#       than five observations are replayed.  Otherwise the markers
+#       are placed at their desired positions on the combined piecewise
+#       linear distribution of both estimates; extremes are exact
+#
+        if other.q is None:
+            for x in other.first:
+                self.update(x)
+            return
+        if self.q is None:
+            first = self.first
+            self.first = None
+            self.q = other.q.copy()
+            self.n = other.n.copy()
+            self.npos = other.npos.copy()
+            self.dn = other.dn
+            for x in first:
+                self.update(x)
+            return
+        h = np.sort(np.vstack([self.q, other.q]), axis=0)
+        counts = self.count(h) + other.count(h)
+        self.npos = self.npos + other.npos + self.dn
+        last = self.n[4] + other.n[4] + 1
+        n = np.rint(self.npos)
+        n[0] = 0
+        n[4] = last
+        for i in (1, 2, 3):
+            n[i] = np.minimum(np.maximum(n[i], n[i-1] + 1), last - 4 + i)
+        q = np.empty_like(self.q)
+        q[0] = np.minimum(self.q[0], other.q[0])
+        q[4] = np.maximum(self.q[4], other.q[4])
+        cells = np.arange(h.shape[1])
+        for i in (1, 2, 3):
+            target = n[i] + 1
+            j = np.clip((counts < target).sum(axis=0), 1, h.shape[0]-1)
+            c0, c1 = counts[j-1, cells], counts[j, cells]
+            h0, h1 = h[j-1, cells], h[j, cells]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                f = np.where(c1 > c0, (target - c0)/(c1 - c0), 0.0)
+            q[i] = h0 + np.clip(f, 0, 1)*(h1 - h0)
+        self.q = q
+        self.n = n
+
+    def result(self, shape):
+        if self.q is not None:
+            return self.q[2].reshape(shape)
+        return np.quantile(np.vstack(self.first), self.p,
+                           axis=0).reshape(shape)
+
+class CellStats(object):
+#
+#   Running statistics for one (type, layer) series of arrays
+#
+    def __init__(self, stats):
+        self.stats = stats
+        self.count = 0
+        self.shape = None
+        self.quantiles = dict((s, P2Quantile(quantileOf(s)))
+                              for s in stats if quantileOf(s) is not None)
+
+    def update(self, array):
+        x = np.asarray(array, np.float64)
+        self.count += 1
+        if self.shape is None:
+            self.shape = x.shape
+            self.total = x.copy()
+            self.min = x.copy()
+            self.max = x.copy()
+            self.mean = x.copy()
+            self.m2 = np.zeros_like(x)
+        else:
+            self.total += x
+            np.minimum(self.min, x, out=self.min)
+            np.maximum(self.max, x, out=self.max)
+            # Welford running mean and sum of squared deviations
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (x - self.mean)
+        for est in self.quantiles.values():
+            est.update(x)
+
+    def merge(self, other):
+#
+#       Combine running statistics of another series (a later chunk
+#       of records) with Chan's parallel mean/variance update and
+#       merged P-square quantile markers
+#
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.__dict__.update(other.__dict__)
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta*delta*self.count*other.count/count
+        self.mean += delta*other.count/count
+        self.total += other.total
+        np.minimum(self.min, other.min, out=self.min)
+        np.maximum(self.max, other.max, out=self.max)
+        for stat, est in self.quantiles.items():
+            est.merge(other.quantiles[stat])
+        self.count = count
+
+    def result(self, stat):
+        if stat == 'mean': return self.mean
+        if stat == 'sum':  return self.total
+        if stat == 'min':  return self.min
+        if stat == 'max':  return self.max
+        if stat in ('var', 'std'):
+            var = self.m2 / max(self.count - 1, 1)
+            return np.sqrt(var) if stat == 'std' else var
+        return self.quantiles[stat].result(self.shape)
+
+def aggWindows(optArgs):
+#
+#   Calendar windows requested by -aggby as a list
+#
+  aggBy = optArgs.get('aggBy')
+  if not aggBy:
+    return []
+  windows = [w.strip().lower() for w in aggBy.split(',') if w.strip()]
+  for w in windows:
+    if w not in AGGWINDOWS:
+      print("-aggby {} is not one of {}".format(w, AGGWINDOWS))
+      exit(57)
+  if not optArgs.get('startDate'):
+    print("-aggby requires the model start date: -start YYYY-MM-DD")
+    exit(57)
+  return windows
+
+def aggStats(optArgs):
+#
+#   Statistics requested by -agg as a list
+#
+  agg = optArgs.get('aggregate')
+  if not agg:
+    return []
+  if isinstance(agg, (list, tuple)):
+    stats = list(agg)
+  else:
+    stats = [a.strip().lower() for a in agg.split(',') if a.strip()]
+  for stat in stats:
+    q = quantileOf(stat)
+    if stat not in AGGFUNCTIONS and (q is None or not 0 < q < 1):
+      print("-agg {} is not one of {} or a pNN percentile"\
+            .format(stat, AGGFUNCTIONS))
+      exit(57)
+  return stats
+
+class StreamAggregator(object):
+#
+#   Aggregates records fed by the binary readers and writes one
+#   raster per statistic, type and layer when finished:
+#       MEAN_HEAD_1, MAX_WELLS_3, P90_HEAD_2, ...
+#   When calendar windows are requested (-aggby with -start) each
+#   record also updates one series per window it falls in:
+#       MEAN_HEAD_1_M07, MAX_WELLS_3_WY1996, MEAN_HEAD_1_WET, ...
+#   Records without TOTIM (NaN in full 3D budget indexes) are dated
+#   from the DIS time steps (discDict['stepEnds']) by stress period
+#   and step
+#
+#     agg = StreamAggregator(optArgs, discDict)
+#     agg.add('HEAD', 1, array, totim)
+#     agg.finish()
+#
+    def __init__(self, optArgs, discDict, stats=None, windows=None):
+        self.optArgs = optArgs
+        self.discDict = discDict
+        self.stats = stats or aggStats(optArgs)
+        self.windows = aggWindows(optArgs) if windows is None else windows
+        self.start = None
+        if self.windows:
+            self.start = startDateOf(optArgs['startDate'])
+            self.wetMonths = wetMonths(optArgs)
+        self.stepEnds = (discDict or {}).get('stepEnds')
+        self.series = {}
+        self.order = []
+
+    def _totim(self, kper, kstp):
+#
+#       TOTIM at the end of time step kstp (the last step when not
+#       given) of stress period kper from the DIS stress periods
+#
+        try:
+            ends = self.stepEnds[int(kper)-1]
+            return ends[-1 if kstp is None else int(kstp)-1]
+        except (TypeError, IndexError, ValueError):
+            print("-aggby needs TOTIM: budget records carry none and the "
+                  "DIS time steps for stress period {} step {} are not "
+                  "available".format(kper, kstp))
+            exit(57)
+
+    def _labels(self, totim, kper, kstp=None):
+#
+#       Overall series (None) and the calendar window series
+#
+        if not self.windows:
+            return [None]
+        if totim is None or np.isnan(totim):
+            # Full 3D budget records carry no TOTIM
+            totim = self._totim(kper, kstp)
+        when = recordDate(self.start, totim)
+        return [None] + [windowLabel(w, when, self.wetMonths)
+                         for w in self.windows]
+
+    def add(self, typ, lay, array, totim=None, kper=None, kstp=None):
+        with MFprofile.stage('aggregate', np.size(array)*4):
+            for label in self._labels(totim, kper, kstp):
+                key = (typ, lay, label)
+                if key not in self.series:
+                    self.series[key] = CellStats(self.stats)
+                    self.order.append(key)
+                self.series[key].update(array)
+
+    def merge(self, series, order):
+#
+#       Fold in the series of an aggregator fed a later chunk of
+#       records; merging chunks in record order keeps outputs and
+#       their order deterministic
+#
+        for key in order:
+            if key in self.series:
+                self.series[key].merge(series[key])
+            else:
+                self.series[key] = series[key]
+                self.order.append(key)
+
+    def results(self):
+#
+#       Generator of (rastername, array) for every aggregate
+#
+        for typ, lay, label in self.order:
+            cells = self.series[(typ, lay, label)]
+            for stat in self.stats:
+                rasName = stat.upper() + '_' + typ + '_' + str(lay)
+                if label:
+                    rasName += '_' + label
+                yield rasName, cells.result(stat).astype(np.float32)
+
+    def finish(self):
+        import MFgis.MFgis as MFgis
+        if self.order:
+            print('\nCreating '+','.join(self.stats).upper()+' rasters for '+
+                  str(sorted(set(k[0] for k in self.order))))
+        for rasName, summaryRas in self.results():
+            MFgis.numPy2Ras(summaryRas, rasName, self.optArgs, self.discDict)
+        self.series = {}
+        self.order = []
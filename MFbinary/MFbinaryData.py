@@ -8,26 +8,26 @@
   ::Author: Kevin A. Rodberg <krodberg@sfwmd.gov>
 
 """
-import pandas as pd
 import numpy as np
 import os
 import sys
 from sys import exit
-if sys.version_info[0] == 3:
-    # for Python3
-    from tkinter import *   ## notice lowercase 't' in tkinter here
-    # from _tkinter import *   ## notice lowercase 't' in tkinter here
-else:
-    # for Python2
-    from Tkinter import *   ## notice capitalized T in Tkinter
     
 import MFgis.MFgis as MFgis
-try:
-    from osgeo import gdal, gdalconst, osr, ogr
-except ImportError:
-    print("""GDAL libraries are not available.  
-          Attempting to continue with AcrGIS libraries)""")
-    import arcpy as arcpy
+import MFgis.MFexportPool as MFexport
+import MFgis.MFstack as MFstack
+import MFmonitor.MFprofile as MFprofile
+import MFmonitor.MFcancel as MFcancel
+import MFmonitor.MFprogress as MFprogress
+import MFbinary.MFbinaryIndex as mfidx
+from MFbinary.MFbinaryIndex import binHdr
+import MFbinary.MFheadFile as mfhds
+import MFbinary.MFbudget as mfbud
+import MFbinary.MFaggregate as MFagg
+import MFbinary.MFheadScan as mfscan
+import MFbinary.MFnameFile as mfnam
+import MFbinary.MFdisFile as mfdis
+#   tkinter is imported when first used
     
 global form
 form = 'BINARY'
@@ -35,61 +35,58 @@ form = 'BINARY'
 def noPath (file):
     return(os.path.basename(file))
     
-def binHdr(hdrType):
-    AllBinHdr={'HEAD':np.dtype([("KSTP","<i4"),("KPER","<i4"),("PERTIM","<f4"),
-                                ("TOTIM","<f4"),("TEXT","S16"),("NC","<i4"),
-                                ("NR","<i4"),("K","<i4")]),
-               'CONC':np.dtype([("KSTP","<i4"),("KPER","<i4"),("PERTIM","<f4"),
-                                ("TOTIM","<f4"),("TEXT","S16"),("NC","<i4"),
-                                ("NR","<i4"),("K","<i4")]),
-               'CBC':np.dtype([("KSTP","<i4"),("KPER","<i4"),("TEXT","S16"),
-                               ("NC","<i4"),("NR","<i4"),("K","<i4")]),
-               'CBCUF':np.dtype([("BOR","<i4"),
-                                 ("KSTP","<i4"),("KPER","<i4"),("TEXT","S16"),
-                                 ("NC","<i4"),("NR","<i4"),("K","<i4"),
-                                 ("EOR","<i4")]),
-               'XCBC':np.dtype([("IMETH","<i4"),("DELT","<f4"),("PERTIM","<f4"),
-                                ("TOTIM","<f4")])}
-    return(AllBinHdr[hdrType])
-
 def checkExec_env():
-    cmdL = False
-    a = sys.executable
-    m = '\\'
-    m = m[0]
-    while True:
-        b = len(a)
-        c = a[(b - 1)]
-        if c == m: break
-        a = a[:(b - 1)]
-    if sys.executable == a + 'python.exe': cmdL=True
-    else:
-        #print (sys.executable)
-        cmdL=False
-    return (cmdL)
+#
+#   True when run by python.exe from a Windows command line
+#
+    return os.path.basename(sys.executable).lower() == 'python.exe'
 
 def stopFn():
-    """Stop scanning by setting the global flag to False."""
-    global running
-    running = False
-    
-global makeTerminateBtn    
-def makeTerminateBtn():
+    """Stop scanning by cancelling the shared token."""
+    MFcancel.cancelToken().cancel('Terminate button')
+
+root = None
+def makeTerminateBtn(token=None):
+#
+#   Tk window with a Terminate button cancelling token.  The window
+#   is updated by the token poller at most every -poll seconds
+#
     global root
-    global running
-    root = Tk()
+    if sys.version_info[0] == 3:
+        import tkinter as tk
+    else:
+        import Tkinter as tk   ## notice capitalized T in Tkinter
+    token = token or MFcancel.cancelToken()
+    root = tk.Tk()
     root["bg"] = "white"
     root.title("Click Button to Terminate App")
     root.geometry("250x40")
-    app = Frame(root)
-    message=Label(app,text="Termination will follow export of current Raster")
+    app = tk.Frame(root)
+    message=tk.Label(app,text="Termination will follow export of current Raster")
     message.pack()
-    stop = Button(app, text="Terminate", bg="yellow",command=stopFn)
-    stop.place(relx=.5,rely=.5,anchor=CENTER)
+    stop = tk.Button(app, text="Terminate", bg="yellow",
+                     command=lambda: token.cancel('Terminate button'))
+    stop.place(relx=.5,rely=.5,anchor=tk.CENTER)
     stop.pack()
     app.pack()
-    running = True  # Global flag for Terminate Button
-    return
+    token.addPoller(root.update)
+    return root
+
+def closeTerminateBtn(token=None):
+    global root
+    if root is not None:
+        (token or MFcancel.cancelToken()).removePoller(root.update)
+        root.destroy()
+        root = None
+
+def stopCancelled(token):
+#
+#   Exit once the current exports have finished when cancelled
+#
+    if token.cancelled:
+        print("Cancelled ({}) after the current export"\
+              .format(token.reason or 'requested'))
+        exit(7)
   
 def parseRange(astr):
 #
@@ -107,28 +104,9 @@ def parseRange(astr):
 def FileByInitials(sourcefile,pkgInitials):
 #
 #   Read Modflow Namefile searching for package initials
-#   and return associated filename
-#
-  binlist=[]
-  header = ['Initials', 'unitnum', 'filename', 'status']
-  binlist.append(header)
-  with open(sourcefile, 'r') as f:
-    for line in f.readlines()[1:]:
-      if (not line.startswith('#') ):
-        if len(line) >1:
-         binlist.append(line.split()[0:4])
-  f.close()
-
-  df = pd.DataFrame(binlist, columns = header)
-  newdf = df[df['Initials'] == pkgInitials]
-  fileName = newdf['filename']
-
-  theval = str(fileName.values)
-  outval = theval.lstrip("['")
-  outval = outval.rstrip("']")
-  fileName = outval
-  del df, newdf
-  return fileName
+#   and return associated filename ('' when not found)
+#
+  return mfnam.nameFile(sourcefile).filename(pkgInitials)
 
 def getUnitNum(file, row_num, item_num):
 #
@@ -163,29 +141,9 @@ def getUnitNum(file, row_num, item_num):
 def getFileByNum(sourcefile,fnumber):
 #
 #   Read Modflow Namefile searching for unit number
-#   and returning associated filename
+#   and returning associated filename ('' when not found)
 #    
-  binlist=[]
-  header = ['Initials', 'unitnum', 'filename', 'status']
-  binlist.append(header)
-
-  with open(sourcefile, 'r') as f:
-    for line in f.readlines()[1:]:
-      if not line.startswith('#'):
-        binlist.append(line.split()[0:4])
-  f.close()
-
-  df = pd.DataFrame(binlist, columns = header)
-  newdf = df[df['unitnum'] == fnumber]
-  _unitnum = newdf['unitnum']
-  _filename = newdf['filename']
-  theval = str(_filename.values)
-  outval = theval.lstrip("['")
-  outval = outval.rstrip("']")
-  filename = outval
-
-  del df, newdf, _unitnum, _filename
-  return filename
+  return mfnam.nameFile(sourcefile).fileByUnit(fnumber)
 
 def getBASdata(file):
 #
@@ -279,6 +237,7 @@ def setDISfile(path, namfile):
 #   searching for the Modflow Package Initials DIS in
 #   the naemfile
 #
+  global discDict
   disFilename = FileByInitials(path + "\\" + namfile, 'DIS')
   disFilename_full = path + "\\" + disFilename
   
@@ -294,7 +253,16 @@ def setDISfile(path, namfile):
     bcfFilename_full = path + "\\" + bcfFilename
     getBCFdata(bcfFilename_full)
   else:
-    discDict = getDISdata(disFilename_full)
+    nam = mfnam.nameFile(path + "\\" + namfile)
+    try:
+      dis = mfdis.disFile(disFilename_full, nam, nam.entry('DIS').unit)
+      discDict = dis.discDict()
+      if not dis.uniform():
+        print("DIS has variable DELR/DELC: rasters use {} x {} cells"\
+              .format(discDict['cellsize1'], discDict['cellsize2']))
+    except (ValueError, IndexError, IOError) as e:
+      print("DIS arrays not read ({}); using the DIS header".format(e))
+      discDict = getDISdata(disFilename_full)
   return (discDict)
 
 def modelDisc():
@@ -316,14 +284,9 @@ def identBudFile(path,namfile):
 #   Determine the filename for the CellxCell budget file
 #   based on Namefile Package Initials
 #    
-  cbcPkgFilename = FileByInitials(os.path.join(path,namfile), 'LPF')
-  if cbcPkgFilename.strip() == "":
-    cbcPkgFilename = FileByInitials(os.path.join(path,namfile), 'BCF6')
-  if cbcPkgFilename.strip() == "":
-    cbcPkgFilename = FileByInitials(os.path.join(path,namfile), 'BCF')
-    # BCF uses the older 'UNFORMATTED' FORTRAN binary output
-  if cbcPkgFilename.strip() == "":
-    cbcPkgFilename = FileByInitials(os.path.join(path,namfile), 'UPW')    
+  nam = mfnam.nameFile(os.path.join(path,namfile))
+  # BCF uses the older 'UNFORMATTED' FORTRAN binary output
+  cbcPkgFilename = nam.filename('LPF', 'BCF6', 'BCF', 'UPW')
   if cbcPkgFilename.strip() == "":
     print(" No supported flow Packages (BCF,BCF6,LPF or UPW) found in NAM file")
     exit(86)    
@@ -333,7 +296,7 @@ def identBudFile(path,namfile):
   cbcUnit = getUnitNum(cbcPkgFullName,1,1)
   if int(cbcUnit) == 0:
     cbcUnit = getUnitNum(cbcPkgFullName,1,2)
-  cbcFilename = getFileByNum(os.path.join(path,namfile), cbcUnit)
+  cbcFilename = nam.fileByUnit(cbcUnit)
   binfilename = os.path.join(path,cbcFilename) 
   #print ("CellxCell Flow filename {} on unit {}".format(binfilename,cbcUnit))
   return(binfilename)
@@ -343,11 +306,12 @@ def readBinHead(binfilename,binType,optArgs):
 #   Read Modflow 2D Binary file such as the HEADS and CONC
 #       Each non-Header Record is a layer
 #           read as a 2D NumPy array (nrows,ncols)
+#   Headers are indexed first (and cached in a .mfidx sidecar)
+#   so only the requested layers and stress periods are read,
+#   each as a zero-copy view of a memory map over the file
+  token = MFcancel.cancelToken(optArgs)
   if optArgs['gui']:
-      makeTerminateBtn()
-      
-  global running
-  running = True  # Global flag for Terminate Button
+      makeTerminateBtn(token)
   
   layerRange = optArgs['layerStr']
   strPerRange = optArgs['strStr']
@@ -356,128 +320,118 @@ def readBinHead(binfilename,binType,optArgs):
   ws1 = optArgs['geodb']
   
   Hdr=binHdr(binType)
-  knt= int(nrows)*int(ncols)
   shape = (nrows,ncols)
   if layerRange: layerList = parseRange(layerRange)
   else: layerList = parseRange('1-'+str(nlays))
-  if strPerRange:
-      strPerList = parseRange(strPerRange)
-      maxStrPer =  max(strPerList)
-  else:
-      strPerList = None
-      maxStrPer = npers + 1
-  try:
-      binfile=open(binfilename,'rb')
-  except:
+  if strPerRange: strPerList = parseRange(strPerRange)
+  else: strPerList = None
+  if not os.path.exists(binfilename):
       print("binary heads file {} does not exist".format(binfilename))
       exit(86)
-  endOfTime = False
-  
-  try:
-      perRange = xrange(int(npers*nlays))   # for Python 2.7
-  except:
-      perRange = range(int(npers*nlays))    # for Python 3.6
+
+  index = mfidx.cachedHeadIndex(binfilename, Hdr, binType)
+  if index.size < 1:
+      print("No complete records found in {}".format(binfilename))
+      closeTerminateBtn(token)
+      exit(99)
+  if layerList != [0] or strPerList != [0]:
+      selected = mfidx.selectRecords(index, binType, layerList, strPerList)
+  else:
+      selected = index[:0]
+  if not optArgs['quiet']:
+      print("{} of {} records selected from {}"\
+            .format(selected.size, index.size, noPath(binfilename)))
+  progress = MFprogress.start(optArgs, binType, selected.size,
+                              np.full(selected.size, nrows*ncols*4), token)
   
-  for strPerByLay in perRange:
-    #Check root to see if process should be terminated
-    if optArgs['gui']: 
-       root.update()
-       if not running:
-         root.destroy()
-         exit(7)
-    MFhdr  = []
-    MFhdr  = np.fromfile(binfile,Hdr,count=1,sep='')
-    if not MFhdr:
-        print(binfilename)
-        root.destroy()
-        exit(99)
-    kper   = MFhdr['KPER'][0]
-    totim  = MFhdr['TOTIM'][0] 
-    k      = MFhdr['K'][0]
+  scale = mfhds.binScale(binType)
+  pool = MFexport.ExportPool(optArgs, discDict)
+  agg = None
+  if optArgs.get('aggregate'):
+      agg = MFagg.StreamAggregator(optArgs, discDict)
+  workers = mfscan.scanWorkers(optArgs)
+  if workers > 0 and optArgs.get('stack'):
+      print("-workers is not used with -stack; reading sequentially")
+      workers = 0
+  if workers > 0:
+      def poll(done, total):
+          return not token.poll(done, total)
+      mfscan.scanHeads(binfilename, selected, shape, binType, optArgs,
+                       discDict, workers, agg, poll)
+      pool.close()
+      MFprogress.finish(progress, token)
+      if agg and not token.cancelled: agg.finish()
+      closeTerminateBtn(token)
+      stopCancelled(token)
+      return
+  stack = None
+  if optArgs.get('stack'):
+      # Stack bands follow record order within each layer or period
+      stack = MFstack.RasterStack(optArgs, discDict)
+      stackNames = [MFstack.stackName(binType, optArgs['stack'], p, None, k)
+                    for p, k in zip(mfidx.recordPeriods(selected, binType),
+                                    selected['K'])]
+      stackBand, stackCount = MFstack.stackBands(stackNames)
+  for n, (rec, dataRead) in enumerate(mfhds.headRecords(binfilename,
+                                                         selected, shape)):
+    # Stop (after exports already submitted) when cancelled
+    if token.poll(n, selected.size): break
+    kper   = rec['KPER']
+    totim  = rec['TOTIM'] 
+    k      = rec['K']
     
-    heads = MFhdr["TEXT"][0].strip().replace(b" ",b"_").decode("utf-8")
+    heads = rec["TEXT"].strip().replace(b" ",b"_").decode("utf-8")
     if not optArgs['quiet']:
         print ('Stress Period=',kper,"Tot Time",totim,'lay=',k,heads)
 
-    dataRead = np.fromfile(file=binfile, dtype=np.float32,
-                count=knt, sep='').reshape(shape)
     if binType == 'CONC':
         kper = int(totim)
-        dataRead = dataRead * 1000.0
-    # build rastername string
-    rastername = binType + '{:7.5f}'.format(((kper)/100000.0))+"_"+str(k)
-    rastername = rastername.replace("0.","_")
-    rastername = os.path.join(ws1,rastername)
+    rastername = os.path.join(ws1, mfhds.recordName(binType, rec))
+    with MFprofile.stage('transform', dataRead.nbytes):
+      data = mfhds.scaled(dataRead, scale)
     
-    if layerList != [0] or strPerList != [0]:
-      if k in layerList:
-        if not strPerList or kper in strPerList:
-          if optArgs['quiet']: print('')
-          MFgis.numPy2Ras(dataRead, rastername,optArgs,discDict)
-          MFgis.clipRaster(rastername, optArgs)
-        elif kper > maxStrPer:
-          endOfTime = True
-          print ("EndofTime reached: SP={} KPER= {} > MaxSP = {}"\
-              .format(strPerList,kper, maxStrPer))
-    if endOfTime:
-      if optArgs['gui']: root.destroy()
-      return
-  binfile.close()
-  if optArgs['gui']: root.destroy()
+    if agg:
+      agg.add(binType, k, data, totim, kper)
+      if optArgs.get('aggOnly'): continue
+    if stack:
+      stack.add(stackNames[n], stackBand[n], stackCount[n], data,
+                {'KPER':kper, 'KSTP':rec['KSTP'], 'TOTIM':totim, 'LAYER':k})
+    else:
+      pool.submit(data, rastername)
+  pool.close()
+  if stack: stack.close()
+  MFprogress.finish(progress, token,
+                    None if token.cancelled else selected.size)
+  if agg and not token.cancelled: agg.finish()
+  closeTerminateBtn(token)
+  stopCancelled(token)
   return
 
 def readCBCterms(path,namfile):
 #
 #   Read CellxCell Budget terms to populate GUI selection list
+#   from the (cached) header index of the budget file
 #    
   binfilename=identBudFile(path,namfile)
-  nlays,nrows,ncols,npers,cellsz1,cellsz1=modelDisc()
-  dataRead=[]
   termlist=[]
-  shape = (nrows,ncols)
-  recLen= nrows*ncols
-  shp3d = (nlays,nrows,ncols)
-  reclen3d= nlays*nrows*ncols
-  firstPer = 0
-  iper = 0
   cbcHdr=binHdr('CBC')
   cbcUFHdr=binHdr('CBCUF')
   xcbcHdr=binHdr('XCBC')
-  binfile=open(binfilename,'rb')
   if form == 'UF':
       cbcHdr=cbcUFHdr
-  else:
-      cbcHdr = cbcHdr
-  while iper == firstPer:
-      
-    MFhdr1 = []
-    MFhdr2 = []
-    MFhdr1 = np.fromfile(binfile,cbcHdr,count=1,sep='')
-    if MFhdr1.size < 1:
-      print ("End of File Encountered")
-      return(termlist)
-    if firstPer == 0:
-      firstPer = int(MFhdr1["KPER"][0])
-    iper = int(MFhdr1["KPER"][0])
-    budget = MFhdr1["TEXT"][0].strip().replace(b" ",b"_").decode("utf-8")
+  index = mfidx.cachedCBCIndex(binfilename, cbcHdr, xcbcHdr)
+  if index.size < 1:
+    print ("End of File Encountered")
+    return(termlist)
+  firstPer = int(index['KPER'][0])
+  firstStp = int(index['KSTP'][0])
+  for rec in index:
+    iper = int(rec["KPER"])
+    if iper != firstPer or int(rec["KSTP"]) != firstStp:
+      break
+    budget = rec["TEXT"].strip().replace(b" ",b"_").decode("utf-8")
     print("{} {}".format(iper,budget))
-    cbclays = int(MFhdr1["K"][0])
-    if cbclays < 0 :
-        # Compact Cell by cell flow file
-        MFhdr2 = np.fromfile(binfile,
-                     dtype=xcbcHdr,count=1)
-        dataRead = np.fromfile(binfile,np.int32,recLen).reshape(shape)
-        dataRead = np.fromfile(binfile,np.float32,recLen).reshape(shape)
-    else:
-        if form == 'UF':
-          bor = np.fromfile(binfile,np.int32,count=1)
-        dataRead = np.fromfile(binfile,np.float32,
-                                count=reclen3d).reshape(shp3d)
-        if form == 'UF':
-          eor = np.fromfile(binfile,np.int32,count=1)
-    if iper == firstPer:
-        termlist.append(budget)    
-  binfile.close()
+    termlist.append(budget)
   return (termlist)
 
 def magDirFunc(rFaceSlice, fFaceSlice):
@@ -490,11 +444,24 @@ def magDirFunc(rFaceSlice, fFaceSlice):
   magArray = np.power((np.power(fFaceSlice,2)+np.power(rFaceSlice,2)),.5)
   return magArray, dirArray
 
+def blockSum(array, factor):
+#
+#   Sum of each factor x factor block of cells.  Rows are padded at
+#   the top and columns at the right so the blocks keep the model
+#   lower left origin.  Cells without data add nothing
+#
+  nrows, ncols = np.shape(array)
+  nr, nc = -(-nrows // factor), -(-ncols // factor)
+  padded = np.zeros((nr*factor, nc*factor), np.float64)
+  padded[nr*factor-nrows:, :ncols] = np.where(np.isfinite(array), array, 0.0)
+  return padded.reshape(nr, factor, nc, factor).sum(axis=(1, 3))
+
 def readBinCBC(binfilename,rasType,optArgs):
   form = 'BINARY'
   cmdLine=checkExec_env()
 
-  if optArgs['gui']: makeTerminateBtn()
+  token = MFcancel.cancelToken(optArgs)
+  if optArgs['gui']: makeTerminateBtn(token)
 #
 #   Reads the Modflow Binary CellxCell Budget file
 #   as NumPy arrays for selected TERMS to be made into rasters
@@ -505,18 +472,21 @@ def readBinCBC(binfilename,rasType,optArgs):
   #	ArcMap Template Arrow Symbol needs to be rotated to point East with arithmatic rotation
   #
   #	negative FLOW_RIGHT_FACE is flow into the eastern Face
-  #  The optional Resampling argument produces features representing an average of X by X cells.
+  #  The optional Resampling argument produces features representing the
+  #  summed flow of X by X cells: face flows are summed over each block and
+  #  magnitude & direction computed from the summed components.
   #
-    global rFaceSlice
     if not optArgs['noArc']: outDir = optArgs['geodb']
     if not optArgs['noArc']: outDirClp = optArgs['clpgdb']
     if  optArgs['noArc']: outDir = optArgs['rasFolder']
     if  optArgs['noArc']: outDirClp = optArgs['rasFolder']
 
-    if budget == 'FLOW_RIGHT_FACE': rFaceSlice = slice
-    if budget == 'FLOW_FRONT_FACE':
+    if budget == 'FLOW_RIGHT_FACE': rFaceSlices[ilayer] = slice
+    if budget == 'FLOW_FRONT_FACE' and ilayer in rFaceSlices:
+      rFaceSlice = rFaceSlices.pop(ilayer)
       fFaceSlice = slice
-      (magArray, dirArray) = magDirFunc(rFaceSlice, fFaceSlice)
+      with MFprofile.stage('transform', rFaceSlice.nbytes*2):
+        (magArray, dirArray) = magDirFunc(rFaceSlice, fFaceSlice)
       
       if  optArgs['noArc']: print ("Raster & Shapefile output location: {}".format(outDir))
       if  not optArgs['noArc']: print ("Raster & Feature Class output location: {} \nClipped: {}".format(outDir,outDirClp))
@@ -548,8 +518,8 @@ def readBinCBC(binfilename,rasType,optArgs):
                           "VALUE","Magnitude",csizeMultiplier)
  
       if MFgis.modelClips(optArgs['model']) != (0,0,0,0):
-        MFgis.clipRaster(rasDir, optArgs)
-        MFgis.clipRaster(rasMag, optArgs)
+        MFgis.clipArray(dirArray, rasDir, optArgs, discDict)
+        MFgis.clipArray(magArray, rasMag, optArgs, discDict)
         print("{} \t:Clipped Points for Flow Arrows".format(noPath(clparwFeat)))
         MFgis.TwoRas2OnePnt(clprasDirFile,clprasMagFile,clparwFeat,optArgs,
                             "VALUE","Magnitude",csizeMultiplier)
@@ -557,25 +527,24 @@ def readBinCBC(binfilename,rasType,optArgs):
       if csizeMultiplier > 1:
         print("{} \t:Resampled Raster".format(noPath(rasDirXFile)))
         print("{} \t:Resampled Raster".format(noPath(rasMagXFile)))       
-        if  optArgs['noArc']:
-          gdal.Warp(rasDirXFile+'.tif', rasDirFile+'.tif',
-                    outputType=gdal.GDT_Int16,xRes=cellsize, yRes=cellsize)            
-          gdal.Warp(rasMagXFile+'.tif', rasMagFile+'.tif',
-                    outputType=gdal.GDT_Float32,xRes=cellsize, yRes=cellsize)
-        else:
-          arcpy.Resample_management(rasDir, rasDirX, cellsize, "BILINEAR")
-          arcpy.Resample_management(rasMag, rasMagX, cellsize, "BILINEAR")
+        with MFprofile.stage('transform', rFaceSlice.nbytes*2):
+          (magArrayX, dirArrayX) = magDirFunc(
+                                     blockSum(rFaceSlice, csizeMultiplier),
+                                     blockSum(fFaceSlice, csizeMultiplier))
+        MFgis.numPy2Ras(dirArrayX, rasDirX, optArgs, discDict, blockGT)
+        MFgis.numPy2Ras(magArrayX, rasMagX, optArgs, discDict, blockGT)
           
+        # Magnitudes are already block sums
         print("{} \t:Points for Resampled Flow Arrows".format(noPath(arwFeatX)))
         MFgis.TwoRas2OnePnt(rasDirXFile,rasMagXFile,arwFeatX,optArgs,
-                              "VALUE","Magnitude",csizeMultiplier)
+                              "VALUE","Magnitude",1)
           
         if MFgis.modelClips(optArgs['model']) != (0,0,0,0):
-          MFgis.clipRaster(rasDirX, optArgs)
-          MFgis.clipRaster(rasMagX, optArgs)
+          MFgis.clipArray(dirArrayX, rasDirX, optArgs, discDict, blockGT)
+          MFgis.clipArray(magArrayX, rasMagX, optArgs, discDict, blockGT)
           print("{} \t:Clipped Points for Resampled Flow Arrows".format(noPath(clparwFeatX)))
           MFgis.TwoRas2OnePnt(clprasDirXFile,clprasMagXFile,clparwFeatX,optArgs,
-                              "VALUE","Magnitude",csizeMultiplier)
+                              "VALUE","Magnitude",1)
     return
 
   if optArgs['terms']:
@@ -587,112 +556,109 @@ def readBinCBC(binfilename,rasType,optArgs):
   strPerRange = optArgs['strStr']
   nlays,nrows,ncols,npers,cellsz1,cellsz1= modelDisc()
   dataRead=[]
-  shape = (nrows,ncols)
-  recLen= nrows*ncols
-  shp3d = (nlays,nrows,ncols)
-  reclen3d= nlays*nrows*ncols
-  #print("ThreeD shape and size is (l.r.c) {0}*{1}*{2}={3}".format(nlays,nrows,ncols,reclen3d))
     
   csizeMultiplier = int(optArgs['resample'])
   CsizeVal = csizeMultiplier * cellsz1
   cellsize = str(CsizeVal)
+  blockGT = MFgis.blockGeotransform(optArgs['model'], discDict, csizeMultiplier)
+  # FLOW_RIGHT_FACE layers held until the FLOW_FRONT_FACE layer is read
+  rFaceSlices = {}
   espg = MFgis.getModel_SR(optArgs['model'])
   cbcHdr=binHdr('CBC')
   cbcUFHdr=binHdr('CBCUF')
   xcbcHdr=binHdr('XCBC')
+  if form == 'UF':
+      cbcHdr=cbcUFHdr
 
   if layerRange: layerList = parseRange(layerRange)
   else: layerList = parseRange('1-'+str(nlays))
     
   strPerList = parseRange(strPerRange)
-  if strPerList: maxStrPer =  max(strPerList)
-  else: maxStrPer = 0
 
   print ("Binary Filename: {}".format(binfilename))
-  binfile=open(binfilename,'rb')
-  endOfTime = False
-  
-  try:
-      perRange = xrange(npers*15*5)
-  except:
-      perRange = range(npers*15*5)
-  for i in perRange:
-    #Check root to see if process should be terminated
-    if optArgs['gui']: 
-      if i%5 == 0:
-       root.update()
-       if not optArgs['quiet']:
-           print ("checking Button Status...Condition = {}".format(running))  
-       else:
-           print(".",end='')
-       if not running:
-         root.destroy()
-         exit(7)
-    MFhdr1 = []
-    MFhdr2 = []
-    MFhdr1 = np.fromfile(binfile,cbcHdr, count=1,sep='')
-    
-    if MFhdr1.size < 1:
+#
+#   Budget headers are indexed (and cached) so payloads of terms
+#   and stress periods not requested are never read
+#
+  index = mfidx.cachedCBCIndex(binfilename, cbcHdr, xcbcHdr)
+  budgets = [t.strip().replace(b" ",b"_").decode("utf-8")
+             for t in index['TEXT']]
+  allTerms = not optArgs['terms'] or optArgs['terms'] == 'ALL'
+  wanted = np.array([allTerms or b in termset for b in budgets], bool)
+  if strPerList:
+      wanted &= np.isin(index['KPER'], strPerList)
+  if not layerList:
+      wanted[:] = False
+  if not optArgs['quiet']:
+      print("{} of {} budget records selected".format(wanted.sum(),index.size))
+  if not wanted.any():
       print ("End of File Encountered")
-      if optArgs['gui']: root.destroy()
+      closeTerminateBtn(token)
       return
+  mm = mfhds.openMemmap(binfilename)
+  pool = MFexport.ExportPool(optArgs, discDict)
+  selectedRecs = np.nonzero(wanted)[0]
+  progress = MFprogress.start(optArgs, 'CBC', selectedRecs.size,
+                              index['NBYTES'][selectedRecs], token)
+  agg = None
+  if optArgs.get('aggregate') and rasType != 'VEC':
+      agg = MFagg.StreamAggregator(optArgs, discDict)
+  stack = None
+  if optArgs.get('stack') and rasType != 'VEC':
+      # Layer stacks get one band per selected record of the term,
+      # period stacks one band per requested layer
+      stack = MFstack.RasterStack(optArgs, discDict)
+      stackLays = [l for l in layerList if 1 <= l <= nlays]
+      termCount = {}
+      for i in np.nonzero(wanted)[0]:
+          termCount[budgets[i]] = termCount.get(budgets[i], 0) + 1
+      termBand = {}
+  
+  for n, i in enumerate(selectedRecs):
+    rec = index[i]
+    # Stop (after exports already submitted) when cancelled
+    if token.poll(n, selectedRecs.size): break
     
-    kstp = int(MFhdr1["KSTP"][0])
-    iper = int(MFhdr1["KPER"][0])
-    budget = MFhdr1["TEXT"][0].strip().replace(b" ",b"_").decode("utf-8")
+    kstp = int(rec["KSTP"])
+    iper = int(rec["KPER"])
+    budget = budgets[i]
     if not optArgs['quiet']:
         print("{} {} {}".format(kstp,iper,budget))
-
-    cbclays = int(MFhdr1["K"][0])
-    if layerList:
-      if cbclays < 0 :  # Compressed Binary
-        MFhdr2 = np.fromfile(file=binfile,dtype=xcbcHdr,count=1,sep='')
-        tottim = int(MFhdr2["TOTIM"][0])/100000.0
-        dataRead = np.fromfile(binfile,np.int32,recLen).reshape(shape)
-        ilayer = dataRead[1,1]
-        dataRead = np.fromfile(binfile,np.float32,recLen).reshape(shape)
-        #rastername = budget+"_"+str(ilayer)+"_"+str(tottim).replace("0.","")
-        rastername = budget + "_" + str(ilayer+1) + "_" + \
-                 '{:7.5f}'.format(((iper)/100000.0)) +  "_" + str(kstp)
-        rastername = rastername.replace("_0.","_")
-        if not strPerList or iper in strPerList:
-          if ilayer in layerList:
-            if optArgs['quiet']: print('')
-            if rasType =='VEC' and budget in termset:
-              doFlowVec()
-            elif not optArgs['terms'] or optArgs['terms'] == 'ALL' or budget in termset:
-              print (budget, termset.upper())
-              MFgis.numPy2Ras(dataRead, rastername, optArgs,discDict)
-              MFgis.clipRaster(rastername, optArgs)
-          elif maxStrPer > 0 and iper > maxStrPer:
-            if optArgs['gui']: root.destroy()
-            return
+    if stack:
+        termBand[budget] = termBand.get(budget, 0) + 1
+
+    for lay, slice in mfbud.budgetLayers(mm, rec, layerList):
+      MFprofile.tally('payloadRead', slice.nbytes)
+      if token.poll(): break
+      ilayer = lay-1
+      rastername = budget + "_" + str(ilayer+1) + "_" + \
+             '{:7.5f}'.format(((iper)/100000.0)) +  "_" + str(kstp)
+      rastername = rastername.replace("_0.","_")
+      if agg:
+          agg.add(budget, lay, slice, rec['TOTIM'], iper, kstp)
+          if optArgs.get('aggOnly'): continue
+      if rasType =='VEC' and budget in termset: 
+          doFlowVec()
+      elif stack:
+          meta = {'KPER':iper, 'KSTP':kstp, 'TOTIM':rec['TOTIM'],
+                  'LAYER':lay}
+          if optArgs['stack'] == 'layer':
+              stack.add(MFstack.stackName(budget, 'layer', iper, kstp, lay),
+                        termBand[budget], termCount[budget], slice, meta)
+          elif lay in stackLays:
+              stack.add(MFstack.stackName(budget, 'period', iper, kstp, lay),
+                        stackLays.index(lay)+1, len(stackLays), slice, meta)
       else:
-        dataRead=np.fromfile(binfile,np.float32,reclen3d).reshape(shp3d)
-        for ilayer in range(nlays):
-          #Check root to see if process should be terminated
-          if optArgs['gui']:
-              root.update()
-              if not running:
-                root.destroy()
-                exit(7)
-          slice = dataRead[ilayer,:,:].reshape(shape)
-          rastername = budget + "_" + str(ilayer+1) + "_" + \
-                 '{:7.5f}'.format(((iper)/100000.0)) +  "_" + str(kstp)
-          rastername = rastername.replace("_0.","_")
-          if not strPerList or iper in strPerList:
-            if ilayer+1 in layerList:
-              if rasType =='VEC' and budget in termset: 
-                  if optArgs['quiet']: print('')
-                  doFlowVec()
-              elif not optArgs['terms'] or optArgs['terms'] == 'ALL' or budget in termset:
-                if optArgs['quiet']: print('')
-                MFgis.numPy2Ras(slice, rastername, optArgs,discDict)
-                MFgis.clipRaster(rastername, optArgs)
-          elif maxStrPer > 0 and iper > maxStrPer:
-            if optArgs['gui']: root.destroy()
-            return
-  binfile.close()
-  if optArgs['gui']: root.destroy()
+          pool.submit(slice, rastername)
+    if token.cancelled: break
+    if stack and optArgs['stack'] == 'period':
+        stack.finish(MFstack.stackName(budget, 'period', iper, kstp, None))
+  pool.close()
+  if stack: stack.close()
+  MFprogress.finish(progress, token,
+                    None if token.cancelled else selectedRecs.size)
+  if agg and not token.cancelled: agg.finish()
+  closeTerminateBtn(token)
+  stopCancelled(token)
   return
 
@@ -0,0 +1,363 @@
+"""
+..module::MFbinaryIndex
+  ::synopsis: Read Modflow Binary uses:
+  :           import MFbinary.MFbinaryIndex as mfidx
+  :           Header-only scans of Modflow binary output producing
+  :           a record index of header fields and byte offsets so
+  :           readers can seek directly to selected records
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import os
+import numpy as np
+import MFmonitor.MFprofile as MFprofile
+
+def binHdr(hdrType):
+#
+#   Record header dtypes of Modflow binary output by file type
+#
+    AllBinHdr={'HEAD':np.dtype([("KSTP","<i4"),("KPER","<i4"),("PERTIM","<f4"),
+                                ("TOTIM","<f4"),("TEXT","S16"),("NC","<i4"),
+                                ("NR","<i4"),("K","<i4")]),
+               'CONC':np.dtype([("KSTP","<i4"),("KPER","<i4"),("PERTIM","<f4"),
+                                ("TOTIM","<f4"),("TEXT","S16"),("NC","<i4"),
+                                ("NR","<i4"),("K","<i4")]),
+               'CBC':np.dtype([("KSTP","<i4"),("KPER","<i4"),("TEXT","S16"),
+                               ("NC","<i4"),("NR","<i4"),("K","<i4")]),
+               'CBCUF':np.dtype([("BOR","<i4"),
+                                 ("KSTP","<i4"),("KPER","<i4"),("TEXT","S16"),
+                                 ("NC","<i4"),("NR","<i4"),("K","<i4"),
+                                 ("EOR","<i4")]),
+               'XCBC':np.dtype([("IMETH","<i4"),("DELT","<f4"),("PERTIM","<f4"),
+                                ("TOTIM","<f4")])}
+    return(AllBinHdr[hdrType])
+
+def headIndexDtype(Hdr):
+#
+#   Index records for HEAD and CONC files carry every header
+#   field plus the byte OFFSET of the (nrows,ncols) float32 array
+#
+  return np.dtype(Hdr.descr + [("OFFSET","<i8")])
+
+def _scanHeadSeq(binfile, Hdr, start, size):
+#
+#   Sequential header scan: read a header, seek past its array.
+#   Stops at the last complete record so files still being
+#   written by Modflow are indexed up to the current record.
+#
+  recs = []
+  pos = start
+  binfile.seek(pos)
+  while pos + Hdr.itemsize <= size:
+    MFhdr = np.frombuffer(binfile.read(Hdr.itemsize), Hdr, count=1)
+    knt = int(MFhdr['NC'][0]) * int(MFhdr['NR'][0])
+    datPos = pos + Hdr.itemsize
+    if knt <= 0 or datPos + knt*4 > size:
+      break
+    recs.append(tuple(MFhdr[0]) + (datPos,))
+    pos = datPos + knt*4
+    binfile.seek(pos)
+  return np.array(recs, dtype=headIndexDtype(Hdr))
+
+def indexBinHead(binfilename, Hdr, start=0):
+#
+#   Build the record index for a HEAD or CONC binary file.
+#
+#   Every record in these files is one layer of the same grid,
+#   so record size is fixed by the first header.  Headers are
+#   gathered in a single strided pass over a memory map which only
+#   touches the pages holding headers.  When the headers disagree on
+#   NC/NR the file is rescanned sequentially.
+#
+  size = os.path.getsize(binfilename)
+  with open(binfilename, 'rb') as binfile:
+    binfile.seek(start)
+    first = binfile.read(Hdr.itemsize)
+    if len(first) < Hdr.itemsize:
+      return np.zeros(0, dtype=headIndexDtype(Hdr))
+    MFhdr = np.frombuffer(first, Hdr, count=1)
+    knt = int(MFhdr['NC'][0]) * int(MFhdr['NR'][0])
+    if knt <= 0:
+      return _scanHeadSeq(binfile, Hdr, start, size)
+    recSize = Hdr.itemsize + knt*4
+    nrec = (size - start) // recSize
+    if nrec < 1:
+      return np.zeros(0, dtype=headIndexDtype(Hdr))
+    strided = np.dtype({'names':Hdr.names,
+                        'formats':[Hdr.fields[n][0] for n in Hdr.names],
+                        'offsets':[Hdr.fields[n][1] for n in Hdr.names],
+                        'itemsize':recSize})
+    mm = np.memmap(binfilename, dtype=strided, mode='r',
+                   offset=start, shape=(nrec,))
+    index = np.zeros(nrec, dtype=headIndexDtype(Hdr))
+    for name in Hdr.names:
+      index[name] = mm[name]
+    del mm
+    index['OFFSET'] = start + Hdr.itemsize + \
+                      np.arange(nrec, dtype=np.int64)*recSize
+    if nrec and ((index['NC'] != index['NC'][0]).any() or
+                 (index['NR'] != index['NR'][0]).any()):
+      return _scanHeadSeq(binfile, Hdr, start, size)
+  return index
+
+def recordPeriods(index, binType):
+#
+#   Stress period assigned to each indexed record.
+#   MT3D concentration records are keyed by total time
+#
+  if binType == 'CONC':
+    return index['TOTIM'].astype(np.int64)
+  return index['KPER'].astype(np.int64)
+
+def selectRecords(index, binType, layerList, strPerList):
+#
+#   Return the subset of index records matching the requested
+#   layers and stress periods, preserving file order.
+#   An empty or None strPerList selects every stress period.
+#
+  mask = np.isin(index['K'], layerList)
+  if strPerList:
+    mask &= np.isin(recordPeriods(index, binType), strPerList)
+  return index[mask]
+
+def cbcIndexDtype():
+#
+#   Index records for CellxCell budget files.  Compact budget
+#   fields are IMETH 0 and DELT, PERTIM, TOTIM NaN for full 3D
+#   records, which carry no times (TOTIM 0.0 is a valid time).
+#   OFFSET/NBYTES locate the payload following the header(s)
+#
+  return np.dtype([("KSTP","<i4"),("KPER","<i4"),("TEXT","S16"),
+                   ("NC","<i4"),("NR","<i4"),("K","<i4"),
+                   ("IMETH","<i4"),("DELT","<f4"),("PERTIM","<f4"),
+                   ("TOTIM","<f4"),("OFFSET","<i8"),("NBYTES","<i8")])
+
+def _compactPayload(binfile, imeth, nlay, nrows, ncols):
+#
+#   Byte length of a compact budget payload by IMETH.
+#   List based methods (2, 5 and 6) need their counts read from
+#   the file; the file position is restored afterwards.
+#   Returns None for an unsupported IMETH
+#
+  knt = nrows*ncols
+  if imeth in (0, 1):
+    return nlay*knt*4
+  if imeth == 3:
+    return knt*4*2
+  if imeth == 4:
+    return knt*4
+  here = binfile.tell()
+  if imeth == 2:
+    nlist = np.frombuffer(binfile.read(4), np.int32)
+    binfile.seek(here)
+    if nlist.size < 1: return -1
+    return 4 + int(nlist[0])*8
+  if imeth == 5:
+    naux = np.frombuffer(binfile.read(4), np.int32)
+    if naux.size < 1:
+      binfile.seek(here)
+      return -1
+    naux = int(naux[0]) - 1
+    binfile.seek(here + 4 + naux*16)
+    nlist = np.frombuffer(binfile.read(4), np.int32)
+    binfile.seek(here)
+    if nlist.size < 1: return -1
+    return 4 + naux*16 + 4 + int(nlist[0])*(4 + 4*(naux+1))
+  if imeth == 6:
+    binfile.seek(here + 4*16)
+    ndat = np.frombuffer(binfile.read(4), np.int32)
+    if ndat.size < 1:
+      binfile.seek(here)
+      return -1
+    ndat = int(ndat[0])
+    binfile.seek(here + 4*16 + 4 + (ndat-1)*16)
+    nlist = np.frombuffer(binfile.read(4), np.int32)
+    binfile.seek(here)
+    if nlist.size < 1: return -1
+    return 4*16 + 4 + (ndat-1)*16 + 4 + int(nlist[0])*(8 + 4*ndat)
+  return None
+
+def indexBinCBC(binfilename, cbcHdr, xcbcHdr, start=0):
+#
+#   Build the record index for a CellxCell budget file by reading
+#   only headers and seeking past each payload.
+#   cbcHdr is either binHdr('CBC') or the UNFORMATTED binHdr('CBCUF')
+#   whose data records are wrapped in 4 byte record markers.
+#   Scanning stops at the last complete record.
+#
+  uf = 'BOR' in cbcHdr.names
+  size = os.path.getsize(binfilename)
+  recs = []
+  pos = start
+  with open(binfilename, 'rb') as binfile:
+    binfile.seek(pos)
+    while pos + cbcHdr.itemsize <= size:
+      MFhdr1 = np.frombuffer(binfile.read(cbcHdr.itemsize), cbcHdr, count=1)
+      ncols = int(MFhdr1['NC'][0])
+      nrows = int(MFhdr1['NR'][0])
+      cbclays = int(MFhdr1['K'][0])
+      datPos = pos + cbcHdr.itemsize
+      imeth, delt, pertim, totim = 0, np.nan, np.nan, np.nan
+      if cbclays < 0 and not uf:
+        # Compact Cell by cell flow file
+        if datPos + xcbcHdr.itemsize > size: break
+        MFhdr2 = np.frombuffer(binfile.read(xcbcHdr.itemsize), xcbcHdr,
+                               count=1)
+        imeth = int(MFhdr2['IMETH'][0])
+        delt = MFhdr2['DELT'][0]
+        pertim = MFhdr2['PERTIM'][0]
+        totim = MFhdr2['TOTIM'][0]
+        datPos += xcbcHdr.itemsize
+        nbytes = _compactPayload(binfile, imeth, -cbclays, nrows, ncols)
+        if nbytes is None:
+          print("Unsupported compact budget IMETH={} at byte {}"\
+                .format(imeth, pos))
+          break
+        endPos = datPos + nbytes
+      else:
+        nbytes = abs(cbclays)*nrows*ncols*4
+        if uf: datPos += 4
+        endPos = datPos + nbytes + (4 if uf else 0)
+      if nbytes < 0 or endPos > size:
+        break
+      recs.append((MFhdr1['KSTP'][0], MFhdr1['KPER'][0], MFhdr1['TEXT'][0],
+                   ncols, nrows, cbclays, imeth, delt, pertim, totim,
+                   datPos, nbytes))
+      pos = endPos
+      binfile.seek(pos)
+  return np.array(recs, dtype=cbcIndexDtype())
+
+#
+#   Sidecar index cache
+#     <binfile>.mfidx holds the index array and a one record
+#     'meta' array recording the file size, mtime and the bytes
+#     at the start and end of the indexed region.  Unchanged files
+#     reuse the index; files that have only grown are scanned
+#     from the end of the last indexed record.
+#
+IDXSUFFIX = '.mfidx'
+IDXVERSION = 2
+IDXPROBE = 64
+
+def metaDtype():
+  return np.dtype([("KIND","S8"),("VERSION","<i4"),("SIZE","<i8"),
+                   ("MTIME","<f8"),("SCANEND","<i8"),
+                   ("HEADBYTES","u1",(IDXPROBE,)),
+                   ("TAILBYTES","u1",(IDXPROBE,))])
+
+def sidecarName(binfilename):
+  return binfilename + IDXSUFFIX
+
+def _probeBytes(binfilename, scanEnd):
+#
+#   Bytes at the start of the file and just before scanEnd
+#   used to detect a file rewritten rather than appended to
+#
+  headBytes = np.zeros(IDXPROBE, np.uint8)
+  tailBytes = np.zeros(IDXPROBE, np.uint8)
+  with open(binfilename, 'rb') as binfile:
+    b = np.frombuffer(binfile.read(min(IDXPROBE, scanEnd)), np.uint8)
+    headBytes[:b.size] = b
+    tailStart = max(0, scanEnd - IDXPROBE)
+    binfile.seek(tailStart)
+    b = np.frombuffer(binfile.read(scanEnd - tailStart), np.uint8)
+    tailBytes[:b.size] = b
+  return headBytes, tailBytes
+
+def readSidecar(binfilename, kind):
+#
+#   Return (index, meta) from the sidecar or (None, None) when it
+#   is missing, unreadable or was built for another record kind
+#
+  idxfile = sidecarName(binfilename)
+  if not os.path.exists(idxfile):
+    return None, None
+  try:
+    with open(idxfile, 'rb') as f:
+      npz = np.load(f, allow_pickle=False)
+      index = npz['index']
+      meta = npz['meta'][0]
+  except (IOError, OSError, ValueError, KeyError):
+    return None, None
+  if meta['KIND'] != kind.encode() or meta['VERSION'] != IDXVERSION:
+    return None, None
+  return index, meta
+
+def writeSidecar(binfilename, kind, index, scanEnd, stat):
+#
+#   Save the index next to the binary file.  Read only model
+#   directories are tolerated: the index is simply not cached
+#
+  meta = np.zeros(1, dtype=metaDtype())
+  meta['KIND'] = kind
+  meta['VERSION'] = IDXVERSION
+  meta['SIZE'] = stat.st_size
+  meta['MTIME'] = stat.st_mtime
+  meta['SCANEND'] = scanEnd
+  meta['HEADBYTES'][0], meta['TAILBYTES'][0] = \
+                              _probeBytes(binfilename, scanEnd)
+  idxfile = sidecarName(binfilename)
+  tmpfile = idxfile + '.tmp'
+  try:
+    with open(tmpfile, 'wb') as f:
+      np.savez(f, index=index, meta=meta)
+    os.replace(tmpfile, idxfile)
+  except (IOError, OSError):
+    print("Unable to save record index {}".format(idxfile))
+    if os.path.exists(tmpfile):
+      try: os.remove(tmpfile)
+      except OSError: pass
+
+def _cachedIndex(binfilename, kind, scanFn, endFn):
+#
+#   scanFn(start) indexes records beginning at byte start
+#   endFn(index) returns the byte following the last indexed record
+#
+  stat = os.stat(binfilename)
+  index, meta = readSidecar(binfilename, kind)
+  if index is not None:
+    if meta['SIZE'] == stat.st_size and meta['MTIME'] == stat.st_mtime:
+      return index
+    scanEnd = int(meta['SCANEND'])
+    if stat.st_size >= scanEnd and scanEnd > 0:
+      headBytes, tailBytes = _probeBytes(binfilename, scanEnd)
+      if (headBytes == meta['HEADBYTES']).all() and \
+         (tailBytes == meta['TAILBYTES']).all():
+        newRecs = scanFn(scanEnd)
+        if newRecs.size:
+          index = np.concatenate((index, newRecs))
+          scanEnd = endFn(index)
+        writeSidecar(binfilename, kind, index, scanEnd, stat)
+        return index
+  index = scanFn(0)
+  writeSidecar(binfilename, kind, index, endFn(index), stat)
+  return index
+
+def cachedHeadIndex(binfilename, Hdr, binType):
+#
+#   indexBinHead backed by the sidecar cache
+#
+  def scanFn(start):
+    return indexBinHead(binfilename, Hdr, start)
+  def endFn(index):
+    if index.size < 1: return 0
+    last = index[-1]
+    return int(last['OFFSET']) + int(last['NC'])*int(last['NR'])*4
+  with MFprofile.stage('headerScan', os.path.getsize(binfilename)):
+    return _cachedIndex(binfilename, binType, scanFn, endFn)
+
+def cachedCBCIndex(binfilename, cbcHdr, xcbcHdr):
+#
+#   indexBinCBC backed by the sidecar cache
+#
+  uf = 'BOR' in cbcHdr.names
+  kind = 'CBCUF' if uf else 'CBC'
+  def scanFn(start):
+    return indexBinCBC(binfilename, cbcHdr, xcbcHdr, start)
+  def endFn(index):
+    if index.size < 1: return 0
+    last = index[-1]
+    return int(last['OFFSET']) + int(last['NBYTES']) + (4 if uf else 0)
+  with MFprofile.stage('headerScan', os.path.getsize(binfilename)):
+    return _cachedIndex(binfilename, kind, scanFn, endFn)
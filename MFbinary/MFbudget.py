@@ -0,0 +1,229 @@
+"""
+..module::MFbudget
+  ::synopsis: Read Modflow Binary uses:
+  :           import MFbinary.MFbudget as mfbud
+  :           Decoders for CellxCell budget payloads located by the
+  :           budget index from MFbinaryIndex, including every
+  :           compact budget IMETH.  List based terms are returned
+  :           as sparse NumPy record arrays, densified only when a
+  :           raster is written or a layer is aggregated
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import numpy as np
+
+#
+#   Compact budget payload layouts following the XCBC header:
+#     IMETH 0,1  NLAY*NROW*NCOL reals
+#     IMETH 2    NLIST, NLIST*(ICELL, VALUE)
+#     IMETH 3    NROW*NCOL layer indicators, NROW*NCOL reals
+#     IMETH 4    NROW*NCOL reals for layer 1
+#     IMETH 5    NVAL, (NVAL-1) aux names, NLIST,
+#                NLIST*(ICELL, VALUE, aux values)
+#     IMETH 6    TXT1ID1, TXT2ID1, TXT1ID2, TXT2ID2, NDAT,
+#                (NDAT-1) aux names, NLIST,
+#                NLIST*(ID1, ID2, VALUE, aux values)
+#   Reals are single precision as everywhere in binHdr
+#
+LISTMETHODS = (2, 5, 6)
+
+def _ints(mm, offset, count):
+  return np.ndarray((count,), dtype='<i4', buffer=mm, offset=int(offset))
+
+def _names(mm, offset, count):
+  names = np.ndarray((count,), dtype='S16', buffer=mm, offset=int(offset))
+  return [n.strip().replace(b" ",b"_").decode("utf-8") for n in names]
+
+def _listDtype(idNames, valNames):
+  return np.dtype([(n,'<i4') for n in idNames] +
+                  [(n,'<f4') for n in valNames])
+
+def rawList(mm, rec):
+#
+#   Zero-copy record array of a list based (IMETH 2, 5, 6) payload.
+#   Fields are ICELL (or ID1, ID2 for IMETH 6), VALUE and any
+#   auxiliary variables by name
+#
+  imeth = int(rec['IMETH'])
+  pos = int(rec['OFFSET'])
+  if imeth == 2:
+    nlist = int(_ints(mm, pos, 1)[0])
+    dt = _listDtype(['ICELL'], ['VALUE'])
+    pos += 4
+  elif imeth == 5:
+    naux = int(_ints(mm, pos, 1)[0]) - 1
+    aux = _names(mm, pos+4, naux)
+    pos += 4 + naux*16
+    nlist = int(_ints(mm, pos, 1)[0])
+    dt = _listDtype(['ICELL'], ['VALUE'] + aux)
+    pos += 4
+  elif imeth == 6:
+    pos += 4*16
+    naux = int(_ints(mm, pos, 1)[0]) - 1
+    aux = _names(mm, pos+4, naux)
+    pos += 4 + naux*16
+    nlist = int(_ints(mm, pos, 1)[0])
+    dt = _listDtype(['ID1','ID2'], ['VALUE'] + aux)
+    pos += 4
+  else:
+    raise ValueError("IMETH={} is not a list budget".format(imeth))
+  return np.ndarray((nlist,), dtype=dt, buffer=mm, offset=pos)
+
+def sparseDtype(auxNames=()):
+  return np.dtype([("LAYER","<i4"),("ROW","<i4"),("COL","<i4"),
+                   ("VALUE","<f4")] + [(n,'<f4') for n in auxNames])
+
+def _cellsToList(cells, values, nrows, ncols, extra=None):
+#
+#   Sparse records from 1 based cell numbers
+#   ICELL = (K-1)*NROW*NCOL + (I-1)*NCOL + J
+#
+  auxNames = [] if extra is None else list(extra.dtype.names)
+  out = np.zeros(cells.size, dtype=sparseDtype(auxNames))
+  cell0 = cells.astype(np.int64) - 1
+  out['LAYER'] = cell0 // (nrows*ncols) + 1
+  out['ROW'] = (cell0 % (nrows*ncols)) // ncols + 1
+  out['COL'] = cell0 % ncols + 1
+  out['VALUE'] = values
+  for n in auxNames:
+    out[n] = extra[n]
+  return out
+
+def budgetList(mm, rec):
+#
+#   Sparse record array (LAYER, ROW, COL, VALUE, aux...) for any
+#   budget record.  Array based records keep only non-zero cells
+#
+  nrows = int(rec['NR'])
+  ncols = int(rec['NC'])
+  knt = nrows*ncols
+  imeth = int(rec['IMETH'])
+  pos = int(rec['OFFSET'])
+  if int(rec['K']) < 0 and imeth in LISTMETHODS:
+    raw = rawList(mm, rec)
+    cells = raw['ID1'] if imeth == 6 else raw['ICELL']
+    aux = [n for n in raw.dtype.names
+           if n not in ('ICELL','ID1','ID2','VALUE')]
+    return _cellsToList(cells, raw['VALUE'], nrows, ncols,
+                        raw[aux] if aux else None)
+  if int(rec['K']) < 0 and imeth == 3:
+    layers = np.ndarray((knt,), '<i4', buffer=mm, offset=pos)
+    values = np.ndarray((knt,), '<f4', buffer=mm, offset=pos+knt*4)
+    nz = np.nonzero(values)[0]
+    return _cellsToList((layers[nz]-1)*knt + nz + 1, values[nz],
+                        nrows, ncols)
+  nlay = 1 if (int(rec['K']) < 0 and imeth == 4) else abs(int(rec['K']))
+  values = np.ndarray((nlay*knt,), '<f4', buffer=mm, offset=pos)
+  nz = np.nonzero(values)[0]
+  return _cellsToList(nz + 1, values[nz], nrows, ncols)
+
+class SparseLayer(object):
+#
+#   One layer of a list based budget record kept as its sparse
+#   (LAYER, ROW, COL, VALUE, aux...) records.  The dense (nrows,
+#   ncols) float32 array, summing repeated cells, is built only when
+#   NumPy asks for it (np.asarray) as the raster is written or the
+#   layer is aggregated
+#
+    def __init__(self, records, shape):
+        self.records = records
+        self.shape = shape
+        self.size = shape[0]*shape[1]
+        self.nbytes = records.nbytes
+
+    def dense(self):
+        dense = np.zeros(self.shape, np.float32)
+        np.add.at(dense, (self.records['ROW']-1, self.records['COL']-1),
+                  self.records['VALUE'])
+        return dense
+
+    def __array__(self, dtype=None, copy=None):
+        dense = self.dense()
+        return dense if dtype is None else dense.astype(dtype)
+
+def budgetLayers(mm, rec, layerList):
+#
+#   Generator of (layer, (nrows,ncols) array) for the layers in
+#   layerList holding data in this budget record.  Full 3D and
+#   IMETH 4 layers are zero-copy views; IMETH 3 layers are masked
+#   by the layer indicator array; list based terms are SparseLayers
+#   of the requested layers
+#
+  nrows = int(rec['NR'])
+  ncols = int(rec['NC'])
+  shape = (nrows, ncols)
+  knt = nrows*ncols
+  imeth = int(rec['IMETH'])
+  pos = int(rec['OFFSET'])
+  compact = int(rec['K']) < 0
+  if compact and imeth in LISTMETHODS:
+    sparse = budgetList(mm, rec)
+    for lay in np.unique(sparse['LAYER']):
+      if lay in layerList:
+        yield int(lay), SparseLayer(sparse[sparse['LAYER'] == lay], shape)
+  elif compact and imeth == 3:
+    layers = np.ndarray(shape, '<i4', buffer=mm, offset=pos)
+    values = np.ndarray(shape, '<f4', buffer=mm, offset=pos+knt*4)
+    for lay in np.unique(layers):
+      if lay in layerList:
+        yield int(lay), np.where(layers == lay, values, np.float32(0.0))
+  elif compact and imeth == 4:
+    if 1 in layerList:
+      yield 1, np.ndarray(shape, '<f4', buffer=mm, offset=pos)
+  else:
+    for ilayer in range(abs(int(rec['K']))):
+      if ilayer+1 in layerList:
+        yield ilayer+1, np.ndarray(shape, '<f4', buffer=mm,
+                                   offset=pos+ilayer*knt*4)
+
+class BudgetFile(object):
+#
+#   CellxCell budget file read through its cached header index.
+#
+#     cbc = BudgetFile('model.cbc')
+#     cbc.terms                             term of each index record
+#     for rec, sparse in cbc.lists('WELLS', kper=[1, 2]):
+#         sparse['LAYER'], sparse['ROW'], sparse['COL'], sparse['VALUE']
+#     for rec, lay, array in cbc.layers('RECHARGE', layers=[1]):
+#         ...
+#
+#   lists() returns the sparse records of every budget record (non
+#   zero cells of array based records); layers() returns arrays,
+#   list based layers as SparseLayers densified by np.asarray.
+#   unformatted selects the UNFORMATTED record layout
+#
+    def __init__(self, binfilename, unformatted=False):
+        import MFbinary.MFbinaryIndex as mfidx
+        import MFbinary.MFheadFile as mfhds
+        self.filename = binfilename
+        cbcHdr = mfidx.binHdr('CBCUF' if unformatted else 'CBC')
+        self.index = mfidx.cachedCBCIndex(binfilename, cbcHdr,
+                                          mfidx.binHdr('XCBC'))
+        self.terms = [t.strip().replace(b" ",b"_").decode("utf-8")
+                      for t in self.index['TEXT']]
+        self.mm = mfhds.openMemmap(binfilename)
+
+    def records(self, terms=None, kper=None):
+#
+#       Index records of the terms (a name or list of names) and
+#       stress periods requested, in file order
+#
+        if isinstance(terms, str):
+            terms = [terms]
+        wanted = np.ones(self.index.size, bool)
+        if terms:
+            wanted &= np.isin(self.terms, terms)
+        if kper:
+            wanted &= np.isin(self.index['KPER'], kper)
+        return self.index[wanted]
+
+    def lists(self, terms=None, kper=None):
+        for rec in self.records(terms, kper):
+            yield rec, budgetList(self.mm, rec)
+
+    def layers(self, terms=None, kper=None, layers=None):
+        for rec in self.records(terms, kper):
+            layerList = layers or range(1, abs(int(rec['K'])) + 1)
+            for lay, array in budgetLayers(self.mm, rec, layerList):
+                yield rec, lay, array
@@ -0,0 +1,385 @@
+"""
+..module::MFdisFile
+  ::synopsis: Read Modflow Binary uses:
+  :           import MFbinary.MFdisFile as mfdis
+  :           Modflow DIS (and DISU) discretization reader returning
+  :           NumPy arrays for DELR, DELC, TOP and BOTM and the stress
+  :           period table.  Arrays may be CONSTANT, INTERNAL,
+  :           EXTERNAL or OPEN/CLOSE, in free or fixed format control
+  :           records, with formatted or binary external data
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import os
+import re
+import numpy as np
+
+ARRAYKEYWORDS = ('CONSTANT', 'INTERNAL', 'EXTERNAL', 'OPEN/CLOSE')
+#   Header of a binary array record: KSTP,KPER,PERTIM,TOTIM,TEXT,
+#   NCOL,NROW,ILAY as written by Modflow ULASAV
+ARRAYHDR = np.dtype([("KSTP","<i4"),("KPER","<i4"),("PERTIM","<f4"),
+                     ("TOTIM","<f4"),("TEXT","S16"),("NCOL","<i4"),
+                     ("NROW","<i4"),("ILAY","<i4")])
+
+def fortranFormat(fmtin):
+#
+#   (values per line, field width) of a Fortran edit descriptor such
+#   as '(10E12.4)' or '(20F10.3)'.  Free format '(FREE)', '*' and
+#   unrecognised formats return None: values are whitespace separated
+#
+  fmt = fmtin.strip().upper()
+  m = re.match(r'^\(\s*(\d*)\s*[A-Z]+(\d+)(\.\d+)?\s*\)$', fmt)
+  if not m or fmt.startswith('(FREE'):
+    return None
+  perLine = int(m.group(1)) if m.group(1) else 1
+  return perLine, int(m.group(2))
+
+def _numbers(tokens):
+#
+#   Expand list directed 'n*value' repeats
+#
+  out = []
+  for t in tokens:
+    t = t.rstrip(',')
+    if '*' in t:
+      n, v = t.split('*', 1)
+      out.extend([v]*int(n))
+    elif t:
+      out.append(t)
+  return out
+
+def _float(v):
+  # Fortran 'D' exponents
+  return float(v.upper().replace('D', 'E'))
+
+class _TextUnit(object):
+#
+#   Line reader over a formatted input file skipping '#' comments
+#
+    def __init__(self, filename):
+        self.filename = filename
+        self.f = open(filename, 'r')
+
+    def line(self):
+        while True:
+            line = self.f.readline()
+            if not line:
+                raise ValueError("Unexpected end of {}".format(self.filename))
+            if not line.startswith('#'):
+                return line.rstrip('\r\n')
+
+    def values(self, count, fmt=None):
+#
+#       count values of one Fortran READ starting on a new line
+#
+        layout = fortranFormat(fmt) if fmt else None
+        out = []
+        while len(out) < count:
+            line = self.line()
+            if layout is None:
+                out.extend(_numbers(line.replace(',', ' ').split()))
+            else:
+                perLine, width = layout
+                fields = [line[i*width:(i+1)*width] for i in range(perLine)]
+                out.extend(v.strip() for v in fields if v.strip())
+        return out[:count]
+
+    def close(self):
+        self.f.close()
+
+class _BinaryUnit(object):
+#
+#   Reader of binary array records: stream (Modflow 'BINARY') or
+#   sequential unformatted with 4 byte record markers
+#
+    def __init__(self, filename):
+        self.filename = filename
+        self.f = open(filename, 'rb')
+        first = np.fromfile(self.f, '<i4', 1)
+        self.markers = first.size == 1 and first[0] == ARRAYHDR.itemsize
+        self.f.seek(0)
+
+    def array(self, count):
+        if self.markers: self.f.seek(4, 1)
+        hdr = np.fromfile(self.f, ARRAYHDR, 1)
+        if self.markers: self.f.seek(8, 1)
+        data = np.fromfile(self.f, '<f4', count)
+        if self.markers: self.f.seek(4, 1)
+        if hdr.size < 1 or data.size < count:
+            raise ValueError("Unexpected end of {}".format(self.filename))
+        return data
+
+    def close(self):
+        self.f.close()
+
+class ArrayReader(object):
+#
+#   Modflow U1DREL/U2DREL/U1DINT array input from a package file.
+#   nam (a NameFile) resolves EXTERNAL and fixed format units
+#
+    def __init__(self, filename, nam=None, unit=None):
+        self.path = os.path.dirname(filename)
+        self.nam = nam
+        self.unit = unit
+        self.main = _TextUnit(filename)
+        self.units = {}
+
+    def close(self):
+        self.main.close()
+        for u in self.units.values():
+            u.close()
+        self.units = {}
+
+    def line(self):
+        return self.main.line()
+
+    def values(self, count):
+        return self.main.values(count)
+
+    def _external(self, unit, binary):
+        if unit not in self.units:
+            if self.nam is None or not self.nam.fileByUnit(unit):
+                raise ValueError("Unit {} is not in the namefile".format(unit))
+            filename = os.path.join(self.path, self.nam.fileByUnit(unit))
+            self.units[unit] = (_BinaryUnit(filename) if binary
+                                else _TextUnit(filename))
+        return self.units[unit]
+
+    def _control(self):
+#
+#       (source, cnstnt, fmtin) of an array control record where
+#       source is 'CONSTANT', 'INTERNAL', a unit number or a file name
+#
+        line = self.line()
+        items = line.split()
+        key = items[0].upper() if items else ''
+        if key in ARRAYKEYWORDS:
+            if key == 'CONSTANT':
+                return 'CONSTANT', _float(items[1]), None
+            if key == 'INTERNAL':
+                rest = items[1:]
+                source = 'INTERNAL'
+            elif key == 'EXTERNAL':
+                rest = items[2:]
+                source = int(items[1])
+            else:
+                rest = items[2:]
+                source = items[1].strip('\'"')
+            cnstnt = _float(rest[0]) if rest else 1.0
+            fmtin = rest[1] if len(rest) > 1 else '(FREE)'
+            return source, cnstnt, fmtin
+        # Fixed format: LOCAT I10, CNSTNT F10, FMTIN A20, IPRN I10
+        locat = int(line[0:10])
+        cnstnt = _float(line[10:20]) if line[10:20].strip() else 0.0
+        fmtin = line[20:40].strip() or '(FREE)'
+        if locat == 0:
+            return 'CONSTANT', cnstnt, None
+        if locat < 0:
+            return -locat, cnstnt, '(BINARY)'
+        if locat == self.unit or self.nam is None or \
+           not self.nam.fileByUnit(locat):
+            return 'INTERNAL', cnstnt, fmtin
+        return locat, cnstnt, fmtin
+
+    def array(self, shape, dtype=np.float64):
+#
+#       One 1D or 2D array; 2D rows each start on a new line
+#
+        source, cnstnt, fmtin = self._control()
+        count = int(np.prod(shape))
+        if source == 'CONSTANT':
+            return np.full(shape, cnstnt, dtype)
+        binary = fmtin.strip().upper() == '(BINARY)'
+        opened = None
+        if source == 'INTERNAL':
+            unit = self.main
+        elif isinstance(source, int):
+            unit = self._external(source, binary)
+        else:
+            filename = os.path.join(self.path, source)
+            unit = opened = (_BinaryUnit(filename) if binary
+                             else _TextUnit(filename))
+        try:
+            if binary:
+                data = unit.array(count).astype(dtype)
+            else:
+                rows = shape[0] if len(shape) == 2 else 1
+                rowLen = count // rows
+                data = np.array([_float(v) for r in range(rows)
+                                 for v in unit.values(rowLen, fmtin)])
+        finally:
+            if opened is not None: opened.close()
+        if cnstnt != 0:
+            data = data * cnstnt
+        return data.reshape(shape).astype(dtype)
+
+class DisFile(object):
+#
+#   Structured Modflow discretization.
+#
+#     dis = DisFile(disfile, nam)
+#     dis.delr, dis.delc          -> (ncol,), (nrow,) cell widths
+#     dis.top                     -> (nrow,ncol) model top
+#     dis.botm                    -> (nlay+ncbd,nrow,ncol) as read,
+#                                    quasi-3D confining beds included
+#     dis.bottoms(), dis.tops()   -> (nlay,nrow,ncol) by model layer
+#     dis.perlen, nstp, tsmult, steady
+#
+    def __init__(self, disfile, nam=None, unit=None):
+        self.filename = disfile
+        rdr = ArrayReader(disfile, nam, unit)
+        try:
+            item1 = rdr.line().split()
+            (self.nlay, self.nrow, self.ncol, self.nper,
+             self.itmuni, self.lenuni) = [int(v) for v in item1[:6]]
+            self.laycbd = np.array([int(v) for v in rdr.values(self.nlay)])
+            self.laycbd[-1] = 0
+            self.delr = rdr.array((self.ncol,))
+            self.delc = rdr.array((self.nrow,))
+            shape = (self.nrow, self.ncol)
+            self.top = rdr.array(shape)
+            nbot = self.nlay + int((self.laycbd != 0).sum())
+            self.botm = np.array([rdr.array(shape) for n in range(nbot)])
+            self._periods(rdr)
+        finally:
+            rdr.close()
+
+    def _periods(self, rdr):
+        perlen, nstp, tsmult, steady = [], [], [], []
+        for n in range(self.nper):
+            items = rdr.line().split()
+            perlen.append(_float(items[0]))
+            nstp.append(int(items[1]))
+            tsmult.append(_float(items[2]))
+            steady.append(items[3].upper().startswith('SS'))
+        self.perlen = np.array(perlen)
+        self.nstp = np.array(nstp, dtype=np.int64)
+        self.tsmult = np.array(tsmult)
+        self.steady = np.array(steady, dtype=bool)
+
+    def periodEnds(self):
+#
+#       TOTIM at the end of each stress period
+#
+        return np.cumsum(self.perlen)
+
+    def stepEnds(self):
+#
+#       TOTIM at the end of each time step, a list of arrays by
+#       stress period.  Step lengths grow by TSMULT
+#
+        ends = []
+        start = 0.0
+        for perlen, nstp, tsmult in zip(self.perlen, self.nstp, self.tsmult):
+            steps = tsmult**np.arange(nstp)
+            ends.append(start + perlen*np.cumsum(steps)/steps.sum())
+            start += perlen
+        return ends
+
+    def layerBottomIndex(self):
+        return np.arange(self.nlay) + \
+               np.concatenate(([0], np.cumsum(self.laycbd[:-1] != 0)))
+
+    def bottoms(self):
+        return self.botm[self.layerBottomIndex()]
+
+    def tops(self):
+        idx = self.layerBottomIndex()
+        return np.concatenate((self.top[None], self.botm[idx[1:]-1]))
+
+    def thickness(self):
+        return self.tops() - self.bottoms()
+
+    def cellAreas(self):
+        return np.outer(self.delc, self.delr)
+
+    def uniform(self):
+        return bool(np.all(self.delr == self.delr[0]) and
+                    np.all(self.delc == self.delc[0]))
+
+    def discDict(self):
+#
+#       Discretization dictionary used throughout MFbinaryData.
+#       Rasters need a single cell size: the first DELR and DELC
+#
+        return {'layer': str(self.nlay),
+                'nrows': str(self.nrow),
+                'ncols': str(self.ncol),
+                'nperiod': str(self.nper),
+                'cellsize1': '{:g}'.format(self.delr[0]),
+                'cellsize2': '{:g}'.format(self.delc[0]),
+                'stepEnds': [[float(v) for v in e]
+                             for e in self.stepEnds()]}
+
+class DisuFile(DisFile):
+#
+#   Unstructured (Modflow-USG) discretization.  Node based arrays are
+#   kept per layer in lists: top[k], bot[k], area[k]; connections
+#   iac, ja (and cl12/fahl) as read
+#
+    def __init__(self, disfile, nam=None, unit=None):
+        self.filename = disfile
+        rdr = ArrayReader(disfile, nam, unit)
+        try:
+            item1 = rdr.line().split()
+            (self.nodes, self.nlay, self.njag, self.ivsd, self.nper,
+             self.itmuni, self.lenuni, self.idsymrd) = \
+                [int(v) for v in item1[:8]]
+            self.laycbd = np.array([int(v) for v in rdr.values(self.nlay)])
+            self.nodlay = rdr.array((self.nlay,), np.int64)
+            self.top = [rdr.array((int(n),)) for n in self.nodlay]
+            self.bot = [rdr.array((int(n),)) for n in self.nodlay]
+            if self.ivsd == -1:
+                self.area = [rdr.array((int(self.nodlay[0]),))]*self.nlay
+            else:
+                self.area = [rdr.array((int(n),)) for n in self.nodlay]
+            self.iac = rdr.array((self.nodes,), np.int64)
+            self.ja = rdr.array((self.njag,), np.int64)
+            if self.ivsd == 1:
+                self.ivc = rdr.array((self.njag,), np.int64)
+            njags = (self.njag - self.nodes) // 2
+            if self.idsymrd == 1:
+                self.cl1 = rdr.array((njags,))
+                self.cl2 = rdr.array((njags,))
+                self.fahl = rdr.array((njags,))
+            else:
+                self.cl12 = rdr.array((self.njag,))
+                self.fahl = rdr.array((self.njag,))
+            self._periods(rdr)
+        finally:
+            rdr.close()
+
+    def thickness(self):
+        return [t - b for t, b in zip(self.top, self.bot)]
+
+    def discDict(self):
+        raise ValueError("DISU grids cannot be exported as rasters")
+
+_disFiles = {}
+
+def disFile(disfile, nam=None, unit=None, unstructured=False):
+#
+#   DisFile (or DisuFile) for a discretization file parsed once per
+#   run unless the file has been modified
+#
+  key = (os.path.abspath(disfile), unstructured)
+  mtime = os.path.getmtime(disfile)
+  cached = _disFiles.get(key)
+  if cached is None or cached[0] != mtime:
+    cls = DisuFile if unstructured else DisFile
+    cached = (mtime, cls(disfile, nam, unit))
+    _disFiles[key] = cached
+  return cached[1]
+
+def modelDis(namfile):
+#
+#   Discretization of the model in a namefile (DIS or DISU), or None
+#
+  import MFbinary.MFnameFile as mfnam
+  nam = mfnam.nameFile(namfile)
+  entry = nam.entry('DIS', 'DISU')
+  if entry is None:
+    return None
+  return disFile(nam.fullPath(entry.path), nam, entry.unit,
+                 entry.ftype == 'DISU')
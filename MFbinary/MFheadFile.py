@@ -0,0 +1,322 @@
+"""
+..module::MFheadFile
+  ::synopsis: Read Modflow Binary uses:
+  :           import MFbinary.MFheadFile as mfhds
+  :           Memory-mapped access to HEAD and CONC binary files.
+  :           Records are exposed as zero-copy (nrows,ncols) views
+  :           located by the record index from MFbinaryIndex
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import numpy as np
+import datetime
+import MFmonitor.MFprofile as MFprofile
+
+def binScale(binType):
+#
+#   Multiplier applied to record values when they are exported.
+#   MT3D concentrations are written in g/L and exported as mg/L
+#
+  if binType == 'CONC':
+    return 1000.0
+  return 1.0
+
+def scaled(dataRead, scale):
+#
+#   Apply the export scale only when one is needed so
+#   unscaled records are passed on without a copy
+#
+  if scale == 1.0:
+    return dataRead
+  return dataRead * scale
+
+def recordName(binType, rec):
+#
+#   Raster name of a HEAD or CONC record: binType, the stress period
+#   (integer TOTIM for CONC) as 5 digits and the layer
+#       HEAD_00012_3
+#
+  kper = rec['KPER']
+  if binType == 'CONC':
+    kper = int(rec['TOTIM'])
+  rastername = binType + '{:7.5f}'.format(((kper)/100000.0))+"_"+str(rec['K'])
+  return rastername.replace("0.","_")
+
+def openMemmap(binfilename):
+#
+#   Read only byte map of the whole binary file.
+#   Pages are only read from disk when a record view touches them
+#
+  return np.memmap(binfilename, dtype=np.uint8, mode='r')
+
+def recordView(mm, offset, shape):
+#
+#   Zero-copy float32 view of one record starting at byte offset
+#
+  return np.ndarray(shape, dtype='<f4', buffer=mm, offset=int(offset))
+
+def headRecords(binfilename, records, shape):
+#
+#   Generator of (index record, (nrows,ncols) view) for the
+#   selected index records.  Views remain valid while referenced
+#
+  mm = openMemmap(binfilename)
+  nbytes = shape[0]*shape[1]*4
+  for rec in records:
+    MFprofile.tally('payloadRead', nbytes)
+    yield rec, recordView(mm, rec['OFFSET'], shape)
+
+class HeadFile(object):
+#
+#   Lazy (time, layer, row, col) dataset over a HEAD or CONC file.
+#
+#     hf = HeadFile(headsfile)
+#     hf.shape                      -> (ntimes, nlays, nrows, ncols)
+#     hf[-1, 0]                     -> last time, first layer
+#     hf[:, 2, 100:150, 40:90]      -> window through all times
+#     hf.sel(kper=[12,24], layer=1) -> by stress period and layer
+#
+#   Time and layer positions follow file order and the sorted layer
+#   numbers present in the file.  Only the records (and the pages of
+#   the rows) requested are read.  Missing (time,layer) records are
+#   returned as NaN.  Row and column lists select an outer (np.ix_)
+#   window.  Values are multiplied by scale, which defaults to the
+#   export scale of binType.
+#
+    def __init__(self, binfilename, binType='HEAD', scale=None):
+        import MFbinary.MFbinaryIndex as mfidx
+        self.filename = binfilename
+        self.binType = binType
+        self.scale = binScale(binType) if scale is None else scale
+        self.index = mfidx.cachedHeadIndex(binfilename, mfidx.binHdr(binType),
+                                           binType)
+        if self.index.size < 1:
+            raise ValueError("No complete records found in {}"\
+                             .format(binfilename))
+        self.nrows = int(self.index['NR'][0])
+        self.ncols = int(self.index['NC'][0])
+        self.layers = np.unique(self.index['K'])
+        periods = mfidx.recordPeriods(self.index, binType)
+
+        timeNum = {}
+        timeRecs = []
+        for i, rec in enumerate(self.index):
+            key = (int(rec['KPER']), int(rec['KSTP']), float(rec['TOTIM']))
+            if key not in timeNum:
+                timeNum[key] = len(timeRecs)
+                timeRecs.append((rec['KPER'], rec['KSTP'], rec['PERTIM'],
+                                 rec['TOTIM'], periods[i]))
+        self.times = np.array(timeRecs, dtype=[("KPER","<i4"),("KSTP","<i4"),
+                                                ("PERTIM","<f4"),
+                                                ("TOTIM","<f4"),
+                                                ("PERIOD","<i8")])
+        self.offsets = np.full((len(timeRecs), self.layers.size), -1,
+                               dtype=np.int64)
+        layNum = np.searchsorted(self.layers, self.index['K'])
+        for i, rec in enumerate(self.index):
+            key = (int(rec['KPER']), int(rec['KSTP']), float(rec['TOTIM']))
+            self.offsets[timeNum[key], layNum[i]] = rec['OFFSET']
+        self._mm = openMemmap(binfilename)
+
+    @property
+    def shape(self):
+        return (self.times.size, self.layers.size, self.nrows, self.ncols)
+
+    @property
+    def dtype(self):
+        return np.dtype(np.float32)
+
+    def __len__(self):
+        return self.times.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._mm = None
+
+    def record(self, itime, ilay):
+#
+#       Unscaled zero-copy (nrows,ncols) view for one time/layer position
+#
+        offset = self.offsets[itime, ilay]
+        if offset < 0:
+            return None
+        return recordView(self._mm, offset, (self.nrows, self.ncols))
+
+    def read(self, timeIdx, layIdx, rows=slice(None), cols=slice(None)):
+#
+#       Read records for arrays of time and layer positions
+#       returning a (ntimes, nlays, nrows, ncols) float32 array
+#
+        timeIdx = np.atleast_1d(timeIdx)
+        layIdx = np.atleast_1d(layIdx)
+        rowIdx = np.arange(self.nrows)[rows]
+        colIdx = np.arange(self.ncols)[cols]
+        out = np.full((timeIdx.size, layIdx.size,
+                       np.size(rowIdx), np.size(colIdx)), np.nan, np.float32)
+        window = (rows, cols)
+        if not isinstance(rows, slice) and not isinstance(cols, slice):
+            window = np.ix_(np.atleast_1d(rowIdx), np.atleast_1d(colIdx))
+        for i, itime in enumerate(timeIdx):
+            for j, ilay in enumerate(layIdx):
+                view = self.record(itime, ilay)
+                if view is not None:
+                    out[i, j] = np.reshape(view[window], out.shape[2:])
+        if self.scale != 1.0:
+            out *= self.scale
+        return out
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > 4:
+            raise IndexError("HeadFile has 4 dimensions")
+        key = key + (slice(None),)*(4 - len(key))
+        timeIdx = np.arange(self.times.size)[key[0]]
+        layIdx = np.arange(self.layers.size)[key[1]]
+        rowIdx = np.arange(self.nrows)[key[2]]
+        colIdx = np.arange(self.ncols)[key[3]]
+        out = self.read(timeIdx, layIdx,
+                        key[2] if isinstance(key[2], slice) else rowIdx,
+                        key[3] if isinstance(key[3], slice) else colIdx)
+        # Integer keys drop their dimension as with NumPy arrays
+        drop = tuple(n for n, idx in enumerate((timeIdx, layIdx,
+                                                rowIdx, colIdx))
+                     if np.ndim(idx) == 0)
+        if drop:
+            out = out.reshape([s for n, s in enumerate(out.shape)
+                               if n not in drop])
+        return out
+
+    def __array__(self, dtype=None, copy=None):
+        out = self[:]
+        if dtype is not None:
+            out = out.astype(dtype)
+        return out
+
+    def timeIndex(self, kper=None, kstp=None):
+#
+#       Time positions for stress period(s) and time step(s).
+#       For CONC files kper matches the integer TOTIM period
+#
+        mask = np.ones(self.times.size, bool)
+        if kper is not None:
+            mask &= np.isin(self.times['PERIOD'], kper)
+        if kstp is not None:
+            mask &= np.isin(self.times['KSTP'], kstp)
+        return np.nonzero(mask)[0]
+
+    def layerIndex(self, layer=None):
+#
+#       Layer positions for Modflow layer number(s)
+#
+        if layer is None:
+            return np.arange(self.layers.size)
+        layer = np.atleast_1d(layer)
+        missing = np.setdiff1d(layer, self.layers)
+        if missing.size:
+            raise KeyError("Layers {} not found in {}"\
+                           .format(list(missing), self.filename))
+        return np.searchsorted(self.layers, layer)
+
+    def sel(self, kper=None, kstp=None, layer=None,
+            rows=slice(None), cols=slice(None)):
+#
+#       Select by Modflow stress period, time step and layer numbers
+#       (1 based, as in the binary headers) and 0 based row/col windows.
+#       Always returns a 4D array
+#
+        return self.read(self.timeIndex(kper, kstp),
+                         self.layerIndex(layer), rows, cols)
+
+    def points(self, rows, cols, layers):
+#
+#       Values at (row, col, layer) cells (1 based Modflow numbering)
+#       for every time, returned as a (ntimes, npoints) float32 array.
+#       Cell values are gathered straight from their byte offsets with
+#       one fancy index over a float32 map of the file, so only the
+#       pages holding the requested cells are read
+#
+        rows = np.asarray(rows, dtype=np.int64) - 1
+        cols = np.asarray(cols, dtype=np.int64) - 1
+        layIdx = self.layerIndex(layers)
+        if ((rows < 0) | (rows >= self.nrows) |
+            (cols < 0) | (cols >= self.ncols)).any():
+            raise IndexError("Station row/col outside the {}x{} grid"\
+                             .format(self.nrows, self.ncols))
+        offsets = self.offsets[:, layIdx]
+        cellOffsets = (rows*self.ncols + cols)*4
+        missing = offsets < 0
+        if (offsets[~missing] % 4).any():
+            # Unaligned records: gather from each record view
+            values = np.full(offsets.shape, np.nan, np.float32)
+            for i in range(offsets.shape[0]):
+                for j in range(offsets.shape[1]):
+                    if not missing[i, j]:
+                        values[i, j] = self.record(i, layIdx[j])\
+                                           [rows[j], cols[j]]
+        else:
+            mmf = np.ndarray((self._mm.size // 4,), dtype='<f4',
+                             buffer=self._mm)
+            positions = (np.where(missing, 0, offsets) + cellOffsets) // 4
+            values = mmf[positions]
+            values[missing] = np.nan
+        if self.scale != 1.0:
+            values *= self.scale
+        return values
+
+def readStations(stationFile):
+#
+#   Read a station list in the graphMFheads InputFile layout:
+#       STATION  ROW  COL  [LAYER]
+#   The header line is skipped and LAYER defaults to 1
+#
+  stations = []
+  with open(stationFile, 'r') as f:
+    for line in f:
+      values = line.split()
+      if not values or values[0].startswith('#'):
+        continue
+      if values[0].upper() == 'STATION':
+        continue
+      layer = int(values[3]) if len(values) > 3 else 1
+      stations.append((values[0], int(values[1]), int(values[2]), layer))
+  return stations
+
+def totimDates(totim, startDate):
+#
+#   Calendar dates for TOTIM (days) from a model start date
+#   given as a datetime.date or 'YYYY-MM-DD' string
+#
+  if not isinstance(startDate, datetime.date):
+    startDate = datetime.datetime.strptime(startDate, '%Y-%m-%d').date()
+  return [startDate + datetime.timedelta(days=float(t)) for t in totim]
+
+def writePointSeries(csvFile, hf, stations, startDate=None):
+#
+#   Write a columnar CSV of station values for every time in the
+#   HeadFile.  Column names match the heads CSVs read by
+#   graphMFheads ('     _Date' then one column per station);
+#   KPER, KSTP and TOTIM columns are always included.
+#
+  names = [s[0] for s in stations]
+  values = hf.points([s[1] for s in stations], [s[2] for s in stations],
+                     [s[3] for s in stations])
+  header = ['KPER', 'KSTP', 'TOTIM'] + names
+  if startDate:
+    header = ['{:>10}'.format('_Date')] + header
+    dates = totimDates(hf.times['TOTIM'], startDate)
+  with open(csvFile, 'w') as f:
+    f.write(','.join(header) + '\n')
+    for i, t in enumerate(hf.times):
+      row = [str(t['KPER']), str(t['KSTP']), '{:g}'.format(t['TOTIM'])]
+      row += ['{:.4f}'.format(v) for v in values[i]]
+      if startDate:
+        row = [dates[i].isoformat()] + row
+      f.write(','.join(row) + '\n')
+  return csvFile
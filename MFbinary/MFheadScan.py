@@ -0,0 +1,100 @@
+"""
+..module::MFheadScan
+  ::synopsis: Read Modflow Binary uses:
+  :           import MFbinary.MFheadScan as mfscan
+  :           Parallel scan of HEAD and CONC records.  Fixed size
+  :           records are split into contiguous chunks of the record
+  :           index; each worker process maps the binary file itself,
+  :           exports and aggregates its chunk, and the partial
+  :           aggregates and stage timings are merged in record order
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import os
+import multiprocessing as mp
+import numpy as np
+import MFbinary.MFheadFile as mfhds
+import MFbinary.MFaggregate as MFagg
+import MFmonitor.MFprofile as MFprofile
+
+def scanWorkers(optArgs):
+  workers = optArgs.get('workers')
+  return int(workers) if workers else 0
+
+def partition(nrec, nchunks):
+#
+#   (start, stop) bounds of nchunks contiguous, nearly equal chunks
+#
+  nchunks = max(1, min(int(nchunks), nrec))
+  bounds = np.linspace(0, nrec, nchunks+1).astype(np.int64)
+  return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+def _scanChunk(task):
+#
+#   Worker: export and/or aggregate one chunk of records.
+#   Returns the partial aggregate series and the worker's stage
+#   totals and counters for the parent to merge
+#
+  (chunkNo, binfilename, records, shape, binType, optArgs, discDict,
+   aggregate, profiled) = task
+  import MFgis.MFexportPool as MFexport
+  report = MFprofile.startWorker(profiled)
+  scale = mfhds.binScale(binType)
+  agg = None
+  if aggregate:
+    agg = MFagg.StreamAggregator(optArgs, discDict)
+  for rec, dataRead in mfhds.headRecords(binfilename, records, shape):
+    kper = rec['KPER']
+    if binType == 'CONC':
+      kper = int(rec['TOTIM'])
+    with MFprofile.stage('transform', dataRead.nbytes):
+      data = mfhds.scaled(dataRead, scale)
+    if agg:
+      agg.add(binType, rec['K'], data, rec['TOTIM'], kper)
+      if optArgs.get('aggOnly'): continue
+    rastername = os.path.join(optArgs['geodb'],
+                              mfhds.recordName(binType, rec))
+    MFexport.exportRaster(data, rastername, optArgs, discDict)
+  series, order = ({}, []) if agg is None else (agg.series, agg.order)
+  return (chunkNo, records.size, series, order, report.stages,
+          report.counters)
+
+def scanHeads(binfilename, selected, shape, binType, optArgs, discDict,
+              workers, agg=None, poll=None):
+#
+#   Export (and aggregate into agg) the selected records with a pool
+#   of worker processes.  Results are consumed in chunk order so the
+#   merged aggregates do not depend on which worker finishes first.
+#   poll(done, total) is called between chunks with the records
+#   processed so far; returning False stops the scan.
+#   Returns the number of records processed
+#
+  chunks = partition(selected.size, 4*workers)
+  profiled = MFprofile.runReport().enabled
+  tasks = [(n, binfilename, selected[a:b], shape, binType, optArgs,
+            discDict, agg is not None, profiled)
+           for n, (a, b) in enumerate(chunks)]
+  done = 0
+  pool = mp.Pool(processes=workers)
+  try:
+    for (chunkNo, nrec, series, order, stages,
+         counters) in pool.imap(_scanChunk, tasks):
+      if agg is not None:
+        agg.merge(series, order)
+      MFprofile.merge(stages, counters)
+      done += nrec
+      if not optArgs['quiet']:
+        print("chunk {} of {}: {} of {} records"\
+              .format(chunkNo+1, len(tasks), done, selected.size))
+      if poll is not None and not poll(done, selected.size):
+        pool.terminate()
+        break
+    else:
+      pool.close()
+  except:
+    pool.terminate()
+    raise
+  finally:
+    pool.join()
+  return done
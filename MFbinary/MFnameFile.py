@@ -0,0 +1,161 @@
+"""
+..module::MFnameFile
+  ::synopsis: Read Modflow Binary uses:
+  :           import MFbinary.MFnameFile as mfnam
+  :           Modflow Namefile parsed once into a typed manifest of
+  :           (ftype, unit, path, status, options) entries with
+  :           lookups by package file type and by unit number
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import os
+import json
+import shlex
+import collections
+import MFmonitor.MFprofile as MFprofile
+
+NameEntry = collections.namedtuple('NameEntry',
+                                   ['ftype', 'unit', 'path', 'status',
+                                    'options'])
+#   Keywords which may follow the filename on a Namefile line
+STATUSES = ('OLD', 'NEW', 'UNKNOWN', 'REPLACE')
+
+def _splitLine(line):
+#
+#   Namefile line items honouring quoted filenames and
+#   trailing '#' comments
+#
+  lexer = shlex.shlex(line, posix=True)
+  lexer.whitespace_split = True
+  lexer.commenters = '#'
+  # Windows paths use backslash
+  lexer.escape = ''
+  try:
+    return list(lexer)
+  except ValueError:
+    # Unbalanced quote: fall back to whitespace items
+    return line.split('#', 1)[0].split()
+
+def parseLine(line):
+#
+#   NameEntry for a Namefile line or None for comments, blank
+#   lines and lines not of the form  Ftype Nunit Fname [Fstatus] [opts]
+#
+  items = _splitLine(line)
+  if len(items) < 3:
+    return None
+  try:
+    unit = int(items[1])
+  except ValueError:
+    return None
+  status = ''
+  options = items[3:]
+  if options and options[0].upper() in STATUSES:
+    status = options[0].upper()
+    options = options[1:]
+  return NameEntry(items[0].upper(), unit, items[2], status,
+                   tuple(o.upper() for o in options))
+
+class NameFile(object):
+#
+#   Typed manifest of a Modflow Namefile.
+#
+#     nam = NameFile(namfile)
+#     nam.filename('DIS')            -> 'model.dis' or ''
+#     nam.filename('LPF','UPW')      -> first package present
+#     nam.fileByUnit(40)             -> filename on unit 40
+#     nam.fullPath(nam.filename('OC'))
+#
+#   File types are matched without regard to case.  Entries keep
+#   the namefile order; when a file type repeats (DATA(BINARY))
+#   the first entry is returned by entry() and all by entries()
+#
+    def __init__(self, sourcefile=None, entries=()):
+        self.sourcefile = sourcefile
+        self.path = os.path.dirname(sourcefile) if sourcefile else ''
+        self.items = list(entries)
+        if sourcefile and not self.items:
+            with open(sourcefile, 'r') as f:
+                for line in f:
+                    entry = parseLine(line)
+                    if entry is not None:
+                        self.items.append(entry)
+        self.byType = {}
+        self.byUnit = {}
+        for entry in self.items:
+            self.byType.setdefault(entry.ftype, []).append(entry)
+            self.byUnit.setdefault(entry.unit, entry)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __contains__(self, ftype):
+        return ftype.upper() in self.byType
+
+    def entries(self, ftype):
+        return list(self.byType.get(ftype.upper(), []))
+
+    def entry(self, *ftypes):
+#
+#       First entry of the first file type present, else None
+#
+        for ftype in ftypes:
+            found = self.byType.get(ftype.upper())
+            if found:
+                return found[0]
+        return None
+
+    def unitEntry(self, unit):
+        return self.byUnit.get(int(unit))
+
+    def filename(self, *ftypes):
+        entry = self.entry(*ftypes)
+        return entry.path if entry else ''
+
+    def fileByUnit(self, unit):
+        entry = self.unitEntry(unit)
+        return entry.path if entry else ''
+
+    def fullPath(self, filename):
+        return os.path.join(self.path, filename)
+
+    def toDict(self):
+        return {'sourcefile': self.sourcefile,
+                'entries': [e._asdict() for e in self.items]}
+
+    @classmethod
+    def fromDict(cls, d):
+        entries = [NameEntry(e['ftype'], int(e['unit']), e['path'],
+                             e['status'], tuple(e['options']))
+                   for e in d['entries']]
+        nam = cls(None, entries)
+        nam.sourcefile = d.get('sourcefile')
+        nam.path = os.path.dirname(nam.sourcefile) if nam.sourcefile else ''
+        return nam
+
+    def toJSON(self):
+        return json.dumps(self.toDict(), indent=1)
+
+    @classmethod
+    def fromJSON(cls, text):
+        return cls.fromDict(json.loads(text))
+
+_nameFiles = {}
+
+def nameFile(sourcefile):
+#
+#   NameFile for a namefile, parsed once per run unless the
+#   file has been modified
+#
+  key = os.path.abspath(sourcefile)
+  mtime = os.path.getmtime(sourcefile)
+  cached = _nameFiles.get(key)
+  if cached is None or cached[0] != mtime:
+    with MFprofile.stage('namefile', os.path.getsize(sourcefile)):
+      cached = (mtime, NameFile(sourcefile))
+    _nameFiles[key] = cached
+  return cached[1]
@@ -0,0 +1,335 @@
+"""
+..module::MFucn
+  ::synopsis: Read Modflow Binary uses:
+  :           import MFbinary.MFucn as mfucn
+  :           MT3D concentration (UCN) files.  Species files
+  :           MT3D001.UCN, MT3D002.UCN ... and sorbed MT3D001S.UCN are
+  :           found from the namefiles, the BTN package NCOMP or the
+  :           model folder.  Records are indexed by transport step,
+  :           stress period and TOTIM from the UCN header and the
+  :           species are read concurrently, each with its own scale
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import os
+import re
+import glob
+import collections
+import concurrent.futures
+import numpy as np
+from sys import exit
+
+import MFgis.MFexportPool as MFexport
+import MFgis.MFbackends as MFbackends
+import MFmonitor.MFprofile as MFprofile
+import MFmonitor.MFcancel as MFcancel
+import MFmonitor.MFprogress as MFprogress
+import MFbinary.MFbinaryIndex as mfidx
+import MFbinary.MFheadFile as mfhds
+import MFbinary.MFaggregate as MFagg
+import MFbinary.MFnameFile as mfnam
+
+#   MT3DMS and MT3D-USGS species output: MT3Dnnn.UCN dissolved and
+#   MT3DnnnS.UCN sorbed (or immobile) phase
+UCNPATTERN = re.compile(r'^MT3D(\d{3})(S?)\.UCN$', re.IGNORECASE)
+#   Optional MT3D-USGS BTN keyword line ahead of the titles
+BTNKEYWORDS = ('MODFLOWSTYLEARRAYS', 'DRYCELL', 'LEGACY99STORAGE',
+               'FTLPRINT', 'NOWETDRYPRINT', 'NOSSMPRINT')
+#   Concentrations are written in g/L and exported as mg/L
+UCNSCALE = 1000.0
+
+Species = collections.namedtuple('Species', ['number', 'sorbed', 'path'])
+
+def ucnHdr():
+#
+#   UCN record header: transport step, time step, stress period
+#   and total time ahead of the HEAD style text and dimensions
+#
+  return np.dtype([("NTRANS","<i4"),("KSTP","<i4"),("KPER","<i4"),
+                   ("TOTIM","<f4"),("TEXT","S16"),("NC","<i4"),
+                   ("NR","<i4"),("K","<i4")])
+
+def speciesType(species):
+#
+#   Raster type of a species: CONC for species 1 as before,
+#   CONC2, CONC3 ... and SORB1, SORB2 ... for sorbed phases
+#
+  if species.sorbed:
+    return 'SORB{}'.format(species.number)
+  if species.number == 1:
+    return 'CONC'
+  return 'CONC{}'.format(species.number)
+
+def speciesLabel(species):
+  return '{}{}'.format(species.number, 'S' if species.sorbed else '')
+
+def ucnFilename(number, sorbed=False):
+  return 'MT3D{:03d}{}.UCN'.format(number, 'S' if sorbed else '')
+
+def btnComponents(btnfile):
+#
+#   NCOMP from BTN record A3 (NLAY NROW NCOL NPER NCOMP MCOMP)
+#   following the two title lines, or 0 when it cannot be read
+#
+  try:
+    with open(btnfile) as f:
+      lines = [f.readline() for n in range(4)]
+  except (IOError, OSError):
+    return 0
+  items = lines[0].split()
+  if items and items[0].upper() in BTNKEYWORDS:
+    lines = lines[1:]
+  record = lines[2]
+  items = record.split()
+  if len(items) < 5:
+    # Fixed format 6I10 with no separating blanks
+    items = [record[i:i+10] for i in range(0, 60, 10)]
+  try:
+    return int(items[4])
+  except (IndexError, ValueError):
+    return 0
+
+def _namefiles(path, namfile):
+#
+#   The model namefile and any other namefiles in the folder; the
+#   MT3D namefile holding the BTN entry is usually a separate file
+#
+  names = []
+  if namfile:
+    names.append(os.path.join(path, namfile))
+  for pattern in ('*.nam', '*.NAM', '*.mtnam', '*.MTNAM'):
+    names.extend(sorted(glob.glob(os.path.join(path, pattern))))
+  unique = collections.OrderedDict()
+  for name in names:
+    if os.path.isfile(name):
+      unique.setdefault(os.path.normcase(os.path.abspath(name)), name)
+  return list(unique.values())
+
+def _addSpecies(found, path, filename):
+  match = UCNPATTERN.match(os.path.basename(filename))
+  if not match or not os.path.exists(path):
+    return
+  key = (int(match.group(1)), bool(match.group(2)))
+  if key not in found:
+    found[key] = Species(key[0], key[1], path)
+
+def discoverSpecies(path, namfile=None):
+#
+#   Species UCN files of the model in species order, each as
+#   Species(number, sorbed, path).  UCN entries in the namefiles
+#   come first, then MT3D###.UCN names for the BTN NCOMP species,
+#   then any species files in the model folder
+#
+  found = {}
+  for name in _namefiles(path, namfile):
+    nam = mfnam.nameFile(name)
+    for entry in nam:
+      _addSpecies(found, nam.fullPath(entry.path), entry.path)
+    btn = nam.entry('BTN')
+    if btn is None:
+      continue
+    for number in range(1, btnComponents(nam.fullPath(btn.path)) + 1):
+      for sorbed in (False, True):
+        filename = ucnFilename(number, sorbed)
+        _addSpecies(found, nam.fullPath(filename), filename)
+  if os.path.isdir(path):
+    for filename in os.listdir(path):
+      _addSpecies(found, os.path.join(path, filename), filename)
+  return [found[key] for key in sorted(found)]
+
+def selectSpecies(species, speciesStr=None):
+#
+#   Species requested by -species: '1,3', '2-4', '1S' for a sorbed
+#   phase or 'all'.  By default every dissolved species is read
+#
+  if not speciesStr:
+    return [s for s in species if not s.sorbed]
+  if speciesStr.strip().lower() == 'all':
+    return list(species)
+  wanted = set()
+  for part in speciesStr.upper().split(','):
+    part = part.strip()
+    sorbed = part.endswith('S')
+    bounds = part.rstrip('S').split('-')
+    for number in range(int(bounds[0]), int(bounds[-1]) + 1):
+      wanted.add((number, sorbed))
+  return [s for s in species if (s.number, s.sorbed) in wanted]
+
+def speciesScales(scaleStr=None):
+#
+#   Scale factor for each species from -ucnscale:
+#     '1000'                  every species (default g/L to mg/L)
+#     '1000,2:1,1S:0.001'     default then per species overrides
+#   Returns a function of a Species
+#
+  default = UCNSCALE
+  scales = {}
+  for part in (scaleStr or '').split(','):
+    part = part.strip()
+    if not part:
+      continue
+    try:
+      if ':' in part:
+        label, value = part.split(':', 1)
+        label = label.strip().upper()
+        scales[(int(label.rstrip('S')), label.endswith('S'))] = float(value)
+      else:
+        default = float(part)
+    except ValueError:
+      print("Unable to read species scale '{}' from -ucnscale".format(part))
+      exit(98)
+  def scaleOf(species):
+    return scales.get((species.number, species.sorbed), default)
+  return scaleOf
+
+def ucnIndex(ucnfilename):
+#
+#   Record index of a UCN file (cached in a .mfidx sidecar)
+#
+  return mfidx.cachedHeadIndex(ucnfilename, ucnHdr(), 'UCN')
+
+def selectUCN(index, layerList, strPerList=None, transList=None):
+#
+#   Records of the requested layers, stress periods (KPER) and
+#   transport steps (NTRANS) in file order.  Empty or None lists
+#   select every period or step
+#
+  mask = np.isin(index['K'], layerList)
+  if strPerList:
+    mask &= np.isin(index['KPER'], strPerList)
+  if transList:
+    mask &= np.isin(index['NTRANS'], transList)
+  return index[mask]
+
+def ucnTimes(index):
+#
+#   Distinct (NTRANS, KSTP, KPER, TOTIM) output times in file order
+#
+  from numpy.lib import recfunctions
+  keys = recfunctions.repack_fields(index[['NTRANS','KSTP','KPER','TOTIM']])
+  unique, first = np.unique(keys, return_index=True)
+  return keys[np.sort(first)]
+
+def ucnRecordName(rasType, rec):
+#
+#   Raster name of a UCN record keeps the CONC naming: type,
+#   integer TOTIM (days) as 5 digits and the layer
+#       CONC_00365_1, CONC2_00365_1, SORB1_00365_1
+#
+  return '{}_{:05d}_{}'.format(rasType, int(rec['TOTIM']), rec['K'])
+
+class SpeciesRead(object):
+#
+#   Selected records of one species file and their export
+#
+    def __init__(self, species, index, selected, scale):
+        self.species = species
+        self.index = index
+        self.selected = selected
+        self.scale = scale
+        self.rasType = speciesType(species)
+        self.done = 0
+        self.agg = None
+
+    def read(self, optArgs, discDict, shape, token, workers):
+        pool = MFexport.ExportPool(optArgs, discDict, workers)
+        if optArgs.get('aggregate'):
+            self.agg = MFagg.StreamAggregator(optArgs, discDict)
+        try:
+            for rec, dataRead in mfhds.headRecords(self.species.path,
+                                                   self.selected, shape):
+                if token.cancelled: break
+                if not optArgs['quiet']:
+                    print('Species', speciesLabel(self.species),
+                          'Trans step', rec['NTRANS'],
+                          'Stress Period=', rec['KPER'],
+                          'Tot Time', rec['TOTIM'], 'lay=', rec['K'])
+                with MFprofile.stage('transform', dataRead.nbytes):
+                    data = mfhds.scaled(dataRead, self.scale)
+                if self.agg:
+                    self.agg.add(self.rasType, rec['K'], data,
+                                 rec['TOTIM'], rec['KPER'])
+                if not optArgs.get('aggOnly'):
+                    pool.submit(data, os.path.join(optArgs['geodb'],
+                                ucnRecordName(self.rasType, rec)))
+                self.done += 1
+        finally:
+            pool.close()
+        return self
+
+def readUCN(species, optArgs, discDict):
+#
+#   Export the selected records of each species UCN file, reading
+#   species concurrently on threads when the raster backend is
+#   thread safe.  Each species has its own -ucnscale factor and
+#   -agg aggregates; -lay and -strPer select layers and stress
+#   periods.  The main thread reports progress and pumps the
+#   Terminate button while the species are read
+#
+  import MFbinary.MFbinaryData as mf
+  token = MFcancel.cancelToken(optArgs)
+  if optArgs['gui']:
+      mf.makeTerminateBtn(token)
+  nlays,nrows,ncols,npers,cellsz1,cellsz2 = mf.modelDisc()
+  shape = (nrows, ncols)
+  if optArgs['layerStr']: layerList = mf.parseRange(optArgs['layerStr'])
+  else: layerList = mf.parseRange('1-'+str(nlays))
+  if optArgs['strStr']: strPerList = mf.parseRange(optArgs['strStr'])
+  else: strPerList = None
+  scaleOf = speciesScales(optArgs.get('ucnScale'))
+
+  reads = []
+  for sp in species:
+    index = ucnIndex(sp.path)
+    if index.size < 1:
+      print("No complete records found in {}".format(sp.path))
+      continue
+    if (index['NC'] != ncols).any() or (index['NR'] != nrows).any():
+      print("{} records are not {} rows x {} columns; skipped"\
+            .format(mf.noPath(sp.path), nrows, ncols))
+      continue
+    if layerList != [0] or strPerList != [0]:
+      selected = selectUCN(index, layerList, strPerList)
+    else:
+      selected = index[:0]
+    read = SpeciesRead(sp, index, selected, scaleOf(sp))
+    if not optArgs['quiet']:
+      print("{} of {} records selected from {} ({} x {:g})"\
+            .format(selected.size, index.size, mf.noPath(sp.path),
+                    read.rasType, read.scale))
+    reads.append(read)
+  if not reads:
+    mf.closeTerminateBtn(token)
+    exit(99)
+
+  total = sum(r.selected.size for r in reads)
+  progress = MFprogress.start(optArgs, 'UCN', total,
+                              np.full(total, nrows*ncols*4), token)
+  threadSafe = MFbackends.backend(optArgs, discDict).threadSafe
+  threads = min(len(reads), os.cpu_count() or 1) if threadSafe else 1
+  # Export pool workers are shared out between the species threads
+  workers = MFexport.poolWorkers(optArgs)
+  if workers: workers = max(1, workers // threads)
+  with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+    futures = [executor.submit(r.read, optArgs, discDict, shape, token,
+                               workers) for r in reads]
+    pending = set(futures)
+    while pending:
+      finished, pending = concurrent.futures.wait(pending,
+                              timeout=max(token.pollSeconds, 0.05))
+      if any(f.exception() for f in finished):
+        # Stop the other species when one fails
+        token.cancel('export failed')
+      token.poll(sum(r.done for r in reads), total)
+    for future in futures:
+      # Raise the first failure from a species thread
+      future.result()
+  MFprogress.finish(progress, token,
+                    None if token.cancelled else total)
+  if not token.cancelled:
+    for read in reads:
+      if read.agg: read.agg.finish()
+  mf.closeTerminateBtn(token)
+  mf.stopCancelled(token)
+  return reads
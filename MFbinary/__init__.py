@@ -0,0 +1,5 @@
+from MFbinary.MFheadFile import HeadFile
+from MFbinary.MFnameFile import NameFile
+from MFbinary.MFdisFile import DisFile
+from MFbinary.MFbudget import BudgetFile
+from MFbinary.MFucn import Species
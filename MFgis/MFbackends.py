@@ -0,0 +1,431 @@
+"""
+..module::MFbackends
+  ::synopsis: Read Modflow Binary uses:
+  :           import MFgis.MFbackends as MFbackends
+  :           Registry of raster output backends sharing one
+  :           interface: writeRaster, clip, writePoints.
+  :             arcpy  ArcGIS geodatabase rasters and feature classes
+  :             gdal   GeoTIFF rasters and shapefiles
+  :             npy    NumPy .npy arrays (no GIS libraries)
+  :             null   discards output to time the read path alone
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import os
+import json
+from abc import ABC, abstractmethod
+from sys import exit
+import numpy as np
+import MFgis.MFgis as MFgis
+from MFgis.MFlazy import arcpy, gdal
+
+BACKENDS = {}
+
+def register(name):
+#
+#   Class decorator adding a backend to the registry by name
+#
+  def add(cls):
+    cls.name = name
+    BACKENDS[name] = cls
+    return cls
+  return add
+
+def backendName(optArgs):
+#
+#   -backend when given, otherwise arcpy unless -noArcGIS
+#
+  name = optArgs.get('backend')
+  if name:
+    return name
+  return 'gdal' if optArgs['noArc'] else 'arcpy'
+
+class RasterBackend(ABC):
+#
+#   Interface of an output backend.  Raster names are given without
+#   extension as by the binary readers; 'clp' prefixed names are the
+#   clipped copies.
+#
+#     writeRaster(npArray, rasName, geotransform=None)
+#     writeClipped(npArray, rasName, geotransform=None)
+#     clip(rasName)
+#     writePoints(dirRas, magRas, outFeature, arrName1, arrName2,
+#                 csizeMultiplier)
+#     createStack(stack, name, bandCount)   backends with stacks
+#
+#   geotransform (GDAL ordering) defaults to the model grid.
+#   writeClipped writes 'clp'+rasName straight from the array window
+#   inside the clip extent, without reading back a written raster;
+#   clip(rasName) clips a raster already written.  Clipped rasters
+#   are saved in -clpgdb by arcpy and in -ras by the other backends
+#
+    name = None
+    threadSafe = True
+    stacks = True
+
+    def __init__(self, optArgs, discDict):
+        self.optArgs = optArgs
+        self.discDict = discDict
+        self._extent = None
+        self._noOverlap = False
+
+    def modelTransform(self):
+        return MFgis.modelGeotransform(self.optArgs['model'], self.discDict)
+
+    def boxExtent(self, clipBox):
+#
+#       (xmin, ymin, xmax, ymax) of the clip shapefile
+#
+        from MFgis.MFlazy import ogr
+        ds = ogr.Open(clipBox)
+        if ds is None:
+            print("Unable to open clip box {}".format(clipBox))
+            exit(59)
+        xmin, xmax, ymin, ymax = ds.GetLayer(0).GetExtent()
+        return xmin, ymin, xmax, ymax
+
+    def clipExtent(self):
+#
+#       Clip extent of the -clpbox shapefile or the model default,
+#       None when neither is defined
+#
+        if self._extent is None:
+            if self.optArgs['clipBox'] != 'Default.shp':
+                self._extent = self.boxExtent(self.optArgs['clipBox'])
+            else:
+                self._extent = MFgis.modelClips(self.optArgs['model'])
+        if self._extent == (0,0,0,0):
+            return None
+        return self._extent
+
+    def writeClipped(self, npArray, rasName, geotransform=None):
+        extent = self.clipExtent()
+        if extent is None:
+            return
+        geotransform = geotransform or self.modelTransform()
+        nrows, ncols = np.shape(npArray)
+        row0, row1, col0, col1 = MFgis.clipWindow(geotransform, nrows, ncols,
+                                                  extent)
+        if row0 == row1 or col0 == col1:
+            # No cell inside the clip extent: nothing to write
+            if not self._noOverlap:
+                print("Clip extent {} does not overlap the model grid; "
+                      "no clipped rasters are written".format(extent))
+                self._noOverlap = True
+            return
+        # Clipped rasters go to the backend's clip workspace, so only
+        # the name is passed on (IN_MEMORY rasters stay in memory)
+        path, ras = os.path.split(rasName)
+        clpName = 'clp' + ras
+        if path == 'IN_MEMORY':
+            clpName = os.path.join(path, clpName)
+        self.writeRaster(npArray[row0:row1, col0:col1], clpName,
+                         MFgis.windowTransform(geotransform, row0, col0))
+
+    @abstractmethod
+    def writeRaster(self, npArray, rasName, geotransform=None):
+        pass
+
+    @abstractmethod
+    def clip(self, rasName):
+        pass
+
+    @abstractmethod
+    def writePoints(self, dirRas, magRas, outFeature,
+                    arrName1="DIR", arrName2="MAG", csizeMultiplier=1):
+        pass
+
+    @abstractmethod
+    def createStack(self, stack, name, bandCount):
+#
+#       Open stack file name of bandCount bands for an MFstack
+#       RasterStack; returns an object with write(band, array, meta)
+#       and close()
+#
+        pass
+
+@register('arcpy')
+class ArcpyBackend(RasterBackend):
+#
+#   ArcGIS rasters in the geodatabase (-gdb) and clipped rasters in
+#   -clpgdb.  arcpy is not thread safe
+#
+    threadSafe = False
+    stacks = False
+
+    def boxExtent(self, clipBox):
+        ExtObj = arcpy.Describe(clipBox).extent
+        return ExtObj.XMin, ExtObj.YMin, ExtObj.XMax, ExtObj.YMax
+
+    def writeRaster(self, npArray, rasName, geotransform=None):
+        optArgs = self.optArgs
+        if geotransform is None:
+            resx = float(self.discDict['cellsize1'])
+            resy = float(self.discDict['cellsize2'])
+            llorigin = MFgis.modelOrigins(optArgs['model'])
+        else:
+            resx, resy = geotransform[1], -geotransform[5]
+            llorigin = (geotransform[0],
+                        geotransform[3] + np.shape(npArray)[0]*geotransform[5])
+        SR = arcpy.SpatialReference(MFgis.getModel_SR(optArgs['model']))
+        arcpy.env.outputCoordinateSystem =SR
+        arcpy.env.cellSize = resx
+        ras = arcpy.NumPyArrayToRaster(npArray,arcpy.Point(*llorigin),
+                                       resx,resy,999)
+        if 'IN_MEMORY' in rasName:
+           print ("In_Memory Raster: {}".format(rasName))
+           rasFilename = rasName
+        elif os.path.basename(rasName).startswith('clp'):
+           rasFilename = os.path.join(optArgs['clpgdb'],
+                                      os.path.basename(rasName))
+           if not optArgs['quiet']:
+             print ("{} \t:Clipped Raster".format(rasName))
+        else:
+           rasFilename = os.path.join(optArgs['geodb'], rasName)
+           if not optArgs['quiet']:
+             print ("{} \t\t:Raster".format(MFgis.noPath(rasName)))
+        ras.save(rasFilename)
+        arcpy.DefineProjection_management(ras, SR)
+
+    def clip(self, rasName):
+        optArgs = self.optArgs
+        path, ras = os.path.split(rasName)
+        extent = self.clipExtent()
+        if extent is None:
+          return
+        clip = "%d %d %d %d" % extent
+        clpRaster = "clp" +ras
+        ws1 = optArgs['geodb']
+        ws2 = optArgs['clpgdb']
+        if path == 'IN_MEMORY':
+          arcpy.env.workspace = r'IN_MEMORY'
+        else:
+          arcpy.env.workspace = ws2
+        InRasFullame = os.path.join(ws1,ras)
+        arcpy.gp.ExtractByRectangle_sa(InRasFullame,clip,clpRaster,"INSIDE")
+        if not optArgs['quiet']:
+          print ("{} \t:Clipped Raster".format(clpRaster))
+        arcpy.env.workspace = ws1
+
+    def writePoints(self, dirRas, magRas, outFeature,
+                    arrName1="DIR", arrName2="MAG", csizeMultiplier=1):
+        optArgs = self.optArgs
+        if 'clp' in dirRas:
+          fgdb = optArgs['clpgdb']
+        else:
+          fgdb = optArgs['geodb']
+        arcpy.env.workspace = fgdb
+        arcpy.RasterToPoint_conversion(in_raster=dirRas,
+                                       out_point_features=outFeature,
+                                       raster_field=arrName1)
+        rasFldMap = magRas + ' ' + arrName2
+        arcpy.gp.ExtractMultiValuesToPoints_sa(outFeature,rasFldMap,"NONE")
+        if csizeMultiplier != 1:
+            express = "!Magnitude! * "+ str(csizeMultiplier)\
+                                      + " * "+str(csizeMultiplier)
+            arcpy.CalculateField_management(in_table=outFeature,field=arrName2,
+                                            expression=express,
+                                            expression_type="PYTHON_9.3",
+                                            code_block="#")
+        arcpy.env.workspace = optArgs['geodb']
+
+    def createStack(self, stack, name, bandCount):
+        print("-stack is not available with the arcpy backend: "
+              "use -backend gdal or npy")
+        exit(56)
+
+@register('gdal')
+class GdalBackend(RasterBackend):
+#
+#   GeoTIFF rasters and shapefiles in -ras, written with the cached
+#   per model RasterWriter
+#
+    def tifName(self, rasName):
+        return os.path.join(self.optArgs['rasFolder'],
+                            os.path.basename(rasName)+'.tif')
+
+    def writeRaster(self, npArray, rasName, geotransform=None):
+        optArgs = self.optArgs
+        if optArgs['rasFolder'] != None:
+             # Full and clipped GeoTIFFs are both written to -ras
+             rasFile = os.path.basename(rasName)
+             MFgis.claimOutputPath(optArgs['rasFolder'])
+             if optArgs['quiet']: pass
+             elif rasFile.startswith('clp'): print ("{} \t:Clipped Raster".format(rasFile))
+             else: print ("{} \t\t:Raster".format(rasFile))
+             MFgis.rasterWriter(optArgs, self.discDict).write(
+                                   self.tifName(rasName), npArray, geotransform)
+        else:
+            print("rasFolder' option has been set to 'None' somehow!" )
+            exit(55)
+
+    def clip(self, rasName):
+#
+#       Clip a GeoTIFF already written: read it and write the window
+#
+        ras = os.path.basename(rasName)
+        ds = gdal.Open(self.tifName(ras))
+        if ds is None:
+            print("Failed to open ",self.tifName(ras))
+            return
+        array = ds.GetRasterBand(1).ReadAsArray()
+        geotransform = ds.GetGeoTransform()
+        ds = None
+        self.writeClipped(array, ras, geotransform)
+
+    def writePoints(self, dirRas, magRas, outFeature,
+                    arrName1="DIR", arrName2="MAG", csizeMultiplier=1):
+        espg = MFgis.getModel_SR(self.optArgs['model'])
+        dirRas = dirRas+'.tif'
+        magRas = magRas+'.tif'
+        outFeature = outFeature + '.shp'
+        array1 = MFgis.rasFile2array(dirRas)
+        array2 = MFgis.rasFile2array(magRas)
+        MFgis.Two_array2shp(array1,array2,outFeature,dirRas,"DIR","MAG",
+                            csizeMultiplier,espg)
+
+    def createStack(self, stack, name, bandCount):
+        return stack.createFile(name, bandCount)
+
+@register('npy')
+class NumpyBackend(RasterBackend):
+#
+#   Plain NumPy arrays: <rasFolder>/<name>.npy with a world file
+#   <name>.npw (x size, 0, 0, -y size, x and y of the upper left
+#   cell center) to georeference it.  npyGrid.json in the folder
+#   records the model EPSG, written once per folder.  Flow arrow
+#   points are saved as <feature>.npz holding X, Y and the two value
+#   fields
+#
+    def __init__(self, optArgs, discDict):
+        RasterBackend.__init__(self, optArgs, discDict)
+        self._gridFolders = set()
+
+    @property
+    def outDir(self):
+        outDir = MFgis.claimOutputPath(self.optArgs['rasFolder'])
+        if outDir not in self._gridFolders:
+            with open(os.path.join(outDir, 'npyGrid.json'), 'w') as f:
+                json.dump({'epsg': MFgis.getModel_SR(self.optArgs['model'])},
+                          f)
+            self._gridFolders.add(outDir)
+        return outDir
+
+    def npyName(self, rasName):
+        return os.path.join(self.outDir, os.path.basename(rasName)+'.npy')
+
+    def writeWorld(self, rasName, gt):
+        with open(self.npyName(rasName)[:-4]+'.npw', 'w') as f:
+            f.write('\n'.join(repr(float(v)) for v in
+                    (gt[1], gt[4], gt[2], gt[5],
+                     gt[0]+gt[1]/2.0, gt[3]+gt[5]/2.0)) + '\n')
+
+    def writeRaster(self, npArray, rasName, geotransform=None):
+        gt = geotransform or self.modelTransform()
+        np.save(self.npyName(rasName), np.asarray(npArray, np.float32))
+        self.writeWorld(rasName, gt)
+        if self.optArgs['quiet']:
+            pass
+        elif os.path.basename(rasName).startswith('clp'):
+            print ("{} \t:Clipped Array".format(os.path.basename(rasName)))
+        else:
+            print ("{} \t\t:Array".format(os.path.basename(rasName)))
+
+    def transformOf(self, rasName):
+        with open(self.npyName(rasName)[:-4]+'.npw') as f:
+            a, d, b, e, c, f0 = [float(v) for v in f.read().split()]
+        return (c - a/2.0, a, b, f0 - e/2.0, d, e)
+
+    def clip(self, rasName):
+        ras = os.path.basename(rasName)
+        self.writeClipped(np.load(self.npyName(ras), mmap_mode='r'), ras,
+                          self.transformOf(ras))
+
+    def writePoints(self, dirRas, magRas, outFeature,
+                    arrName1="DIR", arrName2="MAG", csizeMultiplier=1):
+        array1 = np.load(self.npyName(dirRas))
+        array2 = np.load(self.npyName(magRas))
+        X, Y = MFgis.pixelCenters(self.transformOf(dirRas), *array1.shape)
+        mask = MFgis.validCells(array1) & MFgis.validCells(array2)
+        fields = {arrName1: array1[mask],
+                  arrName2: array2[mask]*(csizeMultiplier**2)}
+        np.savez(os.path.join(self.outDir,
+                              os.path.basename(outFeature)+'.npz'),
+                 X=X[mask], Y=Y[mask], **fields)
+
+    def createStack(self, stack, name, bandCount):
+#
+#       <name>.npy of (band, row, col) with <name>.npw and the band
+#       metadata in <name>.json
+#
+        self.writeWorld(name, self.modelTransform())
+        return stack.createNpy(name, bandCount)
+
+@register('null')
+class NullBackend(RasterBackend):
+#
+#   Discards every output, counting rasters and cells, so the cost
+#   of reading binary files can be measured without writers
+#
+    def __init__(self, optArgs, discDict):
+        RasterBackend.__init__(self, optArgs, discDict)
+        self.rasters = 0
+        self.cells = 0
+
+    def writeRaster(self, npArray, rasName, geotransform=None):
+        self.rasters += 1
+        self.cells += np.size(npArray)
+
+    def clipExtent(self):
+        # Window the array without reading a clip shapefile; models
+        # without default extents write no clipped copies
+        extent = MFgis.modelClips(self.optArgs['model'])
+        if extent == (0,0,0,0):
+            return None
+        return extent
+
+    def clip(self, rasName):
+        pass
+
+    def writePoints(self, dirRas, magRas, outFeature,
+                    arrName1="DIR", arrName2="MAG", csizeMultiplier=1):
+        pass
+
+    def createStack(self, stack, name, bandCount):
+        return stack.createNull(self)
+
+_backends = {}
+
+def backendKey(name, optArgs, discDict):
+#
+#   Backends are reused while the model grid and clip box are unchanged
+#
+  return (name, optArgs['model'], optArgs['clipBox'],
+          discDict['cellsize1'], discDict['cellsize2'],
+          discDict['nrows'], discDict['ncols'])
+
+def backend(optArgs, discDict=None):
+#
+#   Backend selected by optArgs, created once per backend name and
+#   model grid.  Without discDict the last backend of that name is
+#   used.  Cached backends see the latest optArgs and discDict
+#
+  name = backendName(optArgs)
+  if name not in BACKENDS:
+    print("Unknown raster backend '{}': choose from {}"\
+          .format(name, sorted(BACKENDS)))
+    exit(58)
+  key, current = _backends.get(name, (None, None))
+  if discDict is not None:
+    newKey = backendKey(name, optArgs, discDict)
+    if newKey != key:
+      key, current = newKey, None
+  if current is None:
+    current = BACKENDS[name](optArgs, discDict)
+    _backends[name] = (key, current)
+  else:
+    current.optArgs = optArgs
+    if discDict is not None:
+      current.discDict = discDict
+  return current
@@ -0,0 +1,105 @@
+"""
+..module::MFexportPool
+  ::synopsis: Read Modflow Binary uses:
+  :           import MFgis.MFexportPool as MFexport
+  :           Pipelined raster export.  Binary readers submit
+  :           (array, rastername) tasks to a bounded queue served by
+  :           a pool of threads or processes running numPy2Ras and
+  :           clipArray, so reading continues while rasters are written
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import collections
+import concurrent.futures
+import numpy as np
+import MFgis.MFgis as MFgis
+import MFgis.MFbackends as MFbackends
+
+def exportRaster(npArray, rastername, optArgs, discDict, clip=True):
+#
+#   One export task: write the raster and its clipped copy
+#   using the existing naming scheme.  The clipped copy is written
+#   from the array window; -cliponly skips the full raster unless
+#   there is no clip extent to write.  Sparse budget layers are
+#   densified here, as the raster is written
+#
+  npArray = np.asarray(npArray)
+  clipOnly = clip and optArgs.get('clipOnly') and \
+             MFbackends.backend(optArgs, discDict).clipExtent() is not None
+  if not clipOnly:
+    MFgis.numPy2Ras(npArray, rastername, optArgs, discDict)
+  if clip:
+    MFgis.clipArray(npArray, rastername, optArgs, discDict)
+  return rastername
+
+def poolWorkers(optArgs):
+  workers = optArgs.get('exportPool')
+  return int(workers) if workers else 0
+
+class ExportPool(object):
+#
+#   Bounded pool of raster export workers.
+#
+#     pool = ExportPool(optArgs, discDict)
+#     pool.submit(array, rastername)
+#     pool.close()
+#
+#   optArgs['exportPool'] sets the number of workers; 0 (default)
+#   exports synchronously in the read loop.  optArgs['poolType']
+#   selects 'thread' (GDAL releases the GIL while encoding) or
+#   'process'.  ArcGIS exports are always synchronous since arcpy
+#   is not thread safe (RasterBackend.threadSafe).  At most
+#   maxPending tasks are queued; a full queue blocks the reader
+#   until the oldest export finishes, keeping memory bounded.
+#
+    def __init__(self, optArgs, discDict, workers=None, maxPending=None):
+        self.optArgs = optArgs
+        self.discDict = discDict
+        self.workers = poolWorkers(optArgs) if workers is None else workers
+        if not MFbackends.backend(optArgs, discDict).threadSafe:
+            self.workers = 0
+        self.maxPending = maxPending or max(2*self.workers, 1)
+        self.pending = collections.deque()
+        self.executor = None
+        if self.workers > 0:
+            if optArgs.get('poolType') == 'process':
+                self.executor = concurrent.futures.ProcessPoolExecutor(
+                                                      self.workers)
+            else:
+                self.executor = concurrent.futures.ThreadPoolExecutor(
+                                                      self.workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _waitOldest(self):
+        self.pending.popleft().result()
+
+    def submit(self, npArray, rastername, clip=True):
+        if self.executor is None:
+            return exportRaster(npArray, rastername, self.optArgs,
+                                self.discDict, clip)
+        while len(self.pending) >= self.maxPending:
+            self._waitOldest()
+        self.pending.append(self.executor.submit(exportRaster, npArray,
+                                rastername, self.optArgs,
+                                self.discDict, clip))
+
+    def drain(self):
+#
+#       Wait for every queued export, raising the first failure
+#
+        while self.pending:
+            self._waitOldest()
+
+    def close(self):
+        try:
+            self.drain()
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True)
+                self.executor = None
@@ -8,12 +8,10 @@
 
 """
 
-try:
-    import arcpy
-except ImportError:
-    from osgeo import gdal, osr, ogr
-    print('ESRI arcpy library not imported')
 import os
+#   arcpy and GDAL are imported when first used
+from MFgis.MFlazy import arcpy, gdal, osr, ogr
+import MFmonitor.MFprofile as MFprofile
 if 'GDAL_DATA' not in os.environ:
     os.environ['GDAL_DATA'] = r'C:/ProgramData/Anaconda3/Library/share/gdal'    
 
@@ -37,11 +35,6 @@ def getSpatialA():
   return
 
 def setWorkspc(geodb):
-  try:
-        import arcpy
-
-  except ImportError:
-        print('ESRI arcpy library not imported')
 #
 #   Set base paths for ESRI workspace. 
 #
@@ -156,6 +149,50 @@ def modelOrigins(model):
     'WCFM'  :( 20665.000, -44448.000)}
     return(modelOrigs[model])
  
+def modelGeotransform(model, discDict):
+#
+#  GDAL ordered geotransform of the model grid: upper left corner
+#  from the lower left origin, cell sizes and number of rows
+#
+    resx = float(discDict['cellsize1'])
+    resy = float(discDict['cellsize2'])
+    nrows = int(discDict['nrows'])
+    llorigin = modelOrigins(model)
+    return (llorigin[0], resx, 0, llorigin[1]+(nrows*resy), 0, -resy)
+
+def blockGeotransform(model, discDict, factor):
+#
+#  Geotransform of the model grid aggregated into factor x factor
+#  blocks sharing the model lower left origin
+#
+    resx = float(discDict['cellsize1'])*factor
+    resy = float(discDict['cellsize2'])*factor
+    nrows = -(-int(discDict['nrows']) // factor)
+    llorigin = modelOrigins(model)
+    return (llorigin[0], resx, 0, llorigin[1]+(nrows*resy), 0, -resy)
+
+def clipWindow(geotransform, nrows, ncols, extent):
+#
+#  (row0, row1, col0, col1) array window of the cells intersecting
+#  extent (xmin, ymin, xmax, ymax), limited to the grid
+#
+    import math
+    originX, resx, _, originY, _, resy = geotransform
+    resy = abs(resy)
+    xmin, ymin, xmax, ymax = extent
+    col0 = max(int(math.floor((xmin - originX)/resx)), 0)
+    col1 = min(int(math.ceil((xmax - originX)/resx)), ncols)
+    row0 = max(int(math.floor((originY - ymax)/resy)), 0)
+    row1 = min(int(math.ceil((originY - ymin)/resy)), nrows)
+    return row0, max(row1, row0), col0, max(col1, col0)
+
+def windowTransform(geotransform, row0, col0):
+#
+#  Geotransform of an array window starting at row0, col0
+#
+    originX, resx, rotx, originY, roty, resy = geotransform
+    return (originX + col0*resx, resx, rotx, originY + row0*resy, roty, resy)
+
 def CreateGeoTiff(NewFileName, Array, xsize, ysize,xcoord, ycoord,SR):
 #  No ArcPy  -- uses just GDAL
 #  Create a georeferenced raster (TIF) from an array of values
@@ -176,6 +213,84 @@ def CreateGeoTiff(NewFileName, Array, xsize, ysize,xcoord, ycoord,SR):
     DataSet.FlushCache()
     return NewFileName
 
+class RasterWriter(object):
+#  No ArcPy  -- uses just GDAL
+#  GeoTIFF writer built once per model.  The spatial reference WKT,
+#  GTiff driver, geotransform and creation options are prepared in
+#  the constructor so each write only creates the dataset and writes
+#  the band.
+#      model      model name selecting EPSG and lower left origin
+#      discDict   discretization providing cell sizes and nrows
+#      tiled, blockSize, compress, predictor, options
+#                 GTiff creation options (options is a list of
+#                 'KEY=VALUE' strings appended as given)
+#
+    def __init__(self, model, discDict, tiled=False, blockSize=256,
+                 compress=None, predictor=None, options=None):
+        self.espg = getModel_SR(model)
+        srs = osr.SpatialReference()
+        srs.ImportFromEPSG(self.espg)
+        self.wkt = srs.ExportToWkt()
+        self.driver = gdal.GetDriverByName('GTiff')
+        self.geotransform = modelGeotransform(model, discDict)
+        self.options = []
+        if tiled:
+            self.options += ['TILED=YES', 'BLOCKXSIZE={}'.format(blockSize),
+                             'BLOCKYSIZE={}'.format(blockSize)]
+        if compress:
+            self.options.append('COMPRESS={}'.format(compress))
+        if predictor:
+            self.options.append('PREDICTOR={}'.format(predictor))
+        if options:
+            self.options += list(options)
+
+    def write(self, NewFileName, Array, geotransform=None):
+        (nrows,ncols) = Array.shape
+        DataSet = self.driver.Create(NewFileName, ncols, nrows, 1,
+                                     gdal.GDT_Float32, self.options)
+        DataSet.SetGeoTransform(geotransform or self.geotransform)
+        DataSet.SetProjection(self.wkt)
+        DataSet.GetRasterBand(1).WriteArray(Array)
+        DataSet.FlushCache()
+        DataSet = None
+        return NewFileName
+
+def tifOptions(optArgs):
+#
+#  GTiff creation options from the -tifopt argument such as
+#  'COMPRESS=DEFLATE,PREDICTOR=3,TILED=YES'
+#
+  tifopt = optArgs.get('tifOpts')
+  if not tifopt:
+      return []
+  return [opt.strip() for opt in tifopt.split(',') if opt.strip()]
+
+_rasterWriters = {}
+_outputPaths = set()
+
+def claimOutputPath(outputPath):
+#
+#  Create the output folder the first time a raster is written to it
+#
+  if outputPath not in _outputPaths:
+      if not os.path.exists(outputPath): os.makedirs(outputPath)
+      _outputPaths.add(outputPath)
+  return outputPath
+
+def rasterWriter(optArgs, discDict):
+#
+#  RasterWriter for the model being processed, created on first use
+#  and reused for every raster with the same grid and options
+#
+  key = (optArgs['model'], discDict['cellsize1'], discDict['cellsize2'],
+         discDict['nrows'], optArgs.get('tifOpts'))
+  writer = _rasterWriters.get(key)
+  if writer is None:
+      writer = RasterWriter(optArgs['model'], discDict,
+                            options=tifOptions(optArgs))
+      _rasterWriters[key] = writer
+  return writer
+
 def pixelOffset2coord(raster, xOffset,yOffset):
 #  No ArcPy  -- uses just GDAL
 # Calculates the coordinate of a pixel center 
@@ -207,102 +322,121 @@ def raster2array(raster):
     array = band.ReadAsArray()
     return array
 
-def array2shp(array,outFeature,rasterFile,arrName="VALUE",espg=2881):
+def pixelCenters(geotransform, nrows, ncols):
+#  No ArcPy  -- uses just GDAL geotransform ordering
+#  Return (X, Y) arrays of every pixel center coordinate
+#  computed once from the geotransform with a NumPy meshgrid
+#
+    import numpy as np
+    originX, pixelWidth, _, originY, _, pixelHeight = geotransform
+    xcoords = originX + pixelWidth*(np.arange(ncols) + 0.5)
+    ycoords = originY + pixelHeight*(np.arange(nrows) + 0.5)
+    return np.meshgrid(xcoords, ycoords)
+
+def validCells(array, noData=None):
+#
+#  Boolean mask of cells holding data: finite and not noData
+#
+    import numpy as np
+    mask = np.isfinite(array)
+    if noData is not None:
+        mask &= (array != noData)
+    return mask
+
+POINTDRIVERS = {'.shp':'ESRI Shapefile', '.gpkg':'GPKG', '.fgb':'FlatGeobuf'}
+
+def writePoints(outFeature, X, Y, fields, espg=2881, batch=50000):
 #  No ArcPy  -- uses just GDAL
-#  Create and save an ESRI point shapefile at pixel center coordinates
-#  with values from array of the same dimensions as the raster
-#    
-    raster = gdal.Open(rasterFile)
+#  Create a point feature dataset from coordinate arrays.
+#      fields: list of (name, ogr field type, values) with values
+#              aligned to X and Y
+#  The driver follows the extension of outFeature (.shp, .gpkg, .fgb).
+#  Features are created inside transactions of batch features reusing
+#  one feature and geometry object, with values converted to Python
+#  scalars up front rather than per cell.
+#
     srs = osr.SpatialReference()
     srs.ImportFromEPSG(espg)
-    
-    shpDriver = ogr.GetDriverByName("ESRI Shapefile")
+    ext = os.path.splitext(outFeature)[1].lower()
+    driver = ogr.GetDriverByName(POINTDRIVERS.get(ext, 'ESRI Shapefile'))
     if os.path.exists(outFeature):
-        shpDriver.DeleteDataSource(outFeature)
-    outDataSource = shpDriver.CreateDataSource(outFeature)
-    outLayer = outDataSource.CreateLayer(outFeature,srs,geom_type=ogr.wkbPoint)
+        driver.DeleteDataSource(outFeature)
+    outDataSource = driver.CreateDataSource(outFeature)
+    layerName = os.path.splitext(os.path.basename(outFeature))[0]
+    outLayer = outDataSource.CreateLayer(layerName,srs,geom_type=ogr.wkbPoint)
+    for name, fieldType, values in fields:
+        outLayer.CreateField(ogr.FieldDefn(name, fieldType))
     featureDefn = outLayer.GetLayerDefn()
-    outLayer.CreateField(ogr.FieldDefn(arrName, ogr.OFTInteger))
 
+    xs = X.tolist()
+    ys = Y.tolist()
+    columns = []
+    for name, fieldType, values in fields:
+        if fieldType == ogr.OFTInteger:
+            columns.append(values.astype('i8').tolist())
+        else:
+            columns.append(values.astype('f8').tolist())
+    fieldIdx = list(range(len(fields)))
+
+    feature = ogr.Feature(featureDefn)
     point = ogr.Geometry(ogr.wkbPoint)
-    for ridx, row in enumerate(array):
-        for cidx, value in enumerate(row):
-            Xcoord, Ycoord = pixelOffset2coord(raster,cidx,ridx)
-            point.AddPoint(Xcoord, Ycoord)
-            outFeature = ogr.Feature(featureDefn)
-            outFeature.SetGeometry(point)
-            outFeature.SetField(arrName, int(value))
-            outLayer.CreateFeature(outFeature)
-            outFeature.Destroy()
-    outDataSource = None        
+    for start in range(0, len(xs), batch):
+        outLayer.StartTransaction()
+        for n in range(start, min(start+batch, len(xs))):
+            point.AddPoint_2D(xs[n], ys[n])
+            feature.SetGeometry(point)
+            for i in fieldIdx:
+                feature.SetField(i, columns[i][n])
+            feature.SetFID(-1)
+            outLayer.CreateFeature(feature)
+        outLayer.CommitTransaction()
+    feature = None
+    outDataSource = None
+
+def array2shp(array,outFeature,rasterFile,arrName="VALUE",espg=2881):
+#  No ArcPy  -- uses just GDAL
+#  Create and save an ESRI point shapefile at pixel center coordinates
+#  with values from array of the same dimensions as the raster
+#  Cells without data are not written
+#    
+    raster = gdal.Open(rasterFile)
+    noData = raster.GetRasterBand(1).GetNoDataValue()
+    X, Y = pixelCenters(raster.GetGeoTransform(), *array.shape)
+    raster = None
+    mask = validCells(array, noData)
+    writePoints(outFeature, X[mask], Y[mask],
+                [(arrName, ogr.OFTInteger, array[mask])], espg)
     
 def Two_array2shp(array1,array2,outFeature,rasterFile,
                   arrName1="DIR",arrName2="MAG",csizeMultiplier=1,espg=2881):
 #  No ArcPy  -- uses just GDAL
 #  Create and save an ESRI point shapefile at pixel center coordinates
 #  with values from 2 arrays of the same dimensions as the raster
+#  Cells without data in either array are not written
 #      
     raster = gdal.Open(rasterFile)
-    srs = osr.SpatialReference()
-    srs.ImportFromEPSG(espg)
-    shpDriver = ogr.GetDriverByName("ESRI Shapefile")
-    if os.path.exists(outFeature):
-        shpDriver.DeleteDataSource(outFeature)
-    outDataSource = shpDriver.CreateDataSource(outFeature)
-    outLayer = outDataSource.CreateLayer(outFeature,srs,geom_type=ogr.wkbPoint)
-    featureDefn = outLayer.GetLayerDefn()
-    outLayer.CreateField(ogr.FieldDefn(arrName1, ogr.OFTInteger))
-    outLayer.CreateField(ogr.FieldDefn(arrName2, ogr.OFTReal))
-    point = ogr.Geometry(ogr.wkbPoint)
-    for ridx, (rowa, rowb) in enumerate(zip(array1,array2)):
-        for cidx, (value1,value2) in enumerate(zip(rowa,rowb)):
-            Xcoord, Ycoord = pixelOffset2coord(raster,cidx,ridx)
-            point.AddPoint(Xcoord, Ycoord)
-            outFeature = ogr.Feature(featureDefn)
-            outFeature.SetGeometry(point)
-            outFeature.SetField(arrName1, int(value1))
+    noData = raster.GetRasterBand(1).GetNoDataValue()
+    X, Y = pixelCenters(raster.GetGeoTransform(), *array1.shape)
+    raster = None
+    mask = validCells(array1, noData) & validCells(array2, noData)
 #  Resampled Rasters need magnitude multiplied by resample multiplier**2]            
-            outFeature.SetField(arrName2, float(value2)*(csizeMultiplier**2))
-            outLayer.CreateFeature(outFeature)
-            outFeature.Destroy()   
-    outDataSource = None 
+    writePoints(outFeature, X[mask], Y[mask],
+                [(arrName1, ogr.OFTInteger, array1[mask]),
+                 (arrName2, ogr.OFTReal,
+                  array2[mask]*(csizeMultiplier**2))], espg)
 
 def TwoRas2OnePnt(dirRas,magRas,outFeature,optArgs,
                   arrName1="DIR",arrName2="MAG",
                   csizeMultiplier=1):
-#  uses either gdal or arcpy
-#  Create and save an ESRI point shapefile at pixel center coordinates
-#  with values from array of the same dimensions
+#  uses the selected raster backend (MFbackends)
+#  Create and save point features at pixel center coordinates
+#  with values from 2 rasters of the same dimensions
 #      
-    espg = getModel_SR(optArgs['model'])
-    # Using GDAL
-    if optArgs['noArc'] :
-        dirRas = dirRas+'.tif'
-        magRas = magRas+'.tif'
-        outFeature = outFeature + '.shp'
-        array1 = rasFile2array(dirRas)
-        array2 = rasFile2array(magRas)
-        Two_array2shp(array1,array2,outFeature,dirRas,"DIR","MAG",
-                      csizeMultiplier,espg)
-    # Using ArcPy        
-    else:
-        if 'clp' in dirRas:
-          fgdb = optArgs['clpgdb']
-        else:
-          fgdb = optArgs['geodb'] 
-        arcpy.env.workspace = fgdb
-        arcpy.RasterToPoint_conversion(in_raster=dirRas,out_point_features=outFeature,
-                              raster_field=arrName1)
-        rasFldMap = magRas + ' ' + arrName2
-        arcpy.gp.ExtractMultiValuesToPoints_sa(outFeature,rasFldMap,"NONE")
-        if csizeMultiplier != 1:
-            express = "!Magnitude! * "+ str(csizeMultiplier)\
-                                      + " * "+str(csizeMultiplier)
-            arcpy.CalculateField_management(in_table=outFeature,field=arrName2,
-                                            expression=express,
-                                            expression_type="PYTHON_9.3", 
-                                            code_block="#")
-        arcpy.env.workspace = optArgs['geodb']  
+    import MFgis.MFbackends as MFbackends
+    with MFprofile.stage('shapefileWrite'):
+        MFbackends.backend(optArgs).writePoints(dirRas, magRas, outFeature,
+                                                arrName1, arrName2,
+                                                csizeMultiplier)
     
 def raster_X_coeff(file, file2, coeff, band=1):
 #   No ArcPy  -- uses just GDAL
@@ -330,101 +464,37 @@ def raster_X_coeff(file, file2, coeff, band=1):
 def noPath (file):
     return(os.path.basename(file))
     
-def numPy2Ras(npArray, rasName, optArgs, discDict):
+def numPy2Ras(npArray, rasName, optArgs, discDict, geotransform=None):
 #
 #   Converts NumPy Array read from Modflow Binary
-#   into an ArcGIS raster with appropriate Spatial
-#   Reference for the Model being processed
-#   Saving the raster to the proper Workspace
-#
-  resx = float(discDict['cellsize1'])
-  resy = float(discDict['cellsize2'])
-  nrows = int(discDict['nrows'])
-  llorigin = modelOrigins(optArgs['model'])
-  ulx = llorigin[0]
-  uly = llorigin[1]+(nrows*resy)
-  
-  # Using ArcPy
-  if not optArgs['noArc']:
-      SR = arcpy.SpatialReference(getModel_SR(optArgs['model']))
-      arcpy.env.outputCoordinateSystem =SR
-      arcpy.env.cellSize = resx
-      ras = arcpy.NumPyArrayToRaster(npArray,arcpy.Point(*llorigin),
-                                     resx,resy,999)
-      if 'IN_MEMORY' in rasName:
-         print ("In_Memory Raster: {}".format(rasName))
-         rasFilename = rasName
-      elif 'clp' in rasName:
-         rasFilename = os.path.join(optArgs['clpgdb'], rasName)
-         print ("{} \t:Clipped Raster".format(rasName))
-      else:
-         rasFilename = os.path.join(optArgs['geodb'], rasName)
-         print ("{} \t\t:Raster".format(noPath(rasName)))
-      ras.save(rasFilename)
-      arcpy.DefineProjection_management(ras, SR)
-  else:
-  # Using GDAL
-    if optArgs['rasFolder'] != None:
-         outputPath, rasFile = os.path.split(rasName)
-         if outputPath == '': outputPath =  optArgs['rasFolder']
-         if not os.path.exists(outputPath): os.makedirs(outputPath)
-         suffix = '.tif'
-         rasFilename = os.path.join(optArgs['rasFolder'],rasFile+suffix)
-         if 'clp' in rasName: print ("{} \t:Clipped Raster".format(rasFile))
-         else: print ("{} \t\t:Raster".format(rasFile))
-         CreateGeoTiff(rasFilename,npArray,resx,resy,ulx,uly,
-                       getModel_SR(optArgs['model']))
-    else:
-        print("rasFolder' option has been set to 'None' somehow!" )
-        exit(55)
+#   into a raster with appropriate Spatial Reference for the
+#   Model being processed using the selected raster backend
+#   (ArcGIS, GDAL, NumPy or null; see MFbackends)
+#
+  import MFgis.MFbackends as MFbackends
+  with MFprofile.stage('rasterWrite', npArray.nbytes):
+    MFbackends.backend(optArgs, discDict).writeRaster(npArray, rasName,
+                                                      geotransform)
   return
 
-def clipRaster(InRastername, optArgs):
+def clipArray(npArray, rasName, optArgs, discDict, geotransform=None):
 #
-#   Clip ArcGIS raster to default extents
-#   defined for the model being processed
-#   or to the extents of a user defined Shapefile
+#   Write the clipped 'clp' raster directly from the window of the
+#   array inside the clip extent (user Shapefile or model default)
 #
+  import MFgis.MFbackends as MFbackends
+  with MFprofile.stage('clip'):
+    MFbackends.backend(optArgs, discDict).writeClipped(npArray, rasName,
+                                                       geotransform)
+  return
 
-  path, ras = os.path.split(InRastername)
-  if optArgs['clipBox'] != 'Default.shp':
-    if optArgs['noArc']:
-        clip = "%d %d %d %d" % modelClips(optArgs['model'])
-    else:
-        desc = arcpy.Describe(optArgs['clipBox'])
-        ExtObj = desc.extent
-        clip = "%d %d %d %d" % (ExtObj.XMin, ExtObj.YMin,
-                                ExtObj.XMax, ExtObj.YMax)
-  else:
-    clip = "%d %d %d %d" % modelClips(optArgs['model'])
-  clpRaster = "clp" +ras
-  
-  if modelClips(optArgs['model']) != (0,0,0,0):
-     if not optArgs['noArc']:
-        ws1 = optArgs['geodb']
-        ws2 = optArgs['clpgdb']
-        if path == 'IN_MEMORY':
-          arcpy.env.workspace = r'IN_MEMORY'
-        else:
-          arcpy.env.workspace = ws2
-        InRasFullame = os.path.join(ws1,ras)
-        arcpy.gp.ExtractByRectangle_sa(InRasFullame,clip,clpRaster,"INSIDE")
-        print ("{} \t:Clipped Raster".format(clpRaster))
-        arcpy.env.workspace = ws1
-     else:
-        ws1 = optArgs['rasFolder']
-        InRasFullame = os.path.join(ws1,ras+'.tif')
-        ds = gdal.Open(InRasFullame)
-        if ds is None: print("Failed to open ",InRasFullame)
-        # arcpy.gp.ExtractByRectangle_sa needs(xmin, ymin, xmax, ymax)
-        # gdal.Translate needs -projwin ulx uly lrx lry 
-        (xmin, ymin, xmax, ymax) = modelClips(optArgs['model'])
-        ds = gdal.Translate(os.path.join(ws1,clpRaster+'.tif'), ds, 
-                            projWin = [xmin, ymax, ymin, xmax])        
-        if ds is None: 
-            print("Failed to translate ",InRasFullame, "to \n", 
-                  os.path.join(ws1,clpRaster+'.tif'))
-        else:
-            print ("{} \t:Clipped Raster".format(clpRaster))
-        ds = None
+def clipRaster(InRastername, optArgs):
+#
+#   Clip a raster already written to default extents defined for
+#   the model being processed or to the extents of a user defined
+#   Shapefile.  clipArray avoids reading the raster back
+#
+  import MFgis.MFbackends as MFbackends
+  with MFprofile.stage('clip'):
+    MFbackends.backend(optArgs).clip(InRastername)
   return
@@ -0,0 +1,65 @@
+"""
+..module::MFlazy
+  ::synopsis: Read Modflow Binary uses:
+  :           import MFgis.MFlazy as MFlazy
+  :           Deferred imports of the heavy optional libraries
+  :           (arcpy, GDAL, tkinter).  A LazyModule stands in for the
+  :           module and imports it on first attribute access, so
+  :           headless runs never pay for backends they do not use
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import importlib
+import importlib.util
+
+class LazyModule(object):
+#
+#   Proxy for a module imported when first used:
+#
+#     gdal = LazyModule('osgeo.gdal')
+#     ...
+#     gdal.Open(rasterFile)      <- osgeo.gdal is imported here
+#
+#   A missing library raises ImportError where it is first used
+#
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        if self._module is None:
+            self.__dict__['_module'] = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return "<lazy module '{}' ({})>".format(self._name, state)
+
+def available(name):
+#
+#   True when a module can be imported, found without importing it
+#
+  try:
+    return importlib.util.find_spec(name) is not None
+  except (ImportError, ValueError):
+    return False
+
+def loaded(module):
+#
+#   True once a LazyModule (or a plain module) has been imported
+#
+  if isinstance(module, LazyModule):
+    return module._module is not None
+  return module is not None
+
+arcpy = LazyModule('arcpy')
+gdal = LazyModule('osgeo.gdal')
+osr = LazyModule('osgeo.osr')
+ogr = LazyModule('osgeo.ogr')
@@ -0,0 +1,262 @@
+"""
+..module::MFstack
+  ::synopsis: Read Modflow Binary uses:
+  :           import MFgis.MFstack as MFstack
+  :           Time or layer stacked output.  Instead of one single band
+  :           GeoTIFF per (term, layer, period) every period of a layer
+  :           (-stack layer) or every layer of a period (-stack period)
+  :           is written as a band of one chunked multi-band GeoTIFF or
+  :           a CF NetCDF variable (gdal backend) or one (band, row,
+  :           col) .npy array (npy backend).  Each band carries KPER,
+  :           KSTP, TOTIM and LAYER metadata.
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import os
+import json
+import numpy as np
+from sys import exit
+import MFgis.MFgis as MFgis
+from MFgis.MFlazy import gdal
+
+def stackName(binType, stackBy, kper, kstp, layer):
+#
+#   Output name of the stack holding a record.  Names avoid the
+#   single raster '<type>*_<layer>.tif' pattern
+#
+  if stackBy == 'layer':
+    return binType + "_LAY" + str(layer)
+  name = binType + "_SP" + '{:05d}'.format(int(kper))
+  if kstp is not None:
+    name += "_" + str(kstp)
+  return name
+
+def stackBands(names):
+#
+#   Band number (1 based, in record order) and band count of each
+#   record given the stack name of every record
+#
+  bands = np.zeros(len(names), np.int64)
+  counts = {}
+  for i, name in enumerate(names):
+    counts[name] = counts.get(name, 0) + 1
+    bands[i] = counts[name]
+  return bands, [counts[name] for name in names]
+
+class _TifStack(object):
+    def __init__(self, filename, bandCount, writer, nrows, ncols, options):
+        opts = ['TILED=YES', 'COMPRESS=DEFLATE', 'INTERLEAVE=BAND',
+                'BIGTIFF=IF_SAFER'] + options
+        self.ds = writer.driver.Create(filename, ncols, nrows, bandCount,
+                                       gdal.GDT_Float32, opts)
+        self.ds.SetGeoTransform(writer.geotransform)
+        self.ds.SetProjection(writer.wkt)
+        # Blocks never written read back as the NaN nodata value
+        for b in range(1, bandCount+1):
+            self.ds.GetRasterBand(b).SetNoDataValue(float('nan'))
+
+    def write(self, band, array, meta):
+        rb = self.ds.GetRasterBand(band)
+        rb.WriteArray(array)
+        rb.SetDescription(' '.join('{}={}'.format(k, meta[k])
+                                   for k in sorted(meta)))
+        rb.SetMetadata(dict((k, str(v)) for k, v in meta.items()))
+
+    def close(self):
+        self.ds.FlushCache()
+        self.ds = None
+
+class _NcStack(object):
+    def __init__(self, filename, varName, dimName, bandCount, writer,
+                 nrows, ncols, startDate):
+        try:
+            import netCDF4
+        except ImportError:
+            print("netCDF4 library is required for -stackfmt nc")
+            exit(56)
+        ds = netCDF4.Dataset(filename, 'w')
+        ds.Conventions = 'CF-1.8'
+        ds.createDimension(dimName, bandCount)
+        ds.createDimension('y', nrows)
+        ds.createDimension('x', ncols)
+        X, Y = MFgis.pixelCenters(writer.geotransform, nrows, ncols)
+        x = ds.createVariable('x', 'f8', ('x',))
+        x.standard_name = 'projection_x_coordinate'
+        x[:] = X[0]
+        y = ds.createVariable('y', 'f8', ('y',))
+        y.standard_name = 'projection_y_coordinate'
+        y[:] = Y[:, 0]
+        crs = ds.createVariable('crs', 'i4')
+        crs.crs_wkt = writer.wkt
+        crs.spatial_ref = writer.wkt
+        crs.epsg_code = 'EPSG:{}'.format(writer.espg)
+        gt = writer.geotransform
+        crs.GeoTransform = ' '.join(str(g) for g in gt)
+        # Time stacks vary KPER, KSTP and TOTIM along 'time' with one
+        # LAYER; period stacks vary LAYER and hold scalar times
+        if dimName == 'time':
+            self.perBand = ('KPER', 'KSTP', 'TOTIM')
+        else:
+            self.perBand = ('LAYER',)
+        self.meta = {}
+        for field in ('KPER', 'KSTP', 'LAYER', 'TOTIM'):
+            dims = (dimName,) if field in self.perBand else ()
+            self.meta[field] = ds.createVariable(field.lower(),
+                                   'f8' if field == 'TOTIM' else 'i4', dims)
+        self.meta['TOTIM'].units = 'days'
+        self.time = None
+        if startDate:
+            dims = (dimName,) if dimName == 'time' else ()
+            self.time = ds.createVariable('time', 'f8', dims)
+            self.time.units = 'days since {}'.format(startDate)
+            self.time.calendar = 'standard'
+            self.time.standard_name = 'time'
+        self.var = ds.createVariable(varName, 'f4', (dimName, 'y', 'x'),
+                                     zlib=True, fill_value=np.nan,
+                                     chunksizes=(1, min(256, nrows),
+                                                 min(256, ncols)))
+        self.var.grid_mapping = 'crs'
+        self.ds = ds
+
+    def write(self, band, array, meta):
+        self.var[band-1] = array
+        for field, var in self.meta.items():
+            if field not in meta:
+                pass
+            elif field in self.perBand:
+                var[band-1] = meta[field]
+            else:
+                var.assignValue(meta[field])
+        if self.time is None:
+            pass
+        elif 'TOTIM' in self.perBand:
+            self.time[band-1] = meta['TOTIM']
+        else:
+            self.time.assignValue(meta['TOTIM'])
+
+    def close(self):
+        self.ds.close()
+        self.ds = None
+
+class _NpyStack(object):
+#
+#   (bandCount, nrows, ncols) float32 .npy array written in place,
+#   with band metadata in <name>.json
+#
+    def __init__(self, filename, bandCount, nrows, ncols):
+        self.array = np.lib.format.open_memmap(filename, mode='w+',
+                                               dtype=np.float32,
+                                               shape=(bandCount, nrows, ncols))
+        self.array[:] = np.nan
+        self.metaFile = filename[:-4] + '.json'
+        self.meta = [None]*bandCount
+
+    def write(self, band, array, meta):
+        self.array[band-1] = array
+        self.meta[band-1] = dict((k, float(v) if k == 'TOTIM' else int(v))
+                                 for k, v in meta.items())
+
+    def close(self):
+        self.array.flush()
+        self.array = None
+        with open(self.metaFile, 'w') as f:
+            json.dump({'bands': self.meta}, f)
+
+class _NullStack(object):
+    def __init__(self, backend):
+        self.backend = backend
+
+    def write(self, band, array, meta):
+        self.backend.rasters += 1
+        self.backend.cells += np.size(array)
+
+    def close(self):
+        pass
+
+class RasterStack(object):
+#
+#   Collects records into stacked output files in the rasFolder.
+#
+#     stack = RasterStack(optArgs, discDict)
+#     stack.add(name, band, bandCount, array,
+#               {'KPER':kper,'KSTP':kstp,'TOTIM':totim,'LAYER':k})
+#     stack.close()
+#
+#   A stack file is created with bandCount bands when its first band
+#   arrives and is closed once all of its bands are written.  Bands
+#   never written (layers absent from a list budget) remain NaN.
+#   Stack files are created by the raster backend (createStack);
+#   with gdal optArgs['stackFmt'] chooses 'tif' (default) or 'nc'.
+#   ArcGIS rasters cannot be stacked.
+#
+    def __init__(self, optArgs, discDict):
+        import MFgis.MFbackends as MFbackends
+        self.optArgs = optArgs
+        self.discDict = discDict
+        self.stackBy = optArgs['stack']
+        self.fmt = optArgs.get('stackFmt') or 'tif'
+        self.backend = MFbackends.backend(optArgs, discDict)
+        if not self.backend.stacks:
+            print("-stack is not available with the {} backend: use "
+                  "-backend gdal, npy or null".format(self.backend.name))
+            exit(56)
+        self.nrows = int(discDict['nrows'])
+        self.ncols = int(discDict['ncols'])
+        self.open = {}
+        self.remaining = {}
+        outDir = optArgs['rasFolder']
+        if not os.path.exists(outDir): os.makedirs(outDir)
+
+    def _create(self, name, bandCount):
+        return self.backend.createStack(self, name, bandCount)
+
+    def createFile(self, name, bandCount):
+#
+#       GeoTIFF or NetCDF stack written with GDAL (gdal backend)
+#
+        writer = MFgis.rasterWriter(self.optArgs, self.discDict)
+        filename = os.path.join(self.optArgs['rasFolder'],
+                                name + '.' + self.fmt)
+        if self.fmt == 'nc':
+            dimName = 'time' if self.stackBy == 'layer' else 'layer'
+            varName = name.rsplit('_LAY' if self.stackBy == 'layer'
+                                  else '_SP', 1)[0]
+            return _NcStack(filename, varName, dimName,
+                            bandCount, writer, self.nrows, self.ncols,
+                            self.optArgs.get('startDate'))
+        return _TifStack(filename, bandCount, writer, self.nrows,
+                         self.ncols, MFgis.tifOptions(self.optArgs))
+
+    def createNpy(self, name, bandCount):
+        return _NpyStack(os.path.join(self.optArgs['rasFolder'],
+                                      name + '.npy'),
+                         bandCount, self.nrows, self.ncols)
+
+    def createNull(self, backend):
+        return _NullStack(backend)
+
+    def add(self, name, band, bandCount, array, meta):
+        if name not in self.open:
+            self.open[name] = self._create(name, bandCount)
+            self.remaining[name] = bandCount
+            print ("{} \t\t:{} band stack".format(name, bandCount))
+        self.open[name].write(band, np.asarray(array), meta)
+        self.remaining[name] -= 1
+        if self.remaining[name] <= 0:
+            self.open.pop(name).close()
+            del self.remaining[name]
+
+    def finish(self, name):
+#
+#       Close a stack known to be complete even if some of its
+#       bands were never written
+#
+        if name in self.open:
+            self.open.pop(name).close()
+            del self.remaining[name]
+
+    def close(self):
+        for name in list(self.open):
+            self.open.pop(name).close()
+        self.remaining = {}
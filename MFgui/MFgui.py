@@ -20,6 +20,11 @@ else:
     # for Python2
     from Tkinter import *   ## notice capitalized T in Tkinter
 
+#   Optional arguments whose None default selects a documented
+#   behavior rather than 'all'; the GUI does not ask to confirm them
+OPTIONALARGS = ('backend', 'pts', 'start', 'tifopt', 'stack',
+                'aggby', 'report', 'profile', 'species')
+
 def guiBin(justOptions,optArgs,argHelp):
 #
 #   GUI choices for Modflow Binary processing options
@@ -224,6 +229,8 @@ def guiArgs(optArgs,argHelp):
             Verify this is what the user wants
   """  
   for arg in NoneVals:
+    if arg in OPTIONALARGS:
+      continue
     if arg !='terms':
       text= "Undefined "+arg+"""
               ...  [Cancel] to provide value or range
@@ -0,0 +1,140 @@
+"""
+..module::MFcancel
+  ::synopsis: Read Modflow Binary uses:
+  :           import MFmonitor.MFcancel as MFcancel
+  :           Cancellation token shared by the readers and whatever
+  :           stops them: the GUI Terminate button, Ctrl-C or a
+  :           termination signal on the command line, or a library
+  :           caller on another thread.  Readers check the token once
+  :           per record; GUI event pumps and progress callbacks run
+  :           at most every -poll seconds so a headless read loop only
+  :           pays for an Event check
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import time
+import signal
+import threading
+
+POLLSECONDS = 0.25
+
+class Cancelled(Exception):
+#
+#   Raised by CancelToken.check() once cancellation is requested
+#
+    pass
+
+class CancelToken(object):
+#
+#   Thread safe cancellation flag with periodic hooks.
+#
+#     token = CancelToken(pollSeconds=0.25)
+#     token.addPoller(root.update)         GUI event pump
+#     token.addProgress(fn)                fn(done, total)
+#     for n, rec in enumerate(records):
+#         if token.poll(n, len(records)):
+#             break                        finish current export
+#     token.cancel('Terminate button')     from any thread
+#
+    def __init__(self, pollSeconds=POLLSECONDS):
+        self.event = threading.Event()
+        self.pollSeconds = float(pollSeconds)
+        self.reason = None
+        self.pollers = []
+        self.progress = []
+        self.nextPoll = 0.0
+        self._handlers = {}
+
+    def cancel(self, reason=None):
+        if not self.event.is_set():
+            self.reason = reason
+            self.event.set()
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+    def reset(self):
+        self.event.clear()
+        self.reason = None
+
+    def addPoller(self, fn):
+        self.pollers.append(fn)
+
+    def removePoller(self, fn):
+        if fn in self.pollers: self.pollers.remove(fn)
+
+    def addProgress(self, fn):
+        self.progress.append(fn)
+
+    def removeProgress(self, fn):
+        if fn in self.progress: self.progress.remove(fn)
+
+    def poll(self, done=None, total=None):
+#
+#       True once cancelled.  Pollers and progress callbacks run
+#       when pollSeconds have passed since they last ran
+#
+        if (self.pollers or self.progress) and \
+           time.monotonic() >= self.nextPoll:
+            self.pump(done, total)
+        return self.event.is_set()
+
+    def pump(self, done=None, total=None):
+        self.nextPoll = time.monotonic() + self.pollSeconds
+        for fn in list(self.pollers):
+            fn()
+        if done is not None:
+            for fn in list(self.progress):
+                fn(done, total)
+
+    def check(self, done=None, total=None):
+        if self.poll(done, total):
+            raise Cancelled(self.reason)
+
+    def wait(self, timeout=None):
+        return self.event.wait(timeout)
+
+    def installSignals(self):
+#
+#       Ctrl-C (and SIGTERM, or SIGBREAK on Windows) cancel after the
+#       current export; a second Ctrl-C interrupts immediately.
+#       Only possible from the main thread
+#
+        if threading.current_thread() is not threading.main_thread():
+            return False
+        def handler(signum, frame):
+            if self.cancelled and signum == signal.SIGINT:
+                raise KeyboardInterrupt
+            print("\nCancelling after the current export "
+                  "(Ctrl-C again to stop now)")
+            self.cancel(signal.Signals(signum).name)
+        for name in ('SIGINT', 'SIGTERM', 'SIGBREAK'):
+            signum = getattr(signal, name, None)
+            if signum is not None and signum not in self._handlers:
+                self._handlers[signum] = signal.signal(signum, handler)
+        return True
+
+    def restoreSignals(self):
+        for signum, previous in self._handlers.items():
+            signal.signal(signum, previous)
+        self._handlers = {}
+
+_token = CancelToken()
+
+def cancelToken(optArgs=None):
+#
+#   Token shared by the readers of this run, using the -poll interval
+#
+  if optArgs is not None and optArgs.get('pollSeconds'):
+    _token.pollSeconds = float(optArgs['pollSeconds'])
+  return _token
+
+def setCancelToken(token):
+#
+#   Replace the shared token (library callers driving their own)
+#
+  global _token
+  _token = token
+  return token
@@ -0,0 +1,255 @@
+"""
+..module::MFprofile
+  ::synopsis: Read Modflow Binary uses:
+  :           import MFmonitor.MFprofile as MFprofile
+  :           Per stage timing of a run: counts, bytes, wall and CPU
+  :           seconds for each pipeline stage, with optional cProfile
+  :           or tracemalloc hooks, written as a JSON run report.
+  :             with MFprofile.stage('rasterWrite', npArray.nbytes):
+  :                 ...
+  :           Stages cost nothing until a run is started with -report
+  :           or -profile
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import os
+import sys
+import json
+import time
+import platform
+import threading
+
+#   Pipeline stages in report order.  Each stage is timed where it
+#   is called.  Memory mapped pages are read from disk when a record is first
+#   touched, so payloadRead counts the records and bytes mapped while
+#   the disk time falls in the stage touching them (transform,
+#   rasterWrite or aggregate)
+STAGES = ['namefile', 'headerScan', 'payloadRead', 'transform',
+          'rasterWrite', 'clip', 'shapefileWrite', 'aggregate']
+PROFILERS = ['cprofile', 'tracemalloc']
+
+class _Stage(object):
+#
+#   Context manager timing one pass through a stage
+#
+    __slots__ = ('report', 'name', 'nbytes', 'wall', 'cpu')
+
+    def __init__(self, report, name, nbytes):
+        self.report = report
+        self.name = name
+        self.nbytes = nbytes
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.report.add(self.name, time.perf_counter() - self.wall,
+                        time.process_time() - self.cpu, 1, self.nbytes)
+        return False
+
+class _NoStage(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOSTAGE = _NoStage()
+
+class RunReport(object):
+#
+#   Stage totals for one run.
+#
+#     report = RunReport(optArgs)
+#     with report.stage('headerScan', os.path.getsize(binfile)):
+#         index = ...
+#     report.count('records')
+#     report.finish()             -> dictionary (and -report JSON file)
+#
+#   Totals are shared by export threads.  -workers processes keep
+#   their own totals which the parent adds with merge(); their wall
+#   seconds are summed over the workers.  Exports in process pools
+#   are not counted
+#
+    def __init__(self, optArgs=None, enabled=True):
+        self.optArgs = optArgs or {}
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+        self.profiler = None
+        self.profile = self.optArgs.get('profile')
+        self.started = time.perf_counter()
+        self.startedCPU = time.process_time()
+        self.created = time.strftime('%Y-%m-%dT%H:%M:%S')
+        if enabled and self.profile:
+            self._startProfile()
+
+    def stage(self, name, nbytes=0):
+        if not self.enabled:
+            return _NOSTAGE
+        return _Stage(self, name, nbytes)
+
+    def add(self, name, wall, cpu=0.0, count=1, nbytes=0):
+        if not self.enabled:
+            return
+        with self.lock:
+            totals = self.stages.get(name)
+            if totals is None:
+                totals = self.stages[name] = {'count':0, 'bytes':0,
+                                              'wall':0.0, 'cpu':0.0}
+            totals['count'] += count
+            totals['bytes'] += int(nbytes)
+            totals['wall'] += wall
+            totals['cpu'] += cpu
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, stages, counters):
+#
+#       Add the stage totals and counters of a worker's report
+#
+        if not self.enabled:
+            return
+        for name, totals in stages.items():
+            self.add(name, totals['wall'], totals['cpu'], totals['count'],
+                     totals['bytes'])
+        for name, n in counters.items():
+            self.count(name, n)
+
+    def _startProfile(self):
+        if self.profile == 'cprofile':
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif self.profile == 'tracemalloc':
+            import tracemalloc
+            tracemalloc.start()
+
+    def _stopProfile(self, report):
+        reportFile = self.optArgs.get('report')
+        if self.profile == 'cprofile' and self.profiler:
+            self.profiler.disable()
+            import pstats
+            if reportFile:
+                profFile = os.path.splitext(reportFile)[0] + '.prof'
+                self.profiler.dump_stats(profFile)
+                report['profile'] = {'cprofile': profFile}
+            stats = pstats.Stats(self.profiler)
+            top = sorted(stats.stats.items(), key=lambda s: -s[1][3])[:15]
+            report.setdefault('profile', {})['cumulative'] = \
+                [{'function': '{}:{}({})'.format(*func), 'calls': nc,
+                  'cumulative': ct} for func, (cc, nc, tt, ct, callers) in top]
+            self.profiler = None
+        elif self.profile == 'tracemalloc':
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                return
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics('lineno')[:15]
+            tracemalloc.stop()
+            report['profile'] = {'peakMB': peak/1048576.0,
+                                 'currentMB': current/1048576.0,
+                                 'top': [{'line': str(s.traceback[0]),
+                                          'MB': s.size/1048576.0,
+                                          'count': s.count} for s in top]}
+
+    def toDict(self):
+        wall = time.perf_counter() - self.started
+        with self.lock:
+            names = [s for s in STAGES if s in self.stages] + \
+                    sorted(s for s in self.stages if s not in STAGES)
+            stages = {}
+            for name in names:
+                totals = dict(self.stages[name])
+                totals['MBps'] = (totals['bytes']/1048576.0/totals['wall']
+                                  if totals['wall'] > 0 else None)
+                totals['share'] = totals['wall']/wall if wall > 0 else None
+                stages[name] = totals
+            counters = dict(self.counters)
+        options = dict((k, v) for k, v in self.optArgs.items()
+                       if isinstance(v, (str, int, float, bool)) and v)
+        return {'created': self.created,
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'argv': sys.argv,
+                'options': options,
+                'wall': wall,
+                'cpu': time.process_time() - self.startedCPU,
+                'stageOrder': names,
+                'stages': stages,
+                'counters': counters}
+
+    def summary(self, report):
+        print("{:<15} {:>8} {:>12} {:>9} {:>9} {:>6}".format(
+              'stage', 'count', 'MB', 'wall s', 'cpu s', 'share'))
+        for name in report['stageOrder']:
+            s = report['stages'][name]
+            print("{:<15} {:>8d} {:>12.1f} {:>9.2f} {:>9.2f} {:>5.0%}".format(
+                  name, s['count'], s['bytes']/1048576.0, s['wall'],
+                  s['cpu'], s['share'] or 0))
+
+    def finish(self):
+#
+#       Stop profiling and write the -report JSON file
+#
+        report = self.toDict()
+        if not self.enabled:
+            return report
+        self._stopProfile(report)
+        reportFile = self.optArgs.get('report')
+        if reportFile:
+            with open(reportFile, 'w') as f:
+                json.dump(report, f, indent=1)
+            print("Run report: {}".format(reportFile))
+        if not self.optArgs.get('quiet'):
+            self.summary(report)
+        return report
+
+_report = RunReport(enabled=False)
+
+def startRun(optArgs):
+#
+#   Start the run report used by stage(); enabled with -report or
+#   -profile
+#
+  global _report
+  _report = RunReport(optArgs, bool(optArgs.get('report') or
+                                    optArgs.get('profile')))
+  return _report
+
+def startWorker(enabled):
+#
+#   Stage totals of a worker process, returned to the parent for
+#   merge(); workers are not profiled and write no report
+#
+  global _report
+  _report = RunReport(enabled=enabled)
+  return _report
+
+def runReport():
+  return _report
+
+def merge(stages, counters):
+  _report.merge(stages, counters)
+
+def stage(name, nbytes=0):
+  return _report.stage(name, nbytes)
+
+def count(name, n=1):
+  _report.count(name, n)
+
+def tally(name, nbytes=0, n=1):
+#
+#   Count and bytes for a stage without timing it
+#
+  _report.add(name, 0.0, 0.0, n, nbytes)
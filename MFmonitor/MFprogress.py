@@ -0,0 +1,122 @@
+"""
+..module::MFprogress
+  ::synopsis: Read Modflow Binary uses:
+  :           import MFmonitor.MFprogress as MFprogress
+  :           Progress lines for long reads: records and bytes done
+  :           against the indexed selection, throughput and an ETA.
+  :           Driven by the cancellation token's progress callbacks so
+  :           nothing is printed more often than -progress seconds
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import sys
+import time
+import numpy as np
+import MFmonitor.MFcancel as MFcancel
+
+PROGRESSSECONDS = 2.0
+#   Weight of the latest interval in the smoothed rate used for the ETA
+SMOOTHING = 0.3
+
+def hms(seconds):
+  seconds = int(round(seconds))
+  return "{}:{:02d}:{:02d}".format(seconds//3600, (seconds//60) % 60,
+                                   seconds % 60)
+
+class Progress(object):
+#
+#   Progress of one read.
+#
+#     progress = Progress('HEAD', nrec, recordBytes)
+#     progress.update(done)      record count; prints when due
+#     progress.finish()
+#
+#   recordBytes (optional) holds the payload size of each record so
+#   bytes consumed are reported along with records.  The
+#   ETA uses an exponentially smoothed rate so it follows changes in
+#   speed (cached pages, slower exports) without jumping around
+#
+    def __init__(self, label, total, recordBytes=None, interval=None,
+                 stream=None):
+        self.label = label
+        self.total = int(total)
+        self.interval = PROGRESSSECONDS if interval is None else interval
+        self.stream = stream or sys.stdout
+        self.tty = hasattr(self.stream, 'isatty') and self.stream.isatty()
+        self.ends = None
+        if recordBytes is not None and len(recordBytes):
+            self.ends = np.cumsum(np.asarray(recordBytes, np.int64))
+        self.started = time.monotonic()
+        self.lastTime = self.started
+        self.lastDone = 0
+        self.rate = None
+        self.nextPrint = self.started + self.interval
+        self.done = 0
+        self.lines = 0
+
+    def bytesDone(self, done):
+        if self.ends is None or done < 1:
+            return 0
+        return int(self.ends[min(done, self.total) - 1])
+
+    def update(self, done, total=None):
+        self.done = done
+        now = time.monotonic()
+        if self.interval <= 0 or now < self.nextPrint:
+            return
+        if now > self.lastTime and done > self.lastDone:
+            rate = (done - self.lastDone) / (now - self.lastTime)
+            self.rate = rate if self.rate is None else \
+                        SMOOTHING*rate + (1.0 - SMOOTHING)*self.rate
+        self.lastTime, self.lastDone = now, done
+        self.nextPrint = now + self.interval
+        self.write(self.line(done, now))
+
+    def line(self, done, now):
+        elapsed = now - self.started
+        text = "{} {:,d}/{:,d} records {:5.1f}%".format(
+               self.label, done, self.total,
+               100.0*done/self.total if self.total else 100.0)
+        if elapsed > 0:
+            text += "  {:,.0f} rec/s".format(done/elapsed)
+            if self.ends is not None:
+                text += "  {:,.1f} MB/s".format(
+                        self.bytesDone(done)/1048576.0/elapsed)
+        if self.rate and done < self.total:
+            text += "  ETA {}".format(hms((self.total - done)/self.rate))
+        return text + "  elapsed {}".format(hms(elapsed))
+
+    def write(self, text):
+        if self.tty:
+            self.stream.write('\r' + text.ljust(79))
+        else:
+            self.stream.write(text + '\n')
+        self.stream.flush()
+        self.lines += 1
+
+    def finish(self, done=None):
+        if done is not None:
+            self.done = done
+        if self.interval > 0 and self.lines:
+            self.write(self.line(self.done, time.monotonic()))
+            if self.tty: self.stream.write('\n')
+
+def start(optArgs, label, total, recordBytes=None, token=None):
+#
+#   Progress registered with the run's cancellation token, or None
+#   when -progress is 0.  Call finish(progress) when the read ends
+#
+  interval = float(optArgs.get('progressSeconds') or 0)
+  if interval <= 0:
+    return None
+  token = token or MFcancel.cancelToken()
+  progress = Progress(label, total, recordBytes, interval)
+  token.addProgress(progress.update)
+  return progress
+
+def finish(progress, token=None, done=None):
+  if progress is None:
+    return
+  (token or MFcancel.cancelToken()).removeProgress(progress.update)
+  progress.finish(done)
@@ -0,0 +1 @@
+from MFmonitor.MFprofile import RunReport
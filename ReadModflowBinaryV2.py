@@ -11,39 +11,22 @@
 
 """
 import sys
-import time
-import glob
-import easygui as ez
 import MFargDefaults.setDefaultArgs as defs
-import MFgui.MFgui as MFgui
 import MFbinary.MFbinaryData as mf
+import MFbinary.MFheadFile as mfhds
+import MFbinary.MFucn as mfucn
 import MFgis.MFgis as MFgis
-try:
-    from osgeo import gdal, gdalconst, osr, ogr
-except ImportError:
-    print("GDAL libraries are not available.")
-
-if sys.version_info[0] == 3:    from tkinter import *  
-else:  from Tkinter import *   ## notice capitalized T in Tkinter
-    
-import numpy as np
+import MFmonitor.MFprofile as MFprofile
+import MFmonitor.MFcancel as MFcancel
+#   easygui, MFgui (tkinter) and arcpy are only imported when used
+#   so batch runs start without loading them
+from MFgis.MFlazy import arcpy
 import os
-import re
   
 def checkExec_env():
-    cmdL = False
-    a = sys.executable
-    m = '\\'
-    m = m[0]
-    while True:
-        b = len(a)
-        c = a[(b - 1)]
-        if c == m: break
-        a = a[:(b - 1)]
-    if sys.executable == a + 'python.exe': cmdL=True
-    else:
+    cmdL = os.path.basename(sys.executable).lower() == 'python.exe'
+    if not cmdL:
         print (sys.executable)
-        cmdL=False
     return (cmdL)
 
 """    
@@ -93,11 +76,15 @@ def checkExec_env():
 """
 
 def main():
+    runReport = MFprofile.startRun(optArgs)
+    # Ctrl-C finishes the current export before stopping
+    MFcancel.cancelToken(optArgs).installSignals()
 #--------------------------------------------------------------------   
 #   GUI to select Namefile if not provided on command line
 #--------------------------------------------------------------------     
     if not optArgs['namefile']:
       optArgs['gui'] = True
+      import easygui as ez
       title ="Read Modflow Bianry Produces ArcGIS Rasters and Features"
       namMsg = """
       Please locate and select a Modflow name file
@@ -132,18 +119,27 @@ def main():
 #--------------------------------------------------------------------------
 #  GUI interface option selection
 #--------------------------------------------------------------------------
-    if optArgs['gui']:   MFgui.guiArgs(optArgs,argHelp)
+    if optArgs['gui']:
+        import MFgui.MFgui as MFgui
+        MFgui.guiArgs(optArgs,argHelp)
     
+#--------------------------------------------------------------------------                       
+# Raster backends other than arcpy (gdal, npy, null) work without ArcGIS
+#--------------------------------------------------------------------------
+    if optArgs.get('backend'):
+        optArgs['noArc'] = optArgs['backend'] != 'arcpy'
+        
 #--------------------------------------------------------------------------                       
 # Reset previously user assigned noArc to True if not able to import arcpy  
 # mostlikely because it is not being ran from Citrix)       
 #--------------------------------------------------------------------------
     if not optArgs['noArc']:
         try:
-            import arcpy
+            arcpy.env
         except ImportError:
             print ('ESRI ArcGIS arcpy library is not availble')
             optArgs['noArc'] = True    
+            if optArgs.get('backend') == 'arcpy': optArgs['backend'] = 'gdal' 
             
 #--------------------------------------------------------------------------
 # Compile arguments into a single runstring useful for batch file execution:
@@ -155,7 +151,6 @@ def main():
                 "\\ReadModflowBinary\\ReadModflowBinaryV2.py',  " + \
                 "wdir=r'\\\\ad.sfwmd.gov\\dfsroot\\data\\wsd\\SUP\\devel\\source\\Python\\ReadModflowBinary '," +\
                 "args='"          
-    start_time=time.clock()
             
 #--------------------------------------------------------------------------                
 # check each optArg item to see if it has been assigned
@@ -222,11 +217,16 @@ def main():
         if clips == (0,0,0,0):  print ("No default clip extents")
         else: print("clip extents={} for {}".format(clips, optArgs['model'] ))
       else: print ("No clip extents")
+    if optArgs['clipOnly'] and optArgs['clipBox'] == 'Default.shp' and \
+       MFgis.modelClips(optArgs['model']) == (0,0,0,0):
+        print ("-cliponly needs clip extents: assign -clpbox for the {} model"\
+               .format(optArgs['model']))
+        exit(60)
         
 #--------------------------------------------------------------------------                       
 #   Process binary Heads file:
 #--------------------------------------------------------------------------   
-    if optArgs['heads']:
+    if optArgs['heads'] or optArgs['stations']:
       ocFilename = mf.FileByInitials(os.path.join(path, namfile), 'OC')
       ocFilename_full = os.path.join(path, ocFilename)
 
@@ -239,7 +239,22 @@ def main():
       headsfile = os.path.join(path,headsfile)
       print ("heads binary filename: {}".format(headsfile))
       
+    if optArgs['heads']:
       mf.readBinHead(headsfile,'HEAD',optArgs)
+
+#--------------------------------------------------------------------------                       
+#   Extract heads time series at stations directly from the heads file
+#--------------------------------------------------------------------------   
+    if optArgs['stations']:
+      stations = mfhds.readStations(optArgs['stations'])
+      stationBase = os.path.splitext(os.path.basename(optArgs['stations']))[0]
+      if not os.path.exists(optArgs['rasFolder']):
+        os.makedirs(optArgs['rasFolder'])
+      csvFile = os.path.join(optArgs['rasFolder'], stationBase+'_HEAD.csv')
+      with mfhds.HeadFile(headsfile,'HEAD') as hf:
+        mfhds.writePointSeries(csvFile, hf, stations, optArgs['startDate'])
+      print ("{} stations x {} times written to {}"\
+             .format(len(stations), len(hf), csvFile))
       
 #--------------------------------------------------------------------------                       
 #   Process SWI Zeta file:
@@ -258,16 +273,23 @@ def main():
       mf.readBinHead(zetafilename,'HEAD',optArgs)
       
 #--------------------------------------------------------------------------                       
-#   Process binary TDS concentrations
-#       Currently input filename is hard coded      
+#   Process binary TDS concentrations:
+#       MT3D###.UCN species files are found from the namefiles,
+#       the BTN package or the model folder
 #-------------------------------------------------------------------------- 
     if optArgs['conc']:
-      concfile = os.path.join(path,'MT3D001.UCN')
-      print ("....attempting to process MT3D binary file")
-      if not os.path.exists(concfile):
-        print ("Modflow Concentration file does not exist")
+      print ("....attempting to process MT3D binary files")
+      species = mfucn.selectSpecies(mfucn.discoverSpecies(path,namfile),
+                                    optArgs['species'])
+      if not species:
+        print ("MT3D Concentration files (MT3D###.UCN) do not exist")
         exit(999)
-      mf.readBinHead(concfile,'CONC',optArgs)
+      for sp in species:
+        print ("Species {}: {}".format(mfucn.speciesLabel(sp),
+                                       mf.noPath(sp.path)))
+      if optArgs['stack']:
+        print ("-stack is not used with -tds; writing a raster per record")
+      mfucn.readUCN(species,optArgs,mf.discDict)
 
 #--------------------------------------------------------------------------                       
 #   Process binary UZF CellxCell Budgets
@@ -275,9 +297,9 @@ def main():
     if optArgs['uzfcbc']:
       uzfFilename = mf.FileByInitials(os.path.join(path,namfile), 'UZF')
       uzfFilename_full = os.path.join(path,uzfFilename)
-      uzfUnit = getUnitNum(uzfFilename_full,1,6)
+      uzfUnit = mf.getUnitNum(uzfFilename_full,1,6)
       
-      uzfcbcfilename = getFileByNum(os.path.join(path,namfile), uzfUnit)
+      uzfcbcfilename = mf.getFileByNum(os.path.join(path,namfile), uzfUnit)
       uzfcbcfilename = os.path.join(path,uzfcbcfilename)
       print ("CellxCell Flow filename: {}".format(uzfcbcfilename))
       
@@ -303,40 +325,9 @@ def main():
       mf.readBinCBC(cbcfilename,'VEC',optArgs)
       
 #--------------------------------------------------------------------------                       
-#   Aggregate rasters from current workspace with  MEAN, MAX, or MIN 
+#   Aggregate rasters (MEAN, MAX, MIN ...) are accumulated while each
+#   binary file is read and written by the readers when they finish
 #--------------------------------------------------------------------------       
-    if optArgs['aggregate']:
-        for process in ['heads','conc','terms']:
-            rasTypes =[]
-            if optArgs['heads'] and process == 'heads': 
-                rasTypes = ['HEAD']
-            elif optArgs['conc'] and process == 'conc':  
-                rasTypes = ['CONC']
-            elif type(optArgs['terms']) == list and process == 'terms': 
-                rasTypes= optArgs['terms']
-            elif len(optArgs['terms']) > 0 and process == 'terms': 
-                rasTypes= optArgs['terms'].split("|")
-            print('\nCreating '+str(optArgs['aggregate']).upper()+' rasters for '+ str(rasTypes))
-            for typ in rasTypes:
-                for lay in mf.parseRange(optArgs['layerStr']):
-                    # Search for budget raster with different wildCard pattern than Heads or Conc
-                    # Currently ignores clp rasters
-                    if optArgs['terms'] and process == 'terms':
-                        wildCardStr = '_'+str(lay)+'*.tif'
-                    else:
-                        wildCardStr = '*_'+str(lay)+'.tif'
-                    tifFiles = glob.glob(optArgs['rasFolder']+'\\'+typ+wildCardStr)
-                    L = [np.array(MFgis.rasFile2array(rasFile)) for rasFile in tifFiles]
-                    if optArgs['aggregate'] == 'mean':
-                        summaryRas=np.mean(L,axis=0)  
-                        rasName=optArgs['rasFolder']+'\\MEAN_'+typ+'_'+str(lay)
-                    elif optArgs['aggregate'] == 'min':
-                        summaryRas=np.min(L,axis=0)  
-                        rasName=optArgs['rasFolder']+'\\MIN_'+typ+'_'+str(lay)
-                    elif optArgs['aggregate'] == 'max':
-                        summaryRas=np.max(L,axis=0)  
-                        rasName=optArgs['rasFolder']+'\\MAX_'+typ+'_'+str(lay)
-                    MFgis.numPy2Ras(summaryRas, rasName, optArgs, discDict)
 
 #--------------------------------------------------------------------------                       
 #   Clean up memory and release Spatial Analyst if using arcpy on Citrix
@@ -349,7 +340,8 @@ def main():
 #   End of the program
 #-------------------------------------------------------------------------- 
     print ("...finished")
-    print(round(time.clock()-start_time,2), ' seconds execution time')
+    report = runReport.finish()
+    print(round(report['wall'],2), ' seconds execution time')
 
 #--------------------------------------------------------------------
 #  cmdLine variable is used to determine gui options
@@ -359,9 +351,6 @@ if __name__ == '__main__':
     if cmdLine: print('Running in Command line')
     else: print('Running in Python IDLE')
 
-    global running
-    running = True  # Global flag for Terminate Button
-
 #--------------------------------------------------------------------
 #   parserArgs is a Namespace and
 #   optArgs is a dictionary assigned to parserArgs
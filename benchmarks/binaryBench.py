@@ -0,0 +1,224 @@
+"""
+..module::binaryBench
+  ::synopsis: Read and export benchmarks on a synthetic model:
+  :           python benchmarks/binaryBench.py [-grid 200x200,1000x1000]
+  :                  [-lays 3] [-pers 12] [-repeat 3] [-cases ...]
+  :                  [-dir DIR] [-keep] [-json FILE]
+  :           Times readBinHead, readUCN, readBinCBC, readCBCterms, GeoTIFF
+  :           export and aggregation with throughput (MB/s, records/s)
+  :           and peak traced memory.  Results are written as JSON so
+  :           runs can be compared across releases
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import numpy as np
+import synthModel
+import MFbinary.MFbinaryData as mf
+import MFbinary.MFbinaryIndex as mfidx
+import MFbinary.MFdisFile as mfdis
+import MFbinary.MFnameFile as mfnam
+import MFbinary.MFucn as mfucn
+from MFargDefaults.setDefaultArgs import setDefaultArgs
+from MFgis.MFlazy import available
+
+MODEL = 'WCFM'
+
+def defaultOptions(**changes):
+#
+#   optArgs as the command line parser would set them by default
+#
+  optArgs = {}
+  for label, value in setDefaultArgs().items():
+    optArgs[value[2]] = False if value[0] == 'option' else value[3]
+  optArgs.update(changes)
+  return optArgs
+
+def readHeads(files, folder, binType='HEAD', **changes):
+  optArgs = defaultOptions(model=MODEL, noArc=True, quiet=True,
+                           backend='null', rasFolder=folder, geodb=folder)
+  optArgs.update(changes)
+  mf.readBinHead(files[binType], binType, optArgs)
+
+def readSpecies(files, folder, **changes):
+  optArgs = defaultOptions(model=MODEL, noArc=True, quiet=True,
+                           backend='null', rasFolder=folder, geodb=folder)
+  optArgs.update(changes)
+  path, namfile = os.path.split(files['nam'])
+  species = mfucn.selectSpecies(mfucn.discoverSpecies(path, namfile),
+                                optArgs['species'])
+  mfucn.readUCN(species, optArgs, mf.discDict)
+
+def readBudget(files, folder, kind='CBC', **changes):
+  optArgs = defaultOptions(model=MODEL, noArc=True, quiet=True,
+                           backend='null', rasFolder=folder, geodb=folder)
+  optArgs.update(changes)
+  mf.readBinCBC(files[kind], None, optArgs)
+
+def readTerms(files, folder, kind='CBC'):
+  path, namfile = os.path.split(files['nam'])
+  saved = mf.form
+  mf.form = 'UF' if kind == 'CBCUF' else 'BINARY'
+  try:
+    if kind == 'CBC':
+      return mf.readCBCterms(path, namfile)
+    # Budget files not named by the LPF package are indexed directly
+    cbcHdr = mf.binHdr('CBCUF' if kind == 'CBCUF' else 'CBC')
+    return mfidx.indexBinCBC(files[kind], cbcHdr, mf.binHdr('XCBC'))
+  finally:
+    mf.form = saved
+
+#   name: (synthetic files read joined by '+', function, keyword
+#          arguments, module required)
+CASES = {
+  'readBinHead':   ('HEAD', readHeads, {}, None),
+  'readUCN':       ('CONC+CONC2', readSpecies, {}, None),
+  'readBinCBC':    ('CBC', readBudget, {}, None),
+  'readBinCBCcompact': ('XCBC', readBudget, {'kind':'XCBC'}, None),
+  'readCBCterms':  ('CBC', readTerms, {}, None),
+  'indexCBCuf':    ('CBCUF', readTerms, {'kind':'CBCUF'}, None),
+  'exportGeoTIFF': ('HEAD', readHeads, {'backend':'gdal'}, 'osgeo'),
+  'exportNpy':     ('HEAD', readHeads, {'backend':'npy'}, None),
+  'aggregate':     ('HEAD', readHeads,
+                    {'aggregate':'mean,std,min,max', 'aggOnly':True}, None),
+}
+
+def recordCount(kind, filename):
+  if kind == 'HEAD':
+    return int(mfidx.indexBinHead(filename, mf.binHdr(kind)).size)
+  if kind.startswith('CONC'):
+    return int(mfidx.indexBinHead(filename, mfucn.ucnHdr()).size)
+  cbcHdr = mf.binHdr('CBCUF' if kind == 'CBCUF' else 'CBC')
+  return int(mfidx.indexBinCBC(filename, cbcHdr, mf.binHdr('XCBC')).size)
+
+def clearOutputs(files, folder):
+#
+#   Remove index sidecars and exported rasters so every repeat
+#   reads the binary file cold
+#
+  for name in os.listdir(folder):
+    if name.endswith(mfidx.IDXSUFFIX):
+      os.remove(os.path.join(folder, name))
+  outDir = os.path.join(folder, 'out')
+  shutil.rmtree(outDir, ignore_errors=True)
+  os.makedirs(outDir)
+  return outDir
+
+def runCase(name, files, folder, repeat):
+  kind, fn, kwargs, needs = CASES[name]
+  if needs and not available(needs):
+    return {'skipped': "{} is not installed".format(needs)}
+  kinds = kind.split('+')
+  megabytes = sum(os.path.getsize(files[k]) for k in kinds) / 1048576.0
+  records = sum(recordCount(k, files[k]) for k in kinds)
+  times = []
+  with open(os.devnull, 'w') as devnull:
+    for n in range(repeat + 1):
+      outDir = clearOutputs(files, folder)
+      # The final pass is traced for peak memory and is not timed
+      traced = n == repeat
+      if traced: tracemalloc.start()
+      start = time.perf_counter()
+      try:
+        with contextlib.redirect_stdout(devnull):
+          fn(files, outDir, **kwargs)
+      except SystemExit as e:
+        if traced: tracemalloc.stop()
+        return {'failed': "exit {}".format(e.code)}
+      if traced:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+      else:
+        times.append(time.perf_counter() - start)
+  best = min(times)
+  return {'seconds': best, 'mean': sum(times)/len(times),
+          'MB': megabytes, 'MBps': megabytes/best,
+          'records': records, 'recordsPerSec': records/best,
+          'peakMB': peak / 1048576.0}
+
+def revision():
+  try:
+    return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                   cwd=ROOT, stderr=subprocess.DEVNULL)\
+                     .decode('ascii').strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+def main():
+  parser = argparse.ArgumentParser(description="Binary read benchmarks")
+  parser.add_argument('-grid', default='200x200',
+                      help="NROWxNCOL grids, comma separated")
+  parser.add_argument('-lays', type=int, default=3, help="Layers")
+  parser.add_argument('-pers', type=int, default=12, help="Stress periods")
+  parser.add_argument('-repeat', type=int, default=3,
+                      help="Timed runs per case (best is reported)")
+  parser.add_argument('-cases', default=','.join(CASES),
+                      help="Cases to run, comma separated")
+  parser.add_argument('-dir', dest='folder', default=None,
+                      help="Folder for synthetic files (default temporary)")
+  parser.add_argument('-keep', action='store_true',
+                      help="Keep the synthetic files")
+  parser.add_argument('-json', dest='jsonFile', default=None,
+                      help="Write results to a JSON file")
+  args = parser.parse_args()
+  cases = [c.strip() for c in args.cases.split(',') if c.strip()]
+  for name in cases:
+    if name not in CASES:
+      print("Unknown case '{}': choose from {}".format(name, list(CASES)))
+      return 2
+
+  report = {'revision': revision(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'layers': args.lays, 'periods': args.pers,
+            'repeat': args.repeat, 'grids': {}}
+  for grid in args.grid.split(','):
+    nrows, ncols = synthModel.parseGrid(grid)
+    folder = args.folder or tempfile.mkdtemp(prefix='mfbench')
+    folder = os.path.join(folder, '{}x{}'.format(nrows, ncols))
+    files = synthModel.writeModel(folder, args.lays, nrows, ncols, args.pers)
+    nam = mfnam.nameFile(files['nam'])
+    mf.discDict = mfdis.disFile(nam.fullPath(nam.filename('DIS')), nam,
+                                nam.entry('DIS').unit).discDict()
+    results = {}
+    print("{} x {} grid, {} layers, {} periods".format(nrows, ncols,
+                                                        args.lays, args.pers))
+    for name in cases:
+      results[name] = result = runCase(name, files, folder, args.repeat)
+      if 'seconds' in result:
+        print("  {:<18} {:8.3f} s {:9.1f} MB/s {:10.0f} rec/s {:8.1f} MB peak"\
+              .format(name, result['seconds'], result['MBps'],
+                      result['recordsPerSec'], result['peakMB']))
+      else:
+        print("  {:<18} {}".format(name, result.get('skipped') or
+                                         result.get('failed')))
+    report['grids'][grid] = results
+    if not args.keep:
+      shutil.rmtree(folder, ignore_errors=True)
+      if not args.folder: shutil.rmtree(os.path.dirname(folder),
+                                        ignore_errors=True)
+  if args.jsonFile:
+    with open(args.jsonFile, 'w') as f:
+      json.dump(report, f, indent=1)
+  return 1 if any('failed' in r for g in report['grids'].values()
+                  for r in g.values()) else 0
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+..module::importTime
+  ::synopsis: Import time guard for batch (-noArcGIS -quiet) runs:
+  :           python benchmarks/importTime.py [-budget 1.0] [-repeat 5]
+  :           Each repeat imports ReadModflowBinaryV2 in a fresh
+  :           interpreter, reporting the best import time and any
+  :           heavy library (arcpy, GDAL, pandas, tkinter, easygui,
+  :           matplotlib) loaded as a side effect.  Exits 1 when the
+  :           budget is exceeded or a heavy library is imported
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+HEAVY = ['arcpy', 'osgeo', 'pandas', 'tkinter', 'Tkinter', 'easygui',
+         'matplotlib', 'netCDF4']
+MODULES = ['ReadModflowBinaryV2', 'MFbinary.MFbinaryData']
+
+PROBE = """
+import sys, time, json
+t = time.perf_counter()
+import {module}
+t = time.perf_counter() - t
+heavy = sorted(m for m in {heavy} if m in sys.modules)
+print(json.dumps({{'seconds': t, 'heavy': heavy}}))
+"""
+
+def importProbe(module, root):
+#
+#   Import one module in a fresh interpreter rooted at the repo
+#
+  out = subprocess.check_output([sys.executable, '-c',
+                                 PROBE.format(module=module, heavy=HEAVY)],
+                                cwd=root)
+  return json.loads(out.decode('utf-8').strip().splitlines()[-1])
+
+def main():
+  parser = argparse.ArgumentParser(description="Import time guard")
+  parser.add_argument('-budget', type=float, default=1.0,
+                      help="Seconds allowed for each import")
+  parser.add_argument('-repeat', type=int, default=5,
+                      help="Fresh interpreters per module (best is kept)")
+  parser.add_argument('-json', dest='jsonFile', default=None,
+                      help="Write results to a JSON file")
+  args = parser.parse_args()
+  root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+  results = {}
+  failed = False
+  for module in MODULES:
+    probes = [importProbe(module, root) for n in range(args.repeat)]
+    best = min(p['seconds'] for p in probes)
+    heavy = sorted(set(m for p in probes for m in p['heavy']))
+    ok = best <= args.budget and not heavy
+    failed = failed or not ok
+    results[module] = {'seconds': best, 'heavy': heavy, 'ok': ok}
+    print("{:<25} {:7.3f} s  {}  {}".format(module, best,
+          'ok  ' if ok else 'FAIL', ','.join(heavy)))
+  if args.jsonFile:
+    with open(args.jsonFile, 'w') as f:
+      json.dump({'budget': args.budget, 'results': results}, f, indent=1)
+  return 1 if failed else 0
+
+if __name__ == '__main__':
+  sys.exit(main())
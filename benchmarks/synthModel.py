@@ -0,0 +1,213 @@
+"""
+..module::synthModel
+  ::synopsis: Benchmarks use:
+  :           import synthModel
+  :           Synthetic Modflow model for benchmarking: binary HEAD,
+  :           MT3D species (MT3D001.UCN, MT3D002.UCN), CellxCell budget
+  :           files in standard, UNFORMATTED and compact layouts
+  :           matching binHdr, with NAM, DIS, LPF, OC and MT3D NAM/BTN
+  :           stubs naming them.
+  :           python benchmarks/synthModel.py -dir DIR [-grid 200x200]
+  :                  [-lays 3] [-pers 12]
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import os
+import sys
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from MFbinary.MFbinaryIndex import binHdr
+from MFbinary.MFucn import ucnHdr, ucnFilename
+
+#   Unit numbers and filenames written into the namefile
+FILES = {'LIST':(2,'model.lst'), 'BAS6':(1,'model.bas'),
+         'DIS':(11,'model.dis'), 'LPF':(12,'model.lpf'),
+         'OC':(14,'model.oc'), 'HEAD':(51,'model.hds'),
+         'CBC':(50,'model.cbc')}
+MT3DNAM = 'mt3d.nam'
+BTNFILE = 'mt3d.btn'
+SPECIES = 2
+UFFILE = 'model_uf.cbc'
+COMPACTFILE = 'model_compact.cbc'
+CELLSIZE = 1000.0
+
+def parseGrid(grid):
+#
+#   '200x300' -> (200, 300) rows and columns
+#
+  nrows, ncols = grid.lower().split('x')
+  return int(nrows), int(ncols)
+
+def budgetTerms(nlays):
+  terms = ['CONSTANT HEAD', 'FLOW RIGHT FACE', 'FLOW FRONT FACE']
+  if nlays > 1: terms.append('FLOW LOWER FACE')
+  return terms + ['WELLS', 'RECHARGE']
+
+def _text(text):
+  return text.encode('ascii').rjust(16)
+
+def _layerArrays(nlays, nrows, ncols, seed):
+  rng = np.random.default_rng(seed)
+  return [rng.random((nrows, ncols), dtype=np.float32) for k in range(nlays)]
+
+def writeHeads(filename, nlays, nrows, ncols, npers):
+#
+#   One record per layer per stress period
+#
+  Hdr = binHdr('HEAD')
+  text = _text('HEAD')
+  base = _layerArrays(nlays, nrows, ncols, 1)
+  with open(filename, 'wb') as f:
+    for kper in range(1, npers+1):
+      totim = float(kper)*30.0
+      for k in range(nlays):
+        f.write(np.array([(1, kper, 30.0, totim, text, ncols, nrows, k+1)],
+                         Hdr).tobytes())
+        f.write((base[k] + np.float32(kper)).tobytes())
+  return filename
+
+def writeUCN(filename, nlays, nrows, ncols, npers, species=1):
+#
+#   MT3D species file: one record per layer at the end of each
+#   stress period with the transport step count in NTRANS,
+#   concentrations in g/L
+#
+  Hdr = ucnHdr()
+  text = _text('CONCENTRATION')
+  base = _layerArrays(nlays, nrows, ncols, 2 + species)
+  with open(filename, 'wb') as f:
+    for kper in range(1, npers+1):
+      totim = float(kper)*30.0
+      for k in range(nlays):
+        f.write(np.array([(kper*10, 1, kper, totim, text, ncols, nrows, k+1)],
+                         Hdr).tobytes())
+        f.write((base[k]*np.float32(0.001*species)).tobytes())
+  return filename
+
+def writeCBC(filename, nlays, nrows, ncols, npers, layout='standard'):
+#
+#   Budget terms of budgetTerms() each stress period.
+#     standard  3D arrays after the CBC header
+#     uf        UNFORMATTED: header and data records wrapped in
+#               4 byte record markers (CBCUF)
+#     compact   XCBC headers with IMETH 1 flows, an IMETH 2 well list
+#               and IMETH 3 recharge on the top layer
+#
+  cbcHdr = binHdr('CBC')
+  xcbcHdr = binHdr('XCBC')
+  base = _layerArrays(nlays, nrows, ncols, 2)
+  flows = np.array(base).reshape(nlays, nrows, ncols)
+  knt = nrows*ncols
+  wells = np.arange(0, nlays*knt, max(nlays*knt//100, 1), dtype=np.int32)
+  wellList = np.zeros(wells.size, [('ICELL','<i4'), ('VALUE','<f4')])
+  wellList['ICELL'] = wells + 1
+  wellList['VALUE'] = -1000.0
+  recLay = np.ones(knt, np.int32)
+  marker = lambda n: np.int32(n).tobytes()
+  with open(filename, 'wb') as f:
+    for kper in range(1, npers+1):
+      totim = float(kper)*30.0
+      for term in budgetTerms(nlays):
+        data = flows + np.float32(kper)
+        if layout == 'compact':
+          f.write(np.array([(1, kper, _text(term), ncols, nrows, -nlays)],
+                           cbcHdr).tobytes())
+          imeth = {'WELLS':2, 'RECHARGE':3}.get(term, 1)
+          f.write(np.array([(imeth, 30.0, 30.0, totim)], xcbcHdr).tobytes())
+          if imeth == 2:
+            f.write(marker(wellList.size))
+            f.write(wellList.tobytes())
+          elif imeth == 3:
+            f.write(recLay.tobytes())
+            f.write(data[0].tobytes())
+          else:
+            f.write(data.tobytes())
+        else:
+          hdr = np.array([(1, kper, _text(term), ncols, nrows, nlays)],
+                         cbcHdr).tobytes()
+          if layout == 'uf':
+            f.write(marker(len(hdr)) + hdr + marker(len(hdr)))
+            f.write(marker(data.nbytes))
+            f.write(data.tobytes())
+            f.write(marker(data.nbytes))
+          else:
+            f.write(hdr)
+            f.write(data.tobytes())
+  return filename
+
+def writeStubs(folder, nlays, nrows, ncols, npers):
+#
+#   NAM, DIS, LPF and OC files naming the binary files
+#
+  nam = os.path.join(folder, 'model.nam')
+  with open(nam, 'w') as f:
+    f.write('# Synthetic benchmark model\n')
+    for ftype, (unit, name) in FILES.items():
+      if ftype in ('HEAD', 'CBC'): ftype = 'DATA(BINARY)'
+      f.write('{:<13} {:>3}  {}\n'.format(ftype, unit, name))
+  with open(os.path.join(folder, FILES['DIS'][1]), 'w') as f:
+    f.write('{} {} {} {} 4 2\n'.format(nlays, nrows, ncols, npers))
+    f.write(' '.join(['0']*nlays) + '\n')
+    f.write('CONSTANT {:g}\n'.format(CELLSIZE))
+    f.write('CONSTANT {:g}\n'.format(CELLSIZE))
+    f.write('CONSTANT 100.0\n')
+    for k in range(nlays):
+      f.write('CONSTANT {:g}\n'.format(50.0 - 100.0*k))
+    for kper in range(npers):
+      f.write(' 30.0 1 1.0 {}\n'.format('SS' if kper == 0 else 'TR'))
+  with open(os.path.join(folder, FILES['LPF'][1]), 'w') as f:
+    f.write('{} -999.0 0\n'.format(FILES['CBC'][0]))
+  with open(os.path.join(folder, FILES['OC'][1]), 'w') as f:
+    f.write('HEAD SAVE UNIT {}\n'.format(FILES['HEAD'][0]))
+    f.write('COMPACT BUDGET\n')
+    for kper in range(1, npers+1):
+      f.write('PERIOD {} STEP 1\n    SAVE HEAD\n    SAVE BUDGET\n'\
+              .format(kper))
+  # MT3D namefile and BTN header naming SPECIES components
+  with open(os.path.join(folder, MT3DNAM), 'w') as f:
+    f.write('LIST  16  mt3d.out\nBTN   1   {}\n'.format(BTNFILE))
+  with open(os.path.join(folder, BTNFILE), 'w') as f:
+    f.write('Synthetic benchmark model\nMT3D species\n')
+    f.write('{:10d}{:10d}{:10d}{:10d}{:10d}{:10d}\n'.format(
+            nlays, nrows, ncols, npers, SPECIES, SPECIES))
+  return nam
+
+def writeModel(folder, nlays, nrows, ncols, npers):
+#
+#   Write every synthetic file, returning a dictionary of paths
+#
+  if not os.path.exists(folder): os.makedirs(folder)
+  join = lambda name: os.path.join(folder, name)
+  return {'nam': writeStubs(folder, nlays, nrows, ncols, npers),
+          'HEAD': writeHeads(join(FILES['HEAD'][1]),
+                             nlays, nrows, ncols, npers),
+          'CONC': writeUCN(join(ucnFilename(1)),
+                           nlays, nrows, ncols, npers, 1),
+          'CONC2': writeUCN(join(ucnFilename(2)),
+                            nlays, nrows, ncols, npers, 2),
+          'CBC': writeCBC(join(FILES['CBC'][1]),
+                          nlays, nrows, ncols, npers),
+          'CBCUF': writeCBC(join(UFFILE),
+                            nlays, nrows, ncols, npers, 'uf'),
+          'XCBC': writeCBC(join(COMPACTFILE),
+                           nlays, nrows, ncols, npers, 'compact')}
+
+def main():
+  parser = argparse.ArgumentParser(description="Synthetic Modflow model")
+  parser.add_argument('-dir', dest='folder', required=True,
+                      help="Folder for the model files")
+  parser.add_argument('-grid', default='200x200', help="NROWxNCOL")
+  parser.add_argument('-lays', type=int, default=3, help="Layers")
+  parser.add_argument('-pers', type=int, default=12, help="Stress periods")
+  args = parser.parse_args()
+  nrows, ncols = parseGrid(args.grid)
+  for kind, path in sorted(writeModel(args.folder, args.lays, nrows, ncols,
+                                      args.pers).items()):
+    print("{:<6} {:>12,d} bytes  {}".format(kind, os.path.getsize(path), path))
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main())
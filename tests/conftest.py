@@ -0,0 +1,29 @@
+"""
+..module::conftest
+  ::synopsis: pytest fixtures shared by the tests:
+  :           a small synthetic Modflow model written by
+  :           benchmarks/synthModel.py
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in (ROOT, os.path.join(ROOT, 'benchmarks')):
+  if folder not in sys.path:
+    sys.path.insert(0, folder)
+
+import synthModel
+
+#   Small grid: 2 layers of 6 rows by 5 columns for 4 stress periods
+NLAYS, NROWS, NCOLS, NPERS = 2, 6, 5, 4
+
+@pytest.fixture
+def model(tmp_path):
+#
+#   Paths of the synthetic model files keyed as by writeModel
+#
+  return synthModel.writeModel(str(tmp_path), NLAYS, NROWS, NCOLS, NPERS)
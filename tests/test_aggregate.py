@@ -0,0 +1,98 @@
+"""
+..module::test_aggregate
+  ::synopsis: Streaming Welford and P-square aggregates against NumPy,
+  :           chunk merging and calendar windows
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import numpy as np
+import pytest
+import MFbinary.MFaggregate as MFagg
+
+@pytest.fixture
+def records():
+  rng = np.random.default_rng(7)
+  return rng.normal(10.0, 2.0, size=(120, 8, 9)).astype(np.float32)
+
+def _stats(records, stats):
+  cells = MFagg.CellStats(stats)
+  for array in records:
+    cells.update(array)
+  return cells
+
+def test_welfordMatchesNumpy(records):
+  cells = _stats(records, ['mean', 'std', 'var', 'min', 'max', 'sum'])
+  data = records.astype(np.float64)
+  assert np.allclose(cells.result('mean'), np.mean(data, axis=0))
+  assert np.allclose(cells.result('var'), np.var(data, axis=0, ddof=1))
+  assert np.allclose(cells.result('std'), np.std(data, axis=0, ddof=1))
+  assert (cells.result('min') == data.min(axis=0)).all()
+  assert (cells.result('max') == data.max(axis=0)).all()
+  assert np.allclose(cells.result('sum'), data.sum(axis=0))
+
+def test_p2MatchesPercentile(records):
+  cells = _stats(records, ['median', 'p10', 'p90'])
+  data = records.astype(np.float64)
+  for stat, q in (('median', 50), ('p10', 10), ('p90', 90)):
+    spread = np.percentile(data, 75, axis=0) - np.percentile(data, 25, axis=0)
+    error = np.abs(cells.result(stat) - np.percentile(data, q, axis=0))
+    assert error.mean() < 0.1*spread.mean()
+
+def test_p2FewRecordsExact(records):
+  cells = _stats(records[:4], ['median'])
+  assert np.allclose(cells.result('median'), np.median(records[:4], axis=0))
+
+def test_mergeMatchesSequential(records):
+  stats = ['mean', 'var', 'min', 'max', 'sum', 'median', 'p90']
+  whole = _stats(records, stats)
+  merged = MFagg.CellStats(stats)
+  for a, b in ((0, 3), (3, 50), (50, 51), (51, 120)):
+    merged.merge(_stats(records[a:b], stats))
+  assert merged.count == whole.count
+  for stat in ('mean', 'var', 'min', 'max', 'sum'):
+    assert np.allclose(merged.result(stat), whole.result(stat))
+  data = records.astype(np.float64)
+  for stat, q in (('median', 50), ('p90', 90)):
+    error = np.abs(merged.result(stat) - np.percentile(data, q, axis=0))
+    assert error.mean() < 0.25
+
+def test_mergeTrendingRecords():
+  # Chunks in time order hold disjoint value ranges
+  data = np.arange(1, 61, dtype=np.float64)[:, None]*100.0
+  merged = MFagg.CellStats(['median', 'p90'])
+  for a in range(0, 60, 5):
+    merged.merge(_stats(data[a:a+5], ['median', 'p90']))
+  assert abs(merged.result('median')[0] - np.percentile(data, 50)) <= 100
+  assert abs(merged.result('p90')[0] - np.percentile(data, 90)) <= 100
+
+def test_aggStats():
+  assert MFagg.aggStats({'aggregate': 'mean, P95'}) == ['mean', 'p95']
+  with pytest.raises(SystemExit):
+    MFagg.aggStats({'aggregate': 'mode'})
+
+def test_wetMonths():
+  assert MFagg.wetMonths({}) == MFagg.WETMONTHS
+  assert MFagg.wetMonths({'wetMonths': '11-4'}) == (1, 2, 3, 4, 11, 12)
+  assert MFagg.wetMonths({'wetMonths': '6,7,9'}) == (6, 7, 9)
+  with pytest.raises(SystemExit):
+    MFagg.wetMonths({'wetMonths': '0-3'})
+
+def _aggregator(**changes):
+  optArgs = {'aggregate': 'mean', 'aggBy': 'season,month',
+             'startDate': '2000-01-01', 'wetMonths': '5-10'}
+  optArgs.update(changes)
+  discDict = {'stepEnds': [[31.0], [60.0], [152.0]]}
+  return MFagg.StreamAggregator(optArgs, discDict)
+
+def test_windowsFromTotim():
+  agg = _aggregator()
+  # TOTIM 0.0 is the model start, not a missing time
+  assert agg._labels(0.0, 3, 1) == [None, 'DRY', 'M12']
+  assert agg._labels(152.0, 1, 1) == [None, 'WET', 'M05']
+  assert _aggregator(wetMonths='1-3')._labels(31.0, 1)[1] == 'WET'
+
+def test_windowsFromDisWithoutTotim():
+  agg = _aggregator()
+  assert agg._labels(None, 2, 1) == [None, 'DRY', 'M02']
+  assert agg._labels(np.float32('nan'), 3) == [None, 'WET', 'M05']
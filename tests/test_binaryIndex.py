@@ -0,0 +1,122 @@
+"""
+..module::test_binaryIndex
+  ::synopsis: Record indexes of HEAD and CellxCell budget files and
+  :           their .mfidx sidecar cache
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import os
+import numpy as np
+import MFbinary.MFbinaryIndex as mfidx
+from conftest import NLAYS, NROWS, NCOLS, NPERS
+
+def _cbcSequential(binfilename, uf=False):
+#
+#   Payload offsets of a standard or UNFORMATTED budget file found by
+#   reading every header and skipping its full 3D array
+#
+  cbcHdr = mfidx.binHdr('CBCUF' if uf else 'CBC')
+  offsets = []
+  size = os.path.getsize(binfilename)
+  with open(binfilename, 'rb') as f:
+    pos = 0
+    while pos < size:
+      f.seek(pos)
+      hdr = np.frombuffer(f.read(cbcHdr.itemsize), cbcHdr)[0]
+      nbytes = int(hdr['K'])*int(hdr['NR'])*int(hdr['NC'])*4
+      pos += cbcHdr.itemsize + (4 if uf else 0)
+      offsets.append(pos)
+      pos += nbytes + (4 if uf else 0)
+  return offsets
+
+def test_headOffsetsMatchSequentialScan(model):
+  Hdr = mfidx.binHdr('HEAD')
+  index = mfidx.indexBinHead(model['HEAD'], Hdr)
+  size = os.path.getsize(model['HEAD'])
+  with open(model['HEAD'], 'rb') as f:
+    sequential = mfidx._scanHeadSeq(f, Hdr, 0, size)
+  assert index.size == NLAYS*NPERS
+  assert (index['OFFSET'] == sequential['OFFSET']).all()
+  assert (index['KPER'] == sequential['KPER']).all()
+  assert (index['K'] == sequential['K']).all()
+  with open(model['HEAD'], 'rb') as f:
+    f.seek(int(index['OFFSET'][-1]))
+    last = np.frombuffer(f.read(NROWS*NCOLS*4), '<f4')
+  assert last.size == NROWS*NCOLS
+
+def test_headIndexStopsAtPartialRecord(model):
+  Hdr = mfidx.binHdr('HEAD')
+  with open(model['HEAD'], 'ab') as f:
+    f.write(np.zeros(1, Hdr).tobytes())
+  assert mfidx.indexBinHead(model['HEAD'], Hdr).size == NLAYS*NPERS
+
+def test_cbcOffsetsMatchSequentialScan(model):
+  for kind, uf in (('CBC', False), ('CBCUF', True)):
+    index = mfidx.indexBinCBC(model[kind], mfidx.binHdr(kind),
+                              mfidx.binHdr('XCBC'))
+    assert list(index['OFFSET']) == _cbcSequential(model[kind], uf)
+    assert (index['NBYTES'] == NLAYS*NROWS*NCOLS*4).all()
+    assert np.isnan(index['TOTIM']).all()
+
+def test_compactIndexChainsRecords(model):
+  index = mfidx.indexBinCBC(model['XCBC'], mfidx.binHdr('CBC'),
+                            mfidx.binHdr('XCBC'))
+  step = mfidx.binHdr('CBC').itemsize + mfidx.binHdr('XCBC').itemsize
+  ends = index['OFFSET'] + index['NBYTES']
+  assert (index['OFFSET'][1:] == ends[:-1] + step).all()
+  assert ends[-1] == os.path.getsize(model['XCBC'])
+  assert (index['TOTIM'] == index['KPER']*30.0).all()
+
+def _sidecarMtime(binfilename):
+  return os.stat(mfidx.sidecarName(binfilename)).st_mtime_ns
+
+def test_sidecarReusedWhenUnchanged(model):
+  Hdr = mfidx.binHdr('HEAD')
+  first = mfidx.cachedHeadIndex(model['HEAD'], Hdr, 'HEAD')
+  saved = _sidecarMtime(model['HEAD'])
+  again = mfidx.cachedHeadIndex(model['HEAD'], Hdr, 'HEAD')
+  assert _sidecarMtime(model['HEAD']) == saved
+  assert (again == first).all()
+
+def test_sidecarExtendedWhenFileGrows(model):
+  Hdr = mfidx.binHdr('HEAD')
+  first = mfidx.cachedHeadIndex(model['HEAD'], Hdr, 'HEAD')
+  with open(model['HEAD'], 'rb') as f:
+    record = f.read(Hdr.itemsize + NROWS*NCOLS*4)
+  with open(model['HEAD'], 'ab') as f:
+    f.write(record)
+  grown = mfidx.cachedHeadIndex(model['HEAD'], Hdr, 'HEAD')
+  assert grown.size == first.size + 1
+  assert (grown[:first.size] == first).all()
+  assert grown['OFFSET'][-1] == os.path.getsize(model['HEAD']) - \
+                                NROWS*NCOLS*4
+
+def test_sidecarRebuiltWhenRewritten(model):
+  Hdr = mfidx.binHdr('HEAD')
+  mfidx.cachedHeadIndex(model['HEAD'], Hdr, 'HEAD')
+  stat = os.stat(model['HEAD'])
+  # Same size, different records and a later modification time
+  data = bytearray(open(model['HEAD'], 'rb').read())
+  hdr = np.frombuffer(bytes(data[:Hdr.itemsize]), Hdr).copy()
+  hdr['KPER'] = 99
+  data[:Hdr.itemsize] = hdr.tobytes()
+  with open(model['HEAD'], 'wb') as f:
+    f.write(bytes(data))
+  os.utime(model['HEAD'], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+  rebuilt = mfidx.cachedHeadIndex(model['HEAD'], Hdr, 'HEAD')
+  assert rebuilt['KPER'][0] == 99
+  assert rebuilt.size == NLAYS*NPERS
+
+def test_sidecarRebuiltWhenTruncated(model):
+  Hdr = mfidx.binHdr('HEAD')
+  mfidx.cachedHeadIndex(model['HEAD'], Hdr, 'HEAD')
+  recSize = Hdr.itemsize + NROWS*NCOLS*4
+  with open(model['HEAD'], 'r+b') as f:
+    f.truncate(3*recSize)
+  assert mfidx.cachedHeadIndex(model['HEAD'], Hdr, 'HEAD').size == 3
+
+def test_sidecarOfAnotherKindIgnored(model):
+  mfidx.cachedHeadIndex(model['HEAD'], mfidx.binHdr('HEAD'), 'HEAD')
+  index, meta = mfidx.readSidecar(model['HEAD'], 'CBC')
+  assert index is None and meta is None
@@ -0,0 +1,144 @@
+"""
+..module::test_budget
+  ::synopsis: Compact CellxCell budget payloads of every IMETH: index
+  :           payload sizes and the sparse records decoded from them
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import numpy as np
+import pytest
+import MFbinary.MFbinaryIndex as mfidx
+import MFbinary.MFbudget as mfbud
+import MFbinary.MFheadFile as mfhds
+from MFbinary import BudgetFile
+
+NLAY, NROW, NCOL = 2, 3, 4
+KNT = NROW*NCOL
+
+def _text(name):
+  return name.encode('ascii').rjust(16)
+
+def _ints(*values):
+  return np.array(values, '<i4').tobytes()
+
+def _names(*names):
+  return b''.join(_text(n) for n in names)
+
+def _listRecords(idNames, auxNames, rows):
+  dt = np.dtype([(n, '<i4') for n in idNames] +
+                [(n, '<f4') for n in ['VALUE'] + auxNames])
+  return np.array(rows, dt).tobytes()
+
+def _payloads():
+#
+#   (term, IMETH, payload bytes) of one record of each compact IMETH
+#
+  full = np.arange(NLAY*KNT, dtype='<f4') + 1
+  layers = np.array([1]*(KNT-2) + [2, 2], '<i4')
+  # Cell 14 is layer 2 row 1 col 2; cell 3 repeats in the list
+  wells = [(3, -10.0), (14, -20.0), (3, -5.0)]
+  return [
+    ('IMETH0', 0, full.tobytes()),
+    ('IMETH1', 1, full.tobytes()),
+    ('IMETH2', 2, _ints(len(wells)) + _listRecords(['ICELL'], [], wells)),
+    ('IMETH3', 3, layers.tobytes() + (np.arange(KNT, dtype='<f4') + 1)\
+                                      .tobytes()),
+    ('IMETH4', 4, (np.ones(KNT, '<f4')*7).tobytes()),
+    ('IMETH5', 5, _ints(3) + _names('IFACE', 'CONDFACT') + _ints(2) +
+                  _listRecords(['ICELL'], ['IFACE', 'CONDFACT'],
+                               [(1, 1.5, 6.0, 0.5), (24, 2.5, 5.0, 0.25)])),
+    ('IMETH6', 6, _names('MODEL', 'PKG1', 'MODEL', 'PKG2') + _ints(2) +
+                  _names('FLOW-AREA') + _ints(2) +
+                  _listRecords(['ID1', 'ID2'], ['FLOW-AREA'],
+                               [(2, 1, 3.0, 9.0), (13, 2, 4.0, 8.0)])),
+  ]
+
+def _writeCompact(filename):
+  cbcHdr = mfidx.binHdr('CBC')
+  xcbcHdr = mfidx.binHdr('XCBC')
+  with open(filename, 'wb') as f:
+    for term, imeth, payload in _payloads():
+      f.write(np.array([(1, 1, _text(term), NCOL, NROW, -NLAY)],
+                       cbcHdr).tobytes())
+      f.write(np.array([(imeth, 1.0, 1.0, 0.0)], xcbcHdr).tobytes())
+      f.write(payload)
+  return filename
+
+@pytest.fixture
+def compact(tmp_path):
+  filename = _writeCompact(str(tmp_path / 'compact.cbc'))
+  index = mfidx.indexBinCBC(filename, mfidx.binHdr('CBC'),
+                            mfidx.binHdr('XCBC'))
+  return filename, index
+
+def test_payloadSizes(compact):
+  filename, index = compact
+  payloads = _payloads()
+  assert index.size == len(payloads)
+  assert list(index['IMETH']) == [imeth for term, imeth, data in payloads]
+  assert list(index['NBYTES']) == [len(data) for term, imeth, data in payloads]
+  # TOTIM 0.0 is a time, not a missing one
+  assert (index['TOTIM'] == 0.0).all()
+
+def _decoded(compact):
+  filename, index = compact
+  mm = mfhds.openMemmap(filename)
+  return dict((term, (rec, mm)) for (term, imeth, data), rec
+              in zip(_payloads(), index))
+
+def test_arrayMethodsAsLists(compact):
+  records = _decoded(compact)
+  rec, mm = records['IMETH1']
+  sparse = mfbud.budgetList(mm, rec)
+  assert sparse.size == NLAY*KNT
+  assert (sparse['LAYER'] == np.repeat([1, 2], KNT)).all()
+  assert sparse['VALUE'].sum() == np.arange(1, NLAY*KNT+1).sum()
+  rec, mm = records['IMETH3']
+  sparse = mfbud.budgetList(mm, rec)
+  assert list(sparse['LAYER'][-2:]) == [2, 2]
+  assert (sparse['ROW'][-1], sparse['COL'][-1]) == (NROW, NCOL)
+  rec, mm = records['IMETH4']
+  assert (mfbud.budgetList(mm, rec)['LAYER'] == 1).all()
+
+def test_listMethods(compact):
+  records = _decoded(compact)
+  rec, mm = records['IMETH2']
+  wells = mfbud.budgetList(mm, rec)
+  assert list(zip(wells['LAYER'], wells['ROW'], wells['COL'])) == \
+         [(1, 1, 3), (2, 1, 2), (1, 1, 3)]
+  rec, mm = records['IMETH5']
+  aux = mfbud.budgetList(mm, rec)
+  assert aux.dtype.names[4:] == ('IFACE', 'CONDFACT')
+  assert list(aux['CONDFACT']) == [0.5, 0.25]
+  assert (aux['LAYER'][1], aux['ROW'][1], aux['COL'][1]) == (2, 3, 4)
+  rec, mm = records['IMETH6']
+  raw = mfbud.rawList(mm, rec)
+  assert list(raw['ID2']) == [1, 2]
+  ids = mfbud.budgetList(mm, rec)
+  assert list(ids['VALUE']) == [3.0, 4.0]
+  assert list(ids['FLOW-AREA']) == [9.0, 8.0]
+
+def test_layersStaySparseUntilDensified(compact):
+  records = _decoded(compact)
+  rec, mm = records['IMETH2']
+  layers = dict(mfbud.budgetLayers(mm, rec, [1, 2]))
+  assert isinstance(layers[1], mfbud.SparseLayer)
+  dense = np.asarray(layers[1])
+  assert dense.shape == (NROW, NCOL) and dense.dtype == np.float32
+  # Repeated cells are summed
+  assert dense[0, 2] == -15.0 and dense.sum() == -15.0
+  assert np.asarray(layers[2])[0, 1] == -20.0
+  assert list(dict(mfbud.budgetLayers(mm, rec, [2]))) == [2]
+  rec, mm = records['IMETH3']
+  layers = dict(mfbud.budgetLayers(mm, rec, [1, 2]))
+  assert layers[2].sum() == KNT + KNT - 1
+  assert layers[1][-1, -1] == 0.0
+
+def test_budgetFileLists(compact):
+  filename, index = compact
+  cbc = BudgetFile(filename)
+  assert cbc.terms == [term for term, imeth, data in _payloads()]
+  rec, wells = next(cbc.lists('IMETH2'))
+  assert wells.size == 3
+  assert [lay for rec, lay, array in cbc.layers('IMETH4')] == [1]
@@ -0,0 +1,117 @@
+"""
+..module::test_modelFiles
+  ::synopsis: Namefile manifest, DIS array control records and MT3D
+  :           species discovery
+  ::created: 10-18-2026
+  ::Author: agent <agent@local>
+
+"""
+import os
+import shutil
+import numpy as np
+import MFbinary.MFnameFile as mfnam
+import MFbinary.MFdisFile as mfdis
+import MFbinary.MFucn as mfucn
+from conftest import NLAYS, NROWS, NCOLS, NPERS
+
+def _write(folder, name, text):
+  path = os.path.join(str(folder), name)
+  with open(path, 'w') as f:
+    f.write(text)
+  return path
+
+def test_parseLine():
+  entry = mfnam.parseLine("DATA(BINARY)  51  'out dir\\model.hds' replace")
+  assert entry == mfnam.NameEntry('DATA(BINARY)', 51, 'out dir\\model.hds',
+                                  'REPLACE', ())
+  entry = mfnam.parseLine('ucn 201 MT3D001.UCN old binary  # species 1')
+  assert entry.ftype == 'UCN' and entry.status == 'OLD'
+  assert entry.options == ('BINARY',)
+  assert mfnam.parseLine('# LIST 2 model.lst') is None
+  assert mfnam.parseLine('BAS6 x model.bas') is None
+  assert mfnam.parseLine('') is None
+
+def test_nameFile(tmp_path):
+  namfile = _write(tmp_path, 'model.nam',
+                   "# comment\nLIST 2 model.lst\nDIS 11 model.dis\n"
+                   "UPW 12 model.upw\nDATA(BINARY) 50 model.cbc\n"
+                   "DATA(BINARY) 51 model.hds REPLACE\n")
+  nam = mfnam.NameFile(namfile)
+  assert len(nam) == 5 and 'dis' in nam
+  assert nam.filename('LPF', 'UPW') == 'model.upw'
+  assert nam.filename('SWI2') == ''
+  assert [e.unit for e in nam.entries('data(binary)')] == [50, 51]
+  assert nam.fileByUnit(51) == 'model.hds'
+  assert nam.fullPath('model.dis') == os.path.join(str(tmp_path), 'model.dis')
+  assert mfnam.NameFile.fromJSON(nam.toJSON()).items == nam.items
+  assert mfnam.nameFile(namfile) is mfnam.nameFile(namfile)
+
+def test_synthDis(model):
+  nam = mfnam.nameFile(model['nam'])
+  dis = mfdis.DisFile(nam.fullPath(nam.filename('DIS')), nam)
+  assert (dis.nlay, dis.nrow, dis.ncol, dis.nper) == \
+         (NLAYS, NROWS, NCOLS, NPERS)
+  assert dis.uniform() and dis.delr[0] == 1000.0
+  assert dis.thickness().shape == (NLAYS, NROWS, NCOLS)
+  assert dis.discDict()['stepEnds'][-1] == [30.0*NPERS]
+
+def test_disArrayControls(tmp_path):
+  # Free and fixed format control records with internal, external
+  # and OPEN/CLOSE arrays; a quasi-3D confining bed under layer 1
+  _write(tmp_path, 'top.txt', '10 11 12\n13 14 15\n')
+  np.array([(1, 1, 1.0, 1.0, b'BOTM'.rjust(16), 3, 2, 2)],
+           mfdis.ARRAYHDR).tofile(os.path.join(str(tmp_path), 'bot2.bin'))
+  with open(os.path.join(str(tmp_path), 'bot2.bin'), 'ab') as f:
+    np.full(6, -30.0, '<f4').tofile(f)
+  _write(tmp_path, 'bot1.dat', '-5.0 -5.0 -5.0\n-5.0 -5.0 -5.0\n')
+  _write(tmp_path, 'model.nam', 'DIS 11 model.dis\nDATA 40 bot1.dat\n'
+                                'DATA(BINARY) 41 bot2.bin\n')
+  disfile = _write(tmp_path, 'model.dis',
+    '# structured grid\n'
+    '2 2 3 2 4 2\n'
+    '1 0\n'
+    'INTERNAL 1.0 (FREE) 0\n'
+    '100 2*200\n'
+    '        11        1.(2F10.0)                 0\n'
+    '      50.0      50.0\n'
+    'OPEN/CLOSE top.txt 1.0 (FREE) 0\n'
+    'EXTERNAL 40 1.0 (FREE) 0\n'
+    'CONSTANT -10\n'
+    '       -41        1.(BINARY)                 0\n'
+    '       10.0         1         1.0   SS\n'
+    '      20.0   3 2.0 TR\n')
+  nam = mfnam.NameFile(os.path.join(str(tmp_path), 'model.nam'))
+  dis = mfdis.DisFile(disfile, nam, 11)
+  assert list(dis.delr) == [100.0, 200.0, 200.0]
+  assert list(dis.delc) == [50.0, 50.0]
+  assert dis.top[1, 2] == 15.0
+  assert dis.botm.shape == (3, 2, 3)
+  assert (dis.bottoms()[:, 0, 0] == [-5.0, -30.0]).all()
+  assert (dis.tops()[:, 0, 0] == [10.0, -10.0]).all()
+  assert not dis.uniform()
+  assert list(dis.steady) == [True, False]
+  assert np.allclose(dis.stepEnds()[1], [10 + 20/7.0, 10 + 60/7.0, 30.0])
+
+def test_fortranFormat():
+  assert mfdis.fortranFormat('(10E12.4)') == (10, 12)
+  assert mfdis.fortranFormat('(F10.0)') == (1, 10)
+  assert mfdis.fortranFormat('(FREE)') is None
+
+def test_discoverSpecies(model):
+  path, namfile = os.path.split(model['nam'])
+  species = mfucn.discoverSpecies(path, namfile)
+  assert [(s.number, s.sorbed) for s in species] == [(1, False), (2, False)]
+  assert species[1].path == model['CONC2']
+  # A sorbed phase found in the model folder
+  shutil.copy(model['CONC'], os.path.join(path, mfucn.ucnFilename(1, True)))
+  species = mfucn.discoverSpecies(path, namfile)
+  assert mfucn.speciesType(species[1]) == 'SORB1'
+  assert [s.number for s in mfucn.selectSpecies(species)] == [1, 2]
+  assert len(mfucn.selectSpecies(species, 'all')) == 3
+  assert mfucn.selectSpecies(species, '1S') == [species[1]]
+
+def test_ucnIndex(model):
+  index = mfucn.ucnIndex(model['CONC2'])
+  assert index.size == NLAYS*NPERS
+  assert list(np.unique(index['NTRANS'])) == [10*p for p in
+                                               range(1, NPERS+1)]